@@ -0,0 +1,538 @@
+#!/usr/bin/env python3
+"""
+Chạy scrape → clean → split → parse cho nhiều URL từ dòng lệnh, không cần Streamlit.
+
+Pipeline gồm hai tầng song song:
+    - Tầng fetch: --fetch-workers trang được scrape cùng lúc (mượn driver từ pool),
+      tôn trọng giới hạn lịch sự theo host (--per-host, --host-delay).
+    - Tầng LLM: chunks của mọi trang dùng chung một thread pool --llm-workers,
+      nên trang nhỏ và trang lớn xen kẽ nhau mà tổng số request tới Ollama không vượt giới hạn.
+
+Trạng thái từng URL được lưu trong frontier SQLite: chạy lại cùng lệnh sẽ bỏ qua
+các URL đã xong (resume), kể cả URL đã ghi records ra output nhưng job dừng
+trước khi kịp đánh dấu done. Records được ghi ra file output ngay khi mỗi trang
+phân tích xong, mỗi record kèm field _source_url. Định dạng (JSONL, CSV hoặc
+Parquet, xem export.py) được suy ra từ phần mở rộng của -o hoặc chọn bằng --format.
+
+Ví dụ:
+    python batch_crawl.py --seed-file urls.txt -d "Họ và tên, Năm sinh, Quê quán" -o out.jsonl
+    python batch_crawl.py https://example.com/a https://example.com/b -d "Tên sản phẩm, Giá"
+    python batch_crawl.py --seed-file urls.txt -d "Họ và tên, Năm sinh" -o out.parquet
+"""
+
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+from env import load_env
+
+load_env()
+
+from export import EXPORTERS, as_record, get_exporter, iter_records
+from metrics import setup_logging
+from page_cache import normalize_url
+from parse import OLLAMA_NUM_PARALLEL, parse_with_ollama
+from page_content import SCRAPE_METHODS
+from scrape_utils import DomPipeline, detect_captcha, split_dom_content
+from table_extract import extract_structured
+
+logger = logging.getLogger(__name__)
+
+
+class Frontier:
+    """
+    Danh sách URL cần crawl, lưu trong SQLite để có thể resume.
+
+    Trạng thái: pending → done | failed. URL đang xử lý khi job bị dừng vẫn là
+    pending nên sẽ được crawl lại ở lần chạy sau, trừ khi records của nó đã
+    được ghi ra output (xem written_source_urls). Chỉ dùng từ một thread.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS frontier ("
+            " key TEXT PRIMARY KEY,"
+            " url TEXT NOT NULL,"
+            " status TEXT NOT NULL DEFAULT 'pending',"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " records INTEGER NOT NULL DEFAULT 0,"
+            " error TEXT,"
+            " added_at REAL NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def add(self, urls):
+        """
+        Thêm URL vào frontier (URL đã có, kể cả đã crawl xong, được giữ nguyên).
+
+        Returns:
+            int: Số URL mới được thêm
+        """
+        now = time.time()
+        before = self._conn.total_changes
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO frontier (key, url, added_at, updated_at) VALUES (?, ?, ?, ?)",
+            [(normalize_url(url), url, now, now) for url in urls],
+        )
+        self._conn.commit()
+        return self._conn.total_changes - before
+
+    def pending(self):
+        """Danh sách URL chưa crawl xong, theo thứ tự thêm vào."""
+        rows = self._conn.execute(
+            "SELECT url FROM frontier WHERE status = 'pending' ORDER BY added_at, rowid"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def retry_failed(self):
+        """Đưa các URL lỗi về lại pending."""
+        cursor = self._conn.execute(
+            "UPDATE frontier SET status = 'pending', attempts = 0, error = NULL WHERE status = 'failed'"
+        )
+        self._conn.commit()
+        return cursor.rowcount
+
+    def reset(self):
+        """Xóa toàn bộ frontier."""
+        self._conn.execute("DELETE FROM frontier")
+        self._conn.commit()
+
+    def mark_done(self, url, records):
+        self._conn.execute(
+            "UPDATE frontier SET status = 'done', records = ?, error = NULL,"
+            " attempts = attempts + 1, updated_at = ? WHERE key = ?",
+            (records, time.time(), normalize_url(url)),
+        )
+        self._conn.commit()
+
+    def mark_failed(self, url, error, max_attempts):
+        """
+        Ghi nhận lỗi; URL quay lại pending nếu chưa hết số lần thử.
+
+        Returns:
+            bool: True nếu URL sẽ được thử lại
+        """
+        key = normalize_url(url)
+        self._conn.execute(
+            "UPDATE frontier SET attempts = attempts + 1, error = ?, updated_at = ?,"
+            " status = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END"
+            " WHERE key = ?",
+            (str(error), time.time(), max_attempts, key),
+        )
+        self._conn.commit()
+        status = self._conn.execute("SELECT status FROM frontier WHERE key = ?", (key,)).fetchone()
+        return bool(status) and status[0] == 'pending'
+
+    def counts(self):
+        """
+        Returns:
+            dict: Số URL theo trạng thái
+        """
+        rows = self._conn.execute("SELECT status, COUNT(*) FROM frontier GROUP BY status").fetchall()
+        return dict(rows)
+
+    def close(self):
+        self._conn.close()
+
+
+class HostPoliteness:
+    """Giới hạn số request đồng thời và khoảng cách tối thiểu giữa hai request tới cùng host."""
+
+    def __init__(self, max_per_host=1, min_delay=1.0):
+        self.max_per_host = max(1, max_per_host)
+        self.min_delay = max(0.0, min_delay)
+        self._active = {}
+        self._next_allowed = {}
+
+    @staticmethod
+    def host_of(url):
+        return (urlsplit(url).hostname or "").lower()
+
+    def wait_time(self, host, now):
+        """Số giây phải chờ trước khi được gửi request tới host (inf nếu đang đủ số request)."""
+        if self._active.get(host, 0) >= self.max_per_host:
+            return float("inf")
+        return max(0.0, self._next_allowed.get(host, 0.0) - now)
+
+    def start(self, host, now):
+        self._active[host] = self._active.get(host, 0) + 1
+        self._next_allowed[host] = now + self.min_delay
+
+    def finish(self, host):
+        self._active[host] -= 1
+
+
+class ThroughputReport:
+    """Thống kê throughput của batch crawl (pages/min, records/min, thời gian từng tầng)."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.pages_fetched = 0
+        self.pages_done = 0
+        self.pages_failed = 0
+        self.retries = 0
+        self.records = 0
+        self.chunks = 0
+        self.skipped_chunks = 0
+        self.fetch_seconds = 0.0
+        self.parse_seconds = 0.0
+
+    def summary(self):
+        """
+        Returns:
+            dict: Các chỉ số tổng hợp tới thời điểm hiện tại
+        """
+        elapsed = time.perf_counter() - self.started
+        minutes = elapsed / 60 if elapsed > 0 else 0
+        return {
+            'elapsed_seconds': round(elapsed, 2),
+            'pages_done': self.pages_done,
+            'pages_failed': self.pages_failed,
+            'retries': self.retries,
+            'records': self.records,
+            'chunks': self.chunks,
+            'skipped_chunks': self.skipped_chunks,
+            'pages_per_min': round(self.pages_done / minutes, 2) if minutes else 0.0,
+            'records_per_min': round(self.records / minutes, 2) if minutes else 0.0,
+            'avg_fetch_seconds': round(self.fetch_seconds / max(1, self.pages_fetched), 2),
+            'avg_parse_seconds': round(self.parse_seconds / max(1, self.pages_done), 2),
+        }
+
+    def format(self):
+        s = self.summary()
+        return (
+            f"{s['pages_done']} trang xong, {s['pages_failed']} lỗi, {s['records']} records "
+            f"trong {s['elapsed_seconds']:.0f}s — {s['pages_per_min']:.1f} pages/min, "
+            f"{s['records_per_min']:.1f} records/min "
+            f"(fetch TB {s['avg_fetch_seconds']:.1f}s, parse TB {s['avg_parse_seconds']:.1f}s)"
+        )
+
+
+def fetch_and_split(url, args):
+    """
+    Tầng fetch: scrape, làm sạch và chia chunks một trang.
+
+    Returns:
+        dict: url, chunks, direct_records (records đọc thẳng từ bảng), captcha, fetch_seconds
+    """
+    start = time.perf_counter()
+    html = SCRAPE_METHODS[args.method](url, use_cache=not args.no_page_cache)
+    direct_records = []
+    if args.no_table_extract:
+        cleaned = DomPipeline(html).clean_text(include_links_images=args.include_links, base_url=url)
+    else:
+        # Bảng và khối "Nhãn: giá trị" được đọc trực tiếp, chỉ phần còn lại được chia chunks
+        extraction = extract_structured(
+            html, args.description, base_url=url, include_links_images=args.include_links
+        )
+        direct_records = extraction['records']
+        cleaned = extraction['residual_text']
+    chunks = split_dom_content(
+        cleaned, max_length=args.chunk_size, max_batches=args.max_chunks,
+        overlap_tokens=args.overlap_tokens
+    ) if cleaned else []
+    return {
+        'url': url,
+        'chunks': chunks,
+        'direct_records': direct_records,
+        'captcha': detect_captcha(html),
+        'fetch_seconds': time.perf_counter() - start,
+    }
+
+
+def parse_page(page, args, llm_executor):
+    """Tầng LLM: phân tích các chunks của một trang trên thread pool LLM dùng chung."""
+    start = time.perf_counter()
+    parsed = parse_with_ollama(
+        page['chunks'], args.description, use_cache=not args.no_llm_cache, executor=llm_executor,
+        structured_output=args.structured_output, direct_records=page['direct_records'],
+        relevance_threshold=args.relevance_threshold, chunk_budget=args.chunk_budget
+    )
+    page['parsed'] = parsed
+    page['parse_seconds'] = time.perf_counter() - start
+    return page
+
+
+def write_records(exporter, url, records):
+    """Ghi records của một trang qua exporter (JSONL/CSV flush ngay để không mất khi job bị dừng)."""
+    rows = []
+    for record in records:
+        row = {'_source_url': url}
+        row.update(as_record(record))
+        rows.append(row)
+    exporter.write(rows)
+
+
+def written_source_urls(path, format=None):
+    """
+    Số records đã có trong file output theo URL nguồn (_source_url, đã chuẩn hóa).
+
+    Records được ghi trước khi URL được đánh dấu done trong frontier, nên job bị
+    dừng giữa hai bước để lại URL pending đã có records; resume dùng kết quả này
+    để không ghi trùng. File bị cắt dở (dòng cuối JSONL, Parquet chưa close) chỉ
+    được đọc tới chỗ còn đọc được.
+
+    Returns:
+        Counter: URL đã chuẩn hóa -> số records
+    """
+    counts = Counter()
+    if not isinstance(path, (str, os.PathLike)) or not os.path.exists(path):
+        return counts
+    try:
+        for record in iter_records(path, format):
+            if record.get('_source_url'):
+                counts[normalize_url(record['_source_url'])] += 1
+    except Exception as e:
+        logger.warning(f"⚠️ Không đọc hết được {path} ({e}), chỉ bỏ qua URL đã đọc được")
+    return counts
+
+
+def read_seed_file(path):
+    """Đọc danh sách URL (mỗi dòng một URL, bỏ qua dòng trống và dòng bắt đầu bằng #; '-' là stdin)."""
+    handle = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        return [line.strip() for line in handle if line.strip() and not line.lstrip().startswith("#")]
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def run(args):
+    """
+    Chạy batch crawl theo tham số dòng lệnh.
+
+    Returns:
+        dict: Thống kê throughput cuối cùng
+    """
+    frontier = Frontier(args.frontier)
+    if args.reset:
+        frontier.reset()
+    if args.retry_failed:
+        logger.info(f"Đưa {frontier.retry_failed()} URL lỗi về hàng đợi")
+
+    seeds = list(args.urls)
+    if args.seed_file:
+        seeds.extend(read_seed_file(args.seed_file))
+    added = frontier.add(seeds)
+    politeness = HostPoliteness(args.per_host, args.host_delay)
+
+    # URL pending đã có records trong output (job dừng sau khi ghi, trước khi mark done)
+    written = Counter() if args.reset else written_source_urls(args.output, args.format)
+    recovered = 0
+
+    # Hàng đợi riêng theo host để URL của host đang phải chờ không chặn các host khác
+    pending = {}
+    for url in frontier.pending():
+        key = normalize_url(url)
+        if key in written:
+            frontier.mark_done(url, written[key])
+            recovered += 1
+            continue
+        pending.setdefault(politeness.host_of(url), deque()).append(url)
+    if recovered:
+        logger.info(f"Đánh dấu done {recovered} URL đã có records trong {args.output}")
+    logger.info(
+        f"Frontier {args.frontier}: thêm {added} URL mới, "
+        f"{sum(len(q) for q in pending.values())} URL cần crawl {frontier.counts()}"
+    )
+
+    report = ThroughputReport()
+    fetch_executor = ThreadPoolExecutor(max_workers=args.fetch_workers, thread_name_prefix="fetch")
+    llm_executor = ThreadPoolExecutor(max_workers=args.llm_workers, thread_name_prefix="llm")
+    # Mỗi trang đang chờ LLM giữ một thread (chỉ chờ, không tốn CPU)
+    page_executor = ThreadPoolExecutor(
+        max_workers=args.llm_workers + args.fetch_workers, thread_name_prefix="page"
+    )
+    # Giới hạn số trang đã fetch nhưng chưa parse để bộ nhớ không tăng vô hạn khi LLM chậm hơn fetch
+    max_waiting_pages = 2 * (args.llm_workers + args.fetch_workers)
+
+    fetching = {}  # future -> (url, host)
+    parsing = {}   # future -> url
+    last_report = time.perf_counter()
+
+    output = get_exporter(
+        args.output, args.format, columns=['_source_url'], description=args.description, append=True
+    )
+    try:
+        while pending or fetching or parsing:
+            now = time.monotonic()
+            next_wakeup = args.report_interval
+
+            # Gửi thêm trang vào tầng fetch nếu còn worker trống và host cho phép
+            submitted = True
+            while submitted and len(parsing) < max_waiting_pages:
+                submitted = False
+                for host in list(pending):
+                    if len(fetching) >= args.fetch_workers:
+                        break
+                    delay = politeness.wait_time(host, now)
+                    if delay > 0:
+                        next_wakeup = min(next_wakeup, delay)
+                        continue
+                    url = pending[host].popleft()
+                    if not pending[host]:
+                        del pending[host]
+                    politeness.start(host, now)
+                    fetching[fetch_executor.submit(fetch_and_split, url, args)] = (url, host)
+                    submitted = True
+
+            if not fetching and not parsing:
+                # Chỉ còn URL đang chờ tới lượt theo host-delay
+                time.sleep(next_wakeup)
+                continue
+
+            done, _ = wait(
+                list(fetching) + list(parsing), timeout=next_wakeup, return_when=FIRST_COMPLETED
+            )
+
+            for future in done:
+                if future in fetching:
+                    url, host = fetching.pop(future)
+                    politeness.finish(host)
+                    try:
+                        page = future.result()
+                    except Exception as e:
+                        if frontier.mark_failed(url, e, args.retries + 1):
+                            report.retries += 1
+                            pending.setdefault(host, deque()).append(url)
+                            logger.warning(f"🔁 {url}: lỗi khi scrape ({e}), sẽ thử lại")
+                        else:
+                            report.pages_failed += 1
+                            logger.error(f"❌ {url}: lỗi khi scrape - {e}")
+                        continue
+
+                    report.pages_fetched += 1
+                    report.fetch_seconds += page['fetch_seconds']
+                    if page['captcha']:
+                        logger.warning(f"⚠️ {url}: phát hiện captcha, kết quả có thể không đầy đủ")
+                    if not page['chunks']:
+                        records = page['direct_records']
+                        write_records(output, url, records)
+                        report.pages_done += 1
+                        report.records += len(records)
+                        frontier.mark_done(url, len(records))
+                        if records:
+                            logger.info(f"✅ {url}: {len(records)} records (không cần LLM)")
+                        else:
+                            logger.warning(f"⚠️ {url}: không có nội dung để phân tích")
+                        continue
+                    parsing[page_executor.submit(parse_page, page, args, llm_executor)] = url
+
+                else:
+                    url = parsing.pop(future)
+                    try:
+                        page = future.result()
+                    except Exception as e:
+                        report.pages_failed += 1
+                        frontier.mark_failed(url, e, 1)
+                        logger.error(f"❌ {url}: lỗi khi phân tích - {e}")
+                        continue
+
+                    records = page['parsed']['structured_data']
+                    write_records(output, url, records)
+                    frontier.mark_done(url, len(records))
+                    report.pages_done += 1
+                    report.records += len(records)
+                    report.chunks += page['parsed']['stats']['total_chunks']
+                    report.skipped_chunks += page['parsed']['stats']['skipped_chunks']
+                    report.parse_seconds += page['parse_seconds']
+                    logger.info(f"✅ {url}: {len(records)} records ({len(page['chunks'])} chunks)")
+
+            if time.perf_counter() - last_report >= args.report_interval:
+                last_report = time.perf_counter()
+                logger.info(f"📈 {report.format()}")
+    except KeyboardInterrupt:
+        logger.warning("⏹️ Đã dừng, chạy lại cùng lệnh để tiếp tục từ frontier")
+        for future in list(fetching) + list(parsing):
+            future.cancel()
+    finally:
+        output.close()
+        fetch_executor.shutdown(wait=False, cancel_futures=True)
+        page_executor.shutdown(wait=False, cancel_futures=True)
+        llm_executor.shutdown(wait=False, cancel_futures=True)
+
+    summary = report.summary()
+    summary['frontier'] = frontier.counts()
+    frontier.close()
+    logger.info(f"📊 {report.format()}")
+    logger.info(f"Frontier: {summary['frontier']}")
+    if args.report_file:
+        with open(args.report_file, "w", encoding="utf-8") as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(
+        description="Batch crawl nhiều URL: scrape → clean → split → parse với Ollama"
+    )
+    parser.add_argument("urls", nargs="*", help="Các URL cần crawl")
+    parser.add_argument("--seed-file", help="File danh sách URL, mỗi dòng một URL ('-' để đọc stdin)")
+    parser.add_argument("-d", "--description", required=True,
+                        help="Mô tả thông tin cần trích xuất, ví dụ 'Họ và tên, Năm sinh'")
+    parser.add_argument("-o", "--output", default="batch_results.jsonl",
+                        help="File kết quả (ghi nối tiếp), định dạng theo phần mở rộng .jsonl/.csv/.parquet")
+    parser.add_argument("--format", choices=sorted(EXPORTERS), default=None,
+                        help="Định dạng output nếu khác phần mở rộng của --output")
+    parser.add_argument("--frontier", default=os.path.join(".cache", "frontier.sqlite3"),
+                        help="File SQLite lưu trạng thái URL để resume")
+    parser.add_argument("--reset", action="store_true", help="Xóa frontier cũ trước khi chạy")
+    parser.add_argument("--retry-failed", action="store_true", help="Thử lại các URL lỗi ở lần chạy trước")
+    parser.add_argument("--method", choices=sorted(SCRAPE_METHODS), default="nobright",
+                        help="Phương thức scrape (mặc định nobright)")
+    parser.add_argument("--fetch-workers", type=int, default=int(os.getenv("CHROME_POOL_SIZE", "2")),
+                        help="Số trang scrape song song (mặc định CHROME_POOL_SIZE)")
+    parser.add_argument("--llm-workers", type=int, default=OLLAMA_NUM_PARALLEL,
+                        help="Số chunks gửi song song tới Ollama (mặc định OLLAMA_NUM_PARALLEL)")
+    parser.add_argument("--per-host", type=int, default=1, help="Số request đồng thời tối đa tới mỗi host")
+    parser.add_argument("--host-delay", type=float, default=1.0,
+                        help="Khoảng cách tối thiểu (giây) giữa hai request tới cùng host")
+    parser.add_argument("--retries", type=int, default=2, help="Số lần thử lại khi scrape lỗi")
+    parser.add_argument("--chunk-size", type=int, default=8000, help="Kích thước chunk (ký tự)")
+    parser.add_argument("--max-chunks", type=int, default=50, help="Số chunks mong muốn mỗi trang")
+    parser.add_argument("--overlap-tokens", type=int, default=0, help="Số token lặp lại giữa hai chunks")
+    parser.add_argument("--structured-output", action="store_true", default=None,
+                        help="Ép Ollama trả về JSON theo schema tạo từ --description")
+    parser.add_argument("--relevance-threshold", type=float, default=None,
+                        help="Bỏ qua chunks có điểm liên quan dưới ngưỡng 0..1 (mặc định RELEVANCE_THRESHOLD, 0 để tắt)")
+    parser.add_argument("--chunk-budget", type=int, default=None,
+                        help="Số chunks tối đa mỗi trang gửi tới Ollama, liên quan nhất trước")
+    parser.add_argument("--no-table-extract", action="store_true",
+                        help="Không đọc trực tiếp bảng HTML, gửi toàn bộ nội dung tới Ollama")
+    parser.add_argument("--include-links", action="store_true", help="Giữ lại links và hình ảnh")
+    parser.add_argument("--no-page-cache", action="store_true", help="Không dùng cache trang")
+    parser.add_argument("--no-llm-cache", action="store_true", help="Không dùng cache kết quả AI")
+    parser.add_argument("--report-interval", type=float, default=30.0,
+                        help="In throughput sau mỗi khoảng thời gian này (giây)")
+    parser.add_argument("--report-file", help="Ghi thống kê cuối cùng ra file JSON")
+    return parser
+
+
+def main(argv=None):
+    setup_logging()
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    if not args.urls and not args.seed_file and not os.path.exists(args.frontier):
+        parser.error("cần ít nhất một URL, --seed-file hoặc frontier có sẵn để resume")
+    args.fetch_workers = max(1, args.fetch_workers)
+    args.llm_workers = max(1, args.llm_workers)
+
+    summary = run(args)
+    return 1 if summary['pages_failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
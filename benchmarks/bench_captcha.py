@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+So sánh detect_captcha mới (một regex duy nhất trên HTML gốc) với bản cũ
+dùng BeautifulSoup, trên một corpus fixture sinh sẵn.
+
+Script kiểm tra hai bản cho cùng kết quả trên mọi fixture, sau đó đo thời gian.
+
+Chạy từ thư mục gốc của project:
+    python benchmarks/bench_captcha.py
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from scrape_utils import detect_captcha, detect_captcha_signals
+
+
+def detect_captcha_legacy(html_content):
+    """Bản detect_captcha trước đây, giữ lại để so sánh."""
+    soup = BeautifulSoup(html_content, "html.parser")
+    lower_html = html_content.lower()
+
+    captcha_keywords = ["captcha", "g-recaptcha", "h-captcha", "recaptcha", "human verification"]
+    for keyword in captcha_keywords:
+        if keyword in lower_html:
+            return True
+
+    captcha_scripts = [
+        "www.google.com/recaptcha/",
+        "www.gstatic.com/recaptcha/",
+        "hcaptcha.com",
+        "api.hcaptcha.com",
+    ]
+    for script_url in captcha_scripts:
+        if script_url in lower_html:
+            return True
+
+    captcha_div_ids = ["captcha", "recaptcha", "h-captcha"]
+    for div_id in captcha_div_ids:
+        if soup.find(id=div_id):
+            return True
+
+    captcha_patterns = [
+        r"data-sitekey\s*=",
+        r"api\.hcaptcha\.com",
+        r"onload=initRecaptcha",
+    ]
+    for pattern in captcha_patterns:
+        if re.search(pattern, html_content, re.IGNORECASE):
+            return True
+
+    return False
+
+
+def _page(body, rows=0):
+    table = "".join(
+        f"<tr><td>Nguyễn Văn {i}</td><td>19{i % 100:02d}</td><td>Hà Nội</td></tr>" for i in range(rows)
+    )
+    return f"<html><head><title>Test</title></head><body>{body}<table>{table}</table></body></html>"
+
+
+def build_corpus(large_rows=20000):
+    """
+    Sinh các fixture HTML: trang sạch, từng loại tín hiệu captcha và các biến thể hoa/thường.
+
+    Args:
+        large_rows (int): Số dòng bảng của các fixture lớn (tests dùng số nhỏ hơn để chạy nhanh)
+    """
+    bodies = {
+        'clean': "<p>Danh sách đại biểu</p>",
+        'clean_large': "<p>Danh sách đại biểu</p>",
+        'keyword': "<p>Please complete the CAPTCHA</p>",
+        'recaptcha_script': '<script src="https://www.google.com/recaptcha/api.js"></script>',
+        'gstatic_script': '<script src="https://WWW.GSTATIC.COM/recaptcha/releases/x.js"></script>',
+        'hcaptcha_script': '<script src="https://js.hcaptcha.com/1/api.js"></script>',
+        'div_id': '<div id="h-captcha"></div>',
+        'widget_class': '<div class="g-recaptcha"></div>',
+        'sitekey': '<div data-sitekey = "abc"></div>',
+        'sitekey_upper': '<div DATA-SITEKEY="abc"></div>',
+        'init_onload': '<body onload=initRecaptcha>',
+        'human_verification': "<h1>Human Verification required</h1>",
+        'human_verification_spaces': "<h1>Human  Verification</h1>",
+        'dotted_i': "<h1>HUMAN VERİFİCATİON</h1>",
+        'sitekey_no_equals': "<p>data-sitekey is documented here</p>",
+        'capture': "<p>Photo capture gallery</p>",
+    }
+    corpus = {}
+    for name, body in bodies.items():
+        rows = large_rows if name == 'clean_large' else 200
+        corpus[name] = _page(body, rows)
+    # Tín hiệu nằm ở cuối trang lớn: trường hợp xấu nhất cho việc quét
+    corpus['late_signal_large'] = _page("", large_rows) + '<div data-sitekey="x"></div>'
+    return corpus
+
+
+def _time(fn, html, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(html)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark detect_captcha")
+    parser.add_argument("--repeat", type=int, default=5, help="Số lần lặp cho mỗi fixture")
+    args = parser.parse_args()
+
+    corpus = build_corpus()
+    mismatches = 0
+    total_legacy = total_new = 0.0
+
+    print(f"{'fixture':<28}{'size':>10}{'verdict':>9}{'legacy ms':>12}{'new ms':>10}  signals")
+    for name, html in corpus.items():
+        legacy = detect_captcha_legacy(html)
+        new = detect_captcha(html)
+        if legacy != new:
+            mismatches += 1
+        legacy_time = _time(detect_captcha_legacy, html, args.repeat)
+        new_time = _time(detect_captcha, html, args.repeat)
+        total_legacy += legacy_time
+        total_new += new_time
+        signals = ",".join(s['signal'] for s in detect_captcha_signals(html))
+        flag = "" if legacy == new else "  MISMATCH"
+        print(
+            f"{name:<28}{len(html):>10}{str(new):>9}{legacy_time * 1000:>12.2f}"
+            f"{new_time * 1000:>10.3f}  {signals}{flag}"
+        )
+
+    print(f"\nTổng: legacy {total_legacy * 1000:.1f} ms, new {total_new * 1000:.2f} ms "
+          f"(nhanh hơn {total_legacy / total_new:.0f}x)")
+    if mismatches:
+        print(f"❌ {mismatches} fixture cho kết quả khác bản cũ")
+        sys.exit(1)
+    print("✅ Kết quả giống bản cũ trên toàn bộ fixture")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Benchmark xuất Excel: cách cũ (pandas to_excel + vòng lặp auto-width từng ô)
+so với export.py (openpyxl write_only + độ rộng cột vectorized).
+
+Đo rows/sec và bộ nhớ đỉnh (tracemalloc) với các kích thước bảng khác nhau,
+trên records sinh từ benchmarks/fixtures.person (cùng tên field đã chuẩn hóa
+như output thật của parse_with_ollama).
+
+Chạy từ thư mục gốc của project:
+    python benchmarks/bench_export.py
+    python benchmarks/bench_export.py --rows 1000 50000 --output benchmarks/results/export.json
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import pandas as pd
+
+from benchmarks.fixtures import person
+from export import records_to_excel
+
+
+def legacy_excel(records):
+    """Cách xuất Excel cũ của main.py (giữ lại để so sánh)."""
+    df = pd.DataFrame(records)
+    buffer = io.BytesIO()
+    with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
+        df.to_excel(writer, index=False, sheet_name='Parsed Data')
+        worksheet = writer.sheets['Parsed Data']
+        for column in worksheet.columns:
+            max_length = 0
+            column_letter = column[0].column_letter
+            for cell in column:
+                try:
+                    if len(str(cell.value)) > max_length:
+                        max_length = len(str(cell.value))
+                except Exception:
+                    pass
+            worksheet.column_dimensions[column_letter].width = min(max_length + 2, 50)
+    return buffer.getvalue()
+
+
+WRITERS = {
+    'legacy': legacy_excel,
+    'write_only': records_to_excel,
+}
+
+
+def measure(writer, records):
+    """Returns: dict seconds, rows_per_sec, peak_mb, bytes."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    data = writer(records)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'seconds': round(seconds, 4),
+        'rows_per_sec': round(len(records) / seconds) if seconds else None,
+        'peak_mb': round(peak / 1024 / 1024, 2),
+        'bytes': len(data),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark xuất Excel")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000, 50000], help="Số records mỗi lần đo")
+    parser.add_argument("--writers", nargs="+", choices=sorted(WRITERS), default=list(WRITERS))
+    parser.add_argument("--output", help="Ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    results = {}
+    print(f"{'rows':>8}{'writer':>12}{'giây':>10}{'rows/s':>10}{'peak MB':>10}{'KB':>9}")
+    for rows in args.rows:
+        records = [person(i) for i in range(rows)]
+        results[rows] = {}
+        for name in args.writers:
+            result = measure(WRITERS[name], records)
+            results[rows][name] = result
+            print(
+                f"{rows:>8}{name:>12}{result['seconds']:>10.3f}{result['rows_per_sec'] or 0:>10}"
+                f"{result['peak_mb']:>10.1f}{result['bytes'] / 1024:>9.0f}"
+            )
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({'benchmark': 'export', 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"\nĐã ghi kết quả: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Benchmark end-to-end offline cho pipeline scrape → clean → split → LLM → export.
+
+Không cần trình duyệt hay Ollama thật:
+    - Corpus HTML (benchmarks/fixtures.py, từ vài KB tới vài MB) được phục vụ
+      bởi một HTTP server cục bộ.
+    - LLM là server giả lập API Ollama (benchmarks/fake_ollama.py) với độ trễ
+      và tokens/sec cấu hình được; parse.py kết nối tới nó qua OLLAMA_HOST.
+
+Mỗi fixture được chạy --repeat lần, đo riêng từng tầng: fetch, extract_body,
+clean, split, llm, normalize và export. Kết quả (median/min/max từng tầng,
+số chunks, số records, recall so với số đại biểu trong fixture) được ghi ra
+file JSON để so sánh giữa các lần chạy (--compare).
+
+Chạy từ thư mục gốc của project:
+    python benchmarks/bench_pipeline.py
+    python benchmarks/bench_pipeline.py --fixtures small medium --latency 0.2 --tokens-per-sec 40
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/pipeline-20240101-120000.json
+"""
+
+import argparse
+import functools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.fake_ollama import FakeOllamaServer
+from benchmarks.fixtures import CORPUS_SIZES, write_corpus
+from metrics import setup_logging
+
+STAGES = ('fetch', 'extract_body', 'clean', 'split', 'llm', 'normalize', 'export')
+DESCRIPTION = "Họ và tên, Năm sinh, Quê quán"
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_directory(directory):
+    """Phục vụ thư mục fixture qua HTTP trên một thread nền; trả về (server, base_url)."""
+    handler = functools.partial(_QuietHandler, directory=directory)
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    host, port = httpd.server_address[:2]
+    return httpd, f"http://{host}:{port}"
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def fetch_http(url):
+    with urllib.request.urlopen(url, timeout=60) as response:
+        return response.read().decode("utf-8")
+
+
+def export_excel(records):
+    """Xuất Excel giống nút tải xuống trong main.py; trả về số byte."""
+    from export import records_to_excel
+
+    return len(records_to_excel(records))
+
+
+def run_once(url, args, fetch_fn):
+    """
+    Chạy pipeline một lần cho một URL.
+
+    Returns:
+        dict: timings (giây theo tầng), chunks, records, skipped_chunks, export_bytes
+    """
+    from json_salvage import salvage_json
+    from parse import parse_with_ollama
+    from field_names import normalize_field_names
+    from scrape_utils import DomPipeline, split_dom_content
+
+    timings = {}
+
+    start = time.perf_counter()
+    html = fetch_fn(url)
+    timings['fetch'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pipeline = DomPipeline(html)
+    pipeline.body()
+    timings['extract_body'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    cleaned = pipeline.clean_text()
+    timings['clean'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    chunks = split_dom_content(cleaned, max_length=args.chunk_size, max_batches=args.max_chunks)
+    timings['split'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    parsed = parse_with_ollama(
+        chunks, DESCRIPTION, max_workers=args.llm_workers, use_cache=False,
+        structured_output=args.structured_output
+    )
+    timings['llm'] = time.perf_counter() - start
+
+    # parse_with_ollama đã chuẩn hóa tên field bên trong; đo riêng trên records thô của model
+    raw_records = [
+        record for text in parsed['text_results'] for record in salvage_json(text)['records']
+    ]
+    start = time.perf_counter()
+    normalize_field_names(raw_records)
+    timings['normalize'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    export_bytes = export_excel(parsed['structured_data'])
+    timings['export'] = time.perf_counter() - start
+
+    return {
+        'timings': timings,
+        'chunks': len(chunks),
+        'records': len(parsed['structured_data']),
+        'skipped_chunks': parsed['stats']['skipped_chunks'],
+        'export_bytes': export_bytes,
+    }
+
+
+def summarize(runs):
+    stages = {}
+    for stage in STAGES:
+        values = [run['timings'][stage] for run in runs]
+        stages[stage] = {
+            'median': round(statistics.median(values), 5),
+            'min': round(min(values), 5),
+            'max': round(max(values), 5),
+        }
+    return stages
+
+
+def compare(current, baseline_path):
+    """In chênh lệch median từng tầng so với một file kết quả trước đó."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\nSo với {baseline_path} (commit {baseline['meta'].get('git_commit')}):")
+    print(f"{'fixture':<10}" + "".join(f"{stage:>14}" for stage in STAGES))
+    for name, result in current['fixtures'].items():
+        old = baseline['fixtures'].get(name)
+        if not old:
+            continue
+        cells = []
+        for stage in STAGES:
+            before, after = old['stages'][stage]['median'], result['stages'][stage]['median']
+            cells.append(f"{(after - before) / before:>+13.0%} " if before else f"{'-':>14}")
+        print(f"{name:<10}" + "".join(cells))
+
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end pipeline với Ollama giả lập")
+    parser.add_argument("--fixtures", nargs="+", choices=sorted(CORPUS_SIZES), default=list(CORPUS_SIZES),
+                        help="Các fixture cần chạy")
+    parser.add_argument("--fixtures-dir", help="Dùng các file .html có sẵn trong thư mục thay vì corpus sinh ra")
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần chạy mỗi fixture")
+    parser.add_argument("--latency", type=float, default=0.05, help="Độ trễ mỗi request của Ollama giả (giây)")
+    parser.add_argument("--tokens-per-sec", type=float, default=2000.0, help="Tốc độ sinh token của Ollama giả")
+    parser.add_argument("--prompt-tokens-per-sec", type=float, default=0.0, help="Tốc độ đánh giá prompt")
+    parser.add_argument("--llm-workers", type=int, default=4, help="Số chunks gửi song song")
+    parser.add_argument("--chunk-size", type=int, default=8000, help="Kích thước chunk (ký tự)")
+    parser.add_argument("--max-chunks", type=int, default=50, help="Số chunks mong muốn tối đa")
+    parser.add_argument("--structured-output", action="store_true", help="Dùng JSON schema mode")
+    parser.add_argument("--browser", action="store_true",
+                        help="Fetch bằng Chrome (scrape_website_nobright_only) thay vì HTTP thuần")
+    parser.add_argument("--output", help="File JSON kết quả (mặc định benchmarks/results/pipeline-<thời gian>.json)")
+    parser.add_argument("--compare", help="File JSON của lần chạy trước để so sánh")
+    return parser
+
+
+def main():
+    args = build_arg_parser().parse_args()
+    setup_logging(os.getenv("LOG_LEVEL", "WARNING"))
+
+    with tempfile.TemporaryDirectory() as tmp, \
+            FakeOllamaServer(args.latency, args.tokens_per_sec, args.prompt_tokens_per_sec) as llm:
+        # parse.py đọc OLLAMA_HOST khi import, nên phải đặt trước khi import pipeline
+        os.environ["OLLAMA_HOST"] = llm.url
+
+        if args.fixtures_dir:
+            names = sorted(n[:-5] for n in os.listdir(args.fixtures_dir) if n.endswith(".html"))
+            fixtures = {
+                name: {'people': None, 'bytes': os.path.getsize(os.path.join(args.fixtures_dir, f"{name}.html"))}
+                for name in names
+            }
+            directory = args.fixtures_dir
+        else:
+            fixtures = write_corpus(tmp, {name: CORPUS_SIZES[name] for name in args.fixtures})
+            directory = tmp
+        httpd, base_url = serve_directory(directory)
+
+        if args.browser:
+            from scrape_utils import scrape_website_nobright_only
+            fetch_fn = functools.partial(scrape_website_nobright_only, use_cache=False)
+        else:
+            fetch_fn = fetch_http
+
+        results = {}
+        try:
+            for name, info in fixtures.items():
+                url = f"{base_url}/{name}.html"
+                requests_before = llm.requests
+                runs = [run_once(url, args, fetch_fn) for _ in range(max(1, args.repeat))]
+                last = runs[-1]
+                results[name] = {
+                    'bytes': info['bytes'],
+                    'people': info['people'],
+                    'runs': len(runs),
+                    'chunks': last['chunks'],
+                    'skipped_chunks': last['skipped_chunks'],
+                    'records': last['records'],
+                    'recall': round(last['records'] / info['people'], 4) if info['people'] else None,
+                    'llm_requests_per_run': (llm.requests - requests_before) / len(runs),
+                    'export_bytes': last['export_bytes'],
+                    'stages': summarize(runs),
+                    'total_median': round(sum(
+                        statistics.median(run['timings'][stage] for run in runs) for stage in STAGES
+                    ), 5),
+                }
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+    report = {
+        'meta': {
+            'benchmark': 'pipeline',
+            'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'git_commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'args': vars(args),
+        },
+        'fixtures': results,
+    }
+
+    print(f"\n{'fixture':<10}{'KB':>9}{'chunks':>8}{'recall':>8}" + "".join(f"{stage:>13}" for stage in STAGES))
+    for name, result in results.items():
+        recall = f"{result['recall']:.0%}" if result['recall'] is not None else "-"
+        print(
+            f"{name:<10}{result['bytes'] / 1024:>9.0f}{result['chunks']:>8}{recall:>8}"
+            + "".join(f"{result['stages'][stage]['median'] * 1000:>11.1f}ms" for stage in STAGES)
+        )
+
+    output = args.output or os.path.join(
+        ROOT, "benchmarks", "results", f"pipeline-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\nĐã ghi kết quả: {output}")
+
+    if args.compare:
+        compare(report, args.compare)
+
+
+if __name__ == "__main__":
+    main()
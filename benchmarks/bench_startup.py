@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Báo cáo thời gian khởi động (cold start) của app theo kiểu `python -X importtime`.
+
+Chạy script/module cần đo trong một process Python mới:
+    - --repeat lần không có -X importtime để đo thời gian thực (median),
+    - một lần với -X importtime để phân tích: tổng thời gian import, các module
+      cấp cao nhất tốn thời gian nhất, và các dependency nặng (pandas, selenium,
+      langchain...) có bị import lúc khởi động hay không.
+
+Mặc định đo main.py (chạy như Streamlit ở bare mode, tức là tới lần render
+đầu tiên, chưa bấm nút nào).
+
+Chạy từ thư mục gốc của project:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --target parse --top 15 --output benchmarks/results/startup.json
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Các package nặng cần theo dõi: không nên bị import trước khi bước tương ứng chạy
+HEAVY_PACKAGES = (
+    'pandas', 'openpyxl', 'pyarrow', 'selenium', 'webdriver_manager', 'bs4', 'lxml',
+    'langchain_core', 'langchain_ollama', 'streamlit',
+)
+
+
+def target_code(target):
+    """Code Python để chạy target: file .py (runpy, như Streamlit chạy script) hoặc tên module."""
+    if target.endswith(".py"):
+        return (
+            "import logging, runpy; logging.disable(logging.CRITICAL); "
+            f"runpy.run_path({target!r}, run_name='__main__')"
+        )
+    return f"import {target}"
+
+
+def run_target(target, importtime=False):
+    """Chạy target trong process mới; trả về (giây, stderr)."""
+    command = [sys.executable]
+    if importtime:
+        command += ["-X", "importtime"]
+    command += ["-c", target_code(target)]
+    start = time.perf_counter()
+    completed = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, timeout=300)
+    seconds = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f"{target} lỗi khi chạy:\n{completed.stderr[-2000:]}")
+    return seconds, completed.stderr
+
+
+def parse_importtime(stderr):
+    """
+    Phân tích output của -X importtime.
+
+    Returns:
+        list: {'module', 'self_us', 'cumulative_us', 'depth'} theo thứ tự trong output
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            rows.append({
+                'module': name.strip(),
+                'self_us': int(self_us),
+                'cumulative_us': int(cumulative_us),
+                'depth': (len(name) - len(name.lstrip())) // 2,
+            })
+        except ValueError:
+            continue
+    return rows
+
+
+def summarize(rows, top):
+    """Tổng thời gian import, các module cấp cao nhất tốn nhất và trạng thái các package nặng."""
+    top_level = sorted((row for row in rows if row['depth'] == 0), key=lambda row: -row['cumulative_us'])
+    loaded = {}
+    for row in rows:
+        package = row['module'].split(".")[0]
+        if package in HEAVY_PACKAGES and row['module'] == package:
+            loaded[package] = round(row['cumulative_us'] / 1e6, 4)
+    return {
+        'import_seconds': round(sum(row['self_us'] for row in rows) / 1e6, 4),
+        'modules': len(rows),
+        'top_level': [
+            {'module': row['module'], 'seconds': round(row['cumulative_us'] / 1e6, 4)} for row in top_level[:top]
+        ],
+        'heavy_packages': {package: loaded.get(package) for package in HEAVY_PACKAGES},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Báo cáo thời gian khởi động theo -X importtime")
+    parser.add_argument("--target", default="main.py", help="File .py hoặc tên module cần đo")
+    parser.add_argument("--repeat", type=int, default=3, help="Số lần đo thời gian thực")
+    parser.add_argument("--top", type=int, default=10, help="Số module cấp cao nhất in ra")
+    parser.add_argument("--output", help="Ghi kết quả ra file JSON")
+    args = parser.parse_args()
+
+    wall = [run_target(args.target)[0] for _ in range(max(1, args.repeat))]
+    _, stderr = run_target(args.target, importtime=True)
+    report = summarize(parse_importtime(stderr), args.top)
+    report.update({'target': args.target, 'wall_seconds_median': round(statistics.median(wall), 4)})
+
+    print(f"{args.target}: khởi động {report['wall_seconds_median']:.2f}s (median {len(wall)} lần), "
+          f"import {report['import_seconds']:.2f}s cho {report['modules']} modules")
+    print(f"\nTop {args.top} import cấp cao nhất:")
+    for row in report['top_level']:
+        print(f"  {row['seconds'] * 1000:>9.1f}ms  {row['module']}")
+    print("\nPackage nặng lúc khởi động:")
+    for package, seconds in report['heavy_packages'].items():
+        status = f"{seconds * 1000:.1f}ms" if seconds is not None else "chưa import"
+        print(f"  {package:<18} {status}")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nĐã ghi kết quả: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Server giả lập HTTP API của Ollama (/api/generate) cho benchmark offline.
+
+Response được sinh xác định từ phần TEXT CONTENT của prompt: mỗi khối
+"Họ và tên: ... Năm sinh: ... Quê quán: ..." thành một record JSON (key giữ
+nguyên tiếng Việt như model thật hay trả về, để bước normalize_field_names có
+việc để làm). Thời gian trả lời mô phỏng model thật:
+    latency + prompt_tokens / prompt_tokens_per_sec + output_tokens / tokens_per_sec
+và được báo lại trong eval_count, prompt_eval_count, *_duration giống Ollama.
+
+Chạy riêng để dùng với app (OLLAMA_HOST=http://127.0.0.1:11435):
+    python benchmarks/fake_ollama.py --port 11435 --latency 0.2 --tokens-per-sec 40
+"""
+
+import argparse
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_RECORD_RE = re.compile(
+    r"Họ và tên:\s*(?P<name>[^\n]+?)\s*\n\s*Năm sinh:\s*(?P<year>\d+)\s*\n\s*Quê quán:\s*(?P<home>[^\n]+)"
+)
+CHARS_PER_TOKEN = 4
+
+
+def fake_records(prompt):
+    """Records mà model giả trả về cho một prompt."""
+    content = prompt.rsplit("TEXT CONTENT:", 1)[-1]
+    return [
+        {'Họ và tên': m.group('name'), 'Năm sinh': m.group('year'), 'Quê quán': m.group('home').strip()}
+        for m in _RECORD_RE.finditer(content)
+    ]
+
+
+class FakeOllamaServer:
+    """
+    Server Ollama giả chạy trên một thread nền.
+
+    Args:
+        latency (float): Thời gian cố định cho mỗi request (giây)
+        tokens_per_sec (float): Tốc độ sinh token output
+        prompt_tokens_per_sec (float): Tốc độ đánh giá prompt (0 = không tính)
+        host (str), port (int): Địa chỉ lắng nghe (port 0 = tự chọn)
+    """
+
+    def __init__(self, latency=0.0, tokens_per_sec=0.0, prompt_tokens_per_sec=0.0, host="127.0.0.1", port=0):
+        self.latency = latency
+        self.tokens_per_sec = tokens_per_sec
+        self.prompt_tokens_per_sec = prompt_tokens_per_sec
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send_json(self, payload, status=200):
+                # Một dòng JSON: hợp lệ cho cả response thường và stream NDJSON
+                body = (json.dumps(payload, ensure_ascii=False) + "\n").encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path.rstrip("/") in ("", "/api/version"):
+                    self._send_json({'version': 'fake'})
+                elif self.path.startswith("/api/tags"):
+                    self._send_json({'models': []})
+                else:
+                    self._send_json({'error': 'not found'}, 404)
+
+            def do_POST(self):
+                if not self.path.startswith("/api/generate"):
+                    self._send_json({'error': 'not found'}, 404)
+                    return
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                self._send_json(server.generate(request))
+
+        return Handler
+
+    def generate(self, request):
+        """Xử lý một request /api/generate (trả về một response, không stream)."""
+        with self._lock:
+            self.requests += 1
+        prompt = request.get('prompt', "")
+        records = fake_records(prompt)
+        if isinstance(request.get('format'), dict):
+            text = json.dumps({'records': records}, ensure_ascii=False)
+        else:
+            text = json.dumps(records, ensure_ascii=False)
+
+        prompt_tokens = max(1, len(prompt) // CHARS_PER_TOKEN)
+        output_tokens = max(1, len(text) // CHARS_PER_TOKEN)
+        prompt_seconds = prompt_tokens / self.prompt_tokens_per_sec if self.prompt_tokens_per_sec else 0.0
+        eval_seconds = output_tokens / self.tokens_per_sec if self.tokens_per_sec else 0.0
+        total = self.latency + prompt_seconds + eval_seconds
+        if total:
+            time.sleep(total)
+        return {
+            'model': request.get('model', 'fake'),
+            'created_at': time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            'response': text,
+            'done': True,
+            'done_reason': 'stop',
+            'total_duration': int(total * 1e9),
+            'load_duration': 0,
+            'prompt_eval_count': prompt_tokens,
+            'prompt_eval_duration': int(prompt_seconds * 1e9),
+            'eval_count': output_tokens,
+            'eval_duration': int(eval_seconds * 1e9),
+        }
+
+    def serve_forever(self):
+        """Chạy server trên thread hiện tại cho tới khi bị dừng."""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self._httpd.server_close()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Server Ollama giả lập cho benchmark")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--latency", type=float, default=0.2, help="Độ trễ cố định mỗi request (giây)")
+    parser.add_argument("--tokens-per-sec", type=float, default=40.0, help="Tốc độ sinh token output")
+    parser.add_argument("--prompt-tokens-per-sec", type=float, default=0.0, help="Tốc độ đánh giá prompt")
+    args = parser.parse_args()
+
+    server = FakeOllamaServer(args.latency, args.tokens_per_sec, args.prompt_tokens_per_sec, args.host, args.port)
+    print(f"Fake Ollama đang chạy tại {server.url} (Ctrl+C để dừng)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
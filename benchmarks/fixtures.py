@@ -0,0 +1,109 @@
+"""
+Sinh corpus trang HTML cố định cho benchmark pipeline.
+
+Mỗi trang là một danh sách đại biểu dạng khối "Nhãn: giá trị", kèm menu,
+sidebar và footer giống trang thật. Kích thước từ vài KB tới vài MB. Nội dung
+được sinh xác định (cùng tham số luôn cho cùng HTML) nên kết quả các lần chạy
+so sánh được với nhau.
+
+Chạy trực tiếp để lưu corpus ra thư mục (ví dụ để xem hoặc chỉnh tay):
+    python benchmarks/fixtures.py benchmarks/fixtures
+"""
+
+import argparse
+import os
+
+HO = ('Nguyễn', 'Trần', 'Lê', 'Phạm', 'Hoàng', 'Vũ', 'Đặng', 'Bùi')
+TEN = ('Văn An', 'Thị Bình', 'Minh Châu', 'Quốc Dũng', 'Thu Hà', 'Đức Khang', 'Ngọc Lan', 'Hữu Phúc')
+TINH = ('Hà Nội', 'Hải Phòng', 'Nghệ An', 'Thanh Hóa', 'Đà Nẵng', 'Cần Thơ', 'TP. Hồ Chí Minh')
+TRINH_DO = ('Cử nhân Luật', 'Thạc sĩ Kinh tế', 'Tiến sĩ Y khoa', 'Kỹ sư Xây dựng')
+CHUC_VU = ('Đại biểu chuyên trách', 'Phó Chủ nhiệm Ủy ban', 'Giám đốc Sở', 'Bí thư Tỉnh ủy')
+
+# Tên fixture -> số đại biểu trên trang
+CORPUS_SIZES = {
+    'small': 20,
+    'medium': 500,
+    'large': 5000,
+    'xlarge': 15000,
+}
+
+_NAV = "".join(f'<li><a href="/muc-{i}">Chuyên mục {i}</a></li>' for i in range(40))
+_SIDEBAR = "".join(
+    f'<div class="news"><a href="/tin/{i}">Tin tức số {i}: hoạt động của Quốc hội trong tuần</a>'
+    f'<p>Tóm tắt bản tin {i} về các phiên họp, chất vấn và giám sát.</p></div>'
+    for i in range(30)
+)
+
+
+def person(i):
+    """Dữ liệu của đại biểu thứ i (xác định theo i)."""
+    return {
+        'HoVaTen': f"{HO[i % len(HO)]} {TEN[(i // len(HO)) % len(TEN)]} {i}",
+        'NamSinh': str(1950 + i % 40),
+        'QueQuan': TINH[i % len(TINH)],
+        'TrinhDoChuyenMon': TRINH_DO[i % len(TRINH_DO)],
+        'ChucVu': CHUC_VU[(i // 3) % len(CHUC_VU)],
+    }
+
+
+def _person_html(i):
+    p = person(i)
+    return (
+        f'<div class="delegate"><img src="/anh/{i}.jpg" alt="Ảnh đại biểu">'
+        f"<p><b>Họ và tên:</b> {p['HoVaTen']}</p>"
+        f"<p><b>Năm sinh:</b> {p['NamSinh']}</p>"
+        f"<p><b>Quê quán:</b> {p['QueQuan']}</p>"
+        f"<p><b>Trình độ chuyên môn:</b> {p['TrinhDoChuyenMon']}</p>"
+        f"<p><b>Chức vụ:</b> {p['ChucVu']}</p></div>"
+    )
+
+
+def build_page(count):
+    """HTML của một trang có `count` đại biểu."""
+    people = "".join(_person_html(i) for i in range(count))
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>Danh sách đại biểu</title>"
+        "<style>.delegate{margin:4px}</style><script>var tracking = {enabled: true};</script></head>"
+        f"<body><nav><ul>{_NAV}</ul></nav><main><h1>Danh sách đại biểu Quốc hội</h1>{people}</main>"
+        f"<aside>{_SIDEBAR}</aside><footer>Bản quyền thuộc Văn phòng Quốc hội. "
+        "Địa chỉ: 22 Hùng Vương, Ba Đình, Hà Nội.</footer></body></html>"
+    )
+
+
+def build_corpus(sizes=None):
+    """
+    Returns:
+        dict: tên fixture -> {'html', 'people'} (số đại biểu để kiểm tra số records)
+    """
+    sizes = sizes or CORPUS_SIZES
+    return {name: {'html': build_page(count), 'people': count} for name, count in sizes.items()}
+
+
+def write_corpus(directory, sizes=None):
+    """
+    Ghi corpus ra thư mục, mỗi fixture một file <tên>.html.
+
+    Returns:
+        dict: tên fixture -> {'path', 'people', 'bytes'}
+    """
+    os.makedirs(directory, exist_ok=True)
+    written = {}
+    for name, fixture in build_corpus(sizes).items():
+        path = os.path.join(directory, f"{name}.html")
+        data = fixture['html'].encode("utf-8")
+        with open(path, "wb") as f:
+            f.write(data)
+        written[name] = {'path': path, 'people': fixture['people'], 'bytes': len(data)}
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sinh corpus HTML cho benchmark")
+    parser.add_argument("directory", help="Thư mục lưu các file HTML")
+    args = parser.parse_args()
+    for name, info in write_corpus(args.directory).items():
+        print(f"{name:<8} {info['bytes'] / 1024:>9.1f} KB  {info['people']:>6} đại biểu  {info['path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+Chia nội dung đã làm sạch thành các chunks theo số token thay vì số ký tự.
+
+Chunk chỉ được cắt tại ranh giới dòng, đoạn hoặc record (ví dụ dòng bắt đầu
+bằng số thứ tự, gạch đầu dòng hoặc nhãn lặp lại như "Họ và tên:"), nên thông
+tin của một người hay một dòng bảng không bị tách ra hai chunks.
+
+Số token được ước lượng (không cần tokenizer của model): từ ASCII khoảng
+4 ký tự/token, tiếng Việt có dấu khoảng 2 ký tự/token, mỗi dấu câu 1 token.
+
+Cấu hình qua biến môi trường (tùy chọn):
+    OLLAMA_NUM_CTX  Context window của model (mặc định 8192 tokens)
+"""
+
+import os
+import re
+from collections import Counter
+
+OLLAMA_NUM_CTX = int(os.getenv("OLLAMA_NUM_CTX", "8192"))
+# Số token dành cho phần hướng dẫn cố định của prompt
+PROMPT_OVERHEAD_TOKENS = 800
+# Tỉ lệ context còn lại dành cho chunk; phần còn lại để model trả về JSON
+CHUNK_CONTEXT_SHARE = 0.5
+CHARS_PER_TOKEN = 4
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_SENTENCE_RE = re.compile(r"(?<=[.!?;])\s+")
+_LIST_MARKER_RE = re.compile(r"^\s*(?:\d{1,4}[.)]\s|[-•*+]\s|STT\b)")
+_LABEL_RE = re.compile(r"^\s*([^:\n]{1,40}):")
+
+
+def estimate_tokens(text):
+    """
+    Ước lượng số token của một đoạn text.
+
+    Args:
+        text (str): Đoạn text
+
+    Returns:
+        int: Số token ước lượng
+    """
+    tokens = 0
+    for match in _TOKEN_RE.finditer(text):
+        piece = match.group()
+        if piece.isascii():
+            tokens += (len(piece) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+        else:
+            tokens += (len(piece) + 1) // 2
+    return tokens
+
+
+def context_chunk_budget(num_ctx=None):
+    """
+    Số token tối đa của một chunk để prompt và JSON trả về vừa context window.
+
+    Args:
+        num_ctx (int): Context window của model (mặc định OLLAMA_NUM_CTX)
+
+    Returns:
+        int: Số token tối đa cho một chunk
+    """
+    num_ctx = num_ctx or OLLAMA_NUM_CTX
+    return max(256, int((num_ctx - PROMPT_OVERHEAD_TOKENS) * CHUNK_CONTEXT_SHARE))
+
+
+def _record_label(lines):
+    """
+    Tìm nhãn mở đầu mỗi record: nhãn lặp lại ít nhất 3 lần và xuất hiện sớm nhất
+    (ví dụ "Họ và tên" trong danh sách đại biểu).
+    """
+    labels = []
+    for line in lines:
+        match = _LABEL_RE.match(line)
+        if match:
+            labels.append(match.group(1).strip().lower())
+    counts = Counter(labels)
+    for label in labels:
+        if counts[label] >= 3:
+            return label
+    return None
+
+
+def _is_record_start(line, record_label):
+    if not line.strip():
+        return True
+    if _LIST_MARKER_RE.match(line):
+        return True
+    if record_label:
+        match = _LABEL_RE.match(line)
+        return bool(match) and match.group(1).strip().lower() == record_label
+    return False
+
+
+def _split_word(word, budget):
+    """Cắt một từ quá dài (URL, chuỗi mã hóa...) theo ký tự thành các phần không quá `budget` token."""
+    parts = []
+    while estimate_tokens(word) > budget:
+        # Mỗi ký tự tối đa 1 token nên `budget` ký tự luôn vừa
+        size = budget * CHARS_PER_TOKEN
+        while size > budget and estimate_tokens(word[:size]) > budget:
+            size -= max(1, size // 8)
+        parts.append(word[:size])
+        word = word[size:]
+    parts.append(word)
+    return parts
+
+
+def _split_long_line(line, max_tokens):
+    """
+    Cắt một dòng quá dài theo câu, nếu vẫn quá dài thì theo từ, rồi theo ký tự.
+
+    Mỗi phần cộng thêm 1 token xuống dòng (như trong chunk_text) không vượt quá `max_tokens`.
+    """
+    budget = max(1, max_tokens - 1)
+    pieces = []
+    current, current_tokens = [], 0
+
+    def flush():
+        if current:
+            pieces.append(" ".join(current))
+        return [], 0
+
+    for sentence in _SENTENCE_RE.split(line):
+        for word in sentence.split(" ") if estimate_tokens(sentence) > budget else [sentence]:
+            parts = _split_word(word, budget)
+            # Các phần của một từ bị cắt đứng riêng, không bị nối bằng dấu cách
+            for part in parts[:-1]:
+                current, current_tokens = flush()
+                pieces.append(part)
+            word_tokens = max(1, estimate_tokens(parts[-1]))
+            if current and current_tokens + word_tokens > budget:
+                current, current_tokens = flush()
+            current.append(parts[-1])
+            current_tokens += word_tokens
+    flush()
+    return pieces
+
+
+def chunk_text(text, max_tokens, overlap_tokens=0):
+    """
+    Chia text thành các chunks không vượt quá `max_tokens`, chỉ cắt ở ranh giới dòng/record.
+
+    Args:
+        text (str): Nội dung đã làm sạch (mỗi phần tử trên một dòng)
+        max_tokens (int): Số token tối đa mỗi chunk
+        overlap_tokens (int): Số token cuối chunk trước được lặp lại đầu chunk sau
+
+    Returns:
+        list: Danh sách dict {'text', 'tokens'} theo thứ tự
+    """
+    raw_lines = text.split("\n")
+    record_label = _record_label(raw_lines)
+
+    # Mỗi phần tử: (dòng, số token, có phải điểm bắt đầu record không)
+    units = []
+    for line in raw_lines:
+        line_tokens = estimate_tokens(line) + 1
+        if line_tokens > max_tokens:
+            for i, piece in enumerate(_split_long_line(line, max_tokens)):
+                units.append((piece, estimate_tokens(piece) + 1, i == 0))
+        else:
+            units.append((line, line_tokens, _is_record_start(line, record_label)))
+
+    chunks = []
+    current = []
+    current_tokens = 0
+    overlap_count = 0
+
+    def emit(count):
+        """Emit `count` dòng đầu của chunk hiện tại, trả về (các dòng còn lại, số dòng overlap)."""
+        lines = current[:count]
+        chunk = "\n".join(u[0] for u in lines).strip("\n")
+        if chunk.strip():
+            chunks.append({'text': chunk, 'tokens': sum(u[1] for u in lines)})
+
+        # Lặp lại các dòng cuối của chunk vừa emit ở đầu chunk tiếp theo
+        overlap = []
+        if overlap_tokens > 0:
+            used = 0
+            for unit in reversed(lines):
+                if used + unit[1] > overlap_tokens:
+                    break
+                overlap.insert(0, unit)
+                used += unit[1]
+        remaining = overlap + current[count:]
+        return remaining, sum(u[1] for u in remaining), len(overlap)
+
+    for unit in units:
+        if current and current_tokens + unit[1] > max_tokens:
+            # Ưu tiên cắt tại điểm bắt đầu record gần nhất nếu chunk đã đầy ít nhất một nửa
+            cut = len(current)
+            if not unit[2]:
+                running = 0
+                for i, u in enumerate(current):
+                    if i > overlap_count and u[2] and running >= max_tokens // 2:
+                        cut = i
+                    running += u[1]
+            current, current_tokens, overlap_count = emit(cut)
+
+            # Bỏ bớt overlap nếu chunk mới không còn chỗ; phần còn lại quá dài thì emit luôn
+            while current and current_tokens + unit[1] > max_tokens:
+                if overlap_count:
+                    current_tokens -= current.pop(0)[1]
+                    overlap_count -= 1
+                else:
+                    current, current_tokens, overlap_count = emit(len(current))
+                    if current_tokens + unit[1] > max_tokens:
+                        current, current_tokens, overlap_count = [], 0, 0
+        current.append(unit)
+        current_tokens += unit[1]
+
+    if current and len(current) > overlap_count:
+        emit(len(current))
+    return chunks
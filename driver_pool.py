@@ -0,0 +1,311 @@
+"""
+Pool các Chrome WebDriver được giữ sẵn (warm) để tái sử dụng giữa các lần scrape.
+
+Mỗi lần khởi động headless Chrome tốn 1-3 giây, vì vậy thay vì tạo mới và
+quit driver cho từng URL, các hàm scrape mượn (lease) một driver từ pool và
+trả lại sau khi dùng xong. Pool là singleton của process nên vẫn tồn tại qua
+các lần Streamlit rerun script.
+
+Cấu hình qua biến môi trường (tùy chọn):
+    CHROME_POOL_SIZE             Số driver tối đa giữ trong pool (mặc định 2)
+    CHROME_MAX_PAGES_PER_DRIVER  Số trang tối đa trước khi tái tạo driver (mặc định 50)
+    CHROME_MAX_MEMORY_MB         Ngưỡng JS heap (MB) để tái tạo driver (mặc định 1024)
+    CHROME_LEASE_TIMEOUT         Thời gian chờ tối đa (giây) để mượn driver (mặc định 120)
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from page_ready import drain_network_log
+
+logger = logging.getLogger(__name__)
+
+# selenium và webdriver_manager chỉ được import khi tạo driver đầu tiên
+# (không làm chậm lúc khởi động app hay các bước không cần trình duyệt)
+
+
+def build_chrome_options():
+    """
+    Tạo ChromeOptions dùng chung cho các driver trong pool.
+
+    Returns:
+        ChromeOptions: Options cho headless Chrome.
+    """
+    import selenium.webdriver as webdriver
+
+    options = webdriver.ChromeOptions()
+    options.add_argument("--headless")  # Optional: Run in headless mode
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--window-size=1920,1080")
+    # Bật CDP performance log để page_ready theo dõi các network request đang chạy
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    return options
+
+
+class PooledDriver:
+    """Một driver trong pool kèm thông tin vòng đời của nó."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.created_at = time.time()
+        self.pages_loaded = 0
+        self.peak_memory_mb = 0.0
+
+
+class ChromeDriverPool:
+    """
+    Pool thread-safe các Chrome WebDriver.
+
+    Driver được mượn qua `lease()`, được reset (cookies, storage, tab) khi trả
+    lại, kiểm tra sức khỏe trước khi cho mượn và được tái tạo sau
+    `max_pages_per_driver` trang hoặc khi bộ nhớ vượt `max_memory_mb`.
+    """
+
+    def __init__(self, size=2, max_pages_per_driver=50, max_memory_mb=1024, lease_timeout=120):
+        self.size = max(1, size)
+        self.max_pages_per_driver = max_pages_per_driver
+        self.max_memory_mb = max_memory_mb
+        self.lease_timeout = lease_timeout
+
+        self._idle = []
+        self._total = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._driver_path = None
+        self._driver_path_lock = threading.Lock()
+
+        self.stats = {
+            'created': 0,
+            'leases': 0,
+            'recycled': 0,
+            'unhealthy': 0,
+        }
+
+    def _get_driver_path(self):
+        # ChromeDriverManager().install() chỉ cần gọi một lần cho cả pool
+        with self._driver_path_lock:
+            if self._driver_path is None:
+                from webdriver_manager.chrome import ChromeDriverManager
+
+                self._driver_path = ChromeDriverManager().install()
+            return self._driver_path
+
+    def _create(self):
+        logger.info("Launching chromedriver for pool...")
+        import selenium.webdriver as webdriver
+        from selenium.webdriver.chrome.service import Service
+
+        service = Service(self._get_driver_path())
+        driver = webdriver.Chrome(service=service, options=build_chrome_options())
+        with self._cond:
+            self.stats['created'] += 1
+        return PooledDriver(driver)
+
+    def _is_healthy(self, pooled):
+        try:
+            return bool(pooled.driver.window_handles) and pooled.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _memory_mb(self, pooled):
+        try:
+            used = pooled.driver.execute_script(
+                "return (window.performance && performance.memory) ? performance.memory.usedJSHeapSize : 0"
+            )
+            return (used or 0) / (1024 * 1024)
+        except Exception:
+            return 0.0
+
+    def _needs_recycle(self, pooled):
+        if self.max_pages_per_driver and pooled.pages_loaded >= self.max_pages_per_driver:
+            return True
+        if self.max_memory_mb and pooled.peak_memory_mb >= self.max_memory_mb:
+            return True
+        return False
+
+    def _reset(self, pooled):
+        """Xóa trạng thái của lần dùng trước: tab phụ, cookies, storage."""
+        driver = pooled.driver
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+
+        try:
+            driver.execute_script(
+                "try { window.localStorage.clear(); window.sessionStorage.clear(); } catch (e) {}"
+            )
+            origin = driver.execute_script("return window.location.origin")
+            if origin and origin != "null":
+                driver.execute_cdp_cmd(
+                    "Storage.clearDataForOrigin",
+                    {"origin": origin, "storageTypes": "all"},
+                )
+        except Exception:
+            pass
+
+        driver.delete_all_cookies()
+        driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+        driver.get("about:blank")
+        drain_network_log(driver)
+
+    def _discard(self, pooled):
+        try:
+            pooled.driver.quit()
+        except Exception:
+            pass
+        with self._cond:
+            self._total -= 1
+            self._cond.notify()
+
+    def acquire(self, timeout=None):
+        """
+        Mượn một driver khỏe mạnh từ pool, tạo mới nếu pool chưa đầy.
+
+        Args:
+            timeout (float): Thời gian chờ tối đa khi pool đang bận hết.
+
+        Returns:
+            PooledDriver: Driver đã được mượn.
+        """
+        timeout = self.lease_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            pooled = None
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Chrome driver pool has been closed")
+                    if self._idle:
+                        pooled = self._idle.pop()
+                        break
+                    if self._total < self.size:
+                        self._total += 1
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise TimeoutError(
+                            f"Không thể mượn Chrome driver sau {timeout} giây (pool size = {self.size})"
+                        )
+                    self._cond.wait(remaining)
+
+            if pooled is None:
+                try:
+                    pooled = self._create()
+                except Exception:
+                    with self._cond:
+                        self._total -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_healthy(pooled):
+                logger.warning("Chrome driver in pool is unhealthy, replacing it...")
+                with self._cond:
+                    self.stats['unhealthy'] += 1
+                self._discard(pooled)
+                continue
+
+            pooled.pages_loaded += 1
+            with self._cond:
+                self.stats['leases'] += 1
+            return pooled
+
+    def release(self, pooled):
+        """
+        Trả driver về pool. Driver hỏng hoặc đã đến hạn sẽ bị quit thay vì giữ lại.
+
+        Args:
+            pooled (PooledDriver): Driver đã mượn qua `acquire()`.
+        """
+        pooled.peak_memory_mb = max(pooled.peak_memory_mb, self._memory_mb(pooled))
+
+        if self._closed or not self._is_healthy(pooled):
+            self._discard(pooled)
+            return
+
+        if self._needs_recycle(pooled):
+            logger.info(
+                f"Recycling chrome driver after {pooled.pages_loaded} pages "
+                f"({pooled.peak_memory_mb:.0f} MB JS heap)"
+            )
+            with self._cond:
+                self.stats['recycled'] += 1
+            self._discard(pooled)
+            return
+
+        try:
+            self._reset(pooled)
+        except Exception as e:
+            logger.warning(f"Error while resetting chrome driver: {e}")
+            self._discard(pooled)
+            return
+
+        with self._cond:
+            self._idle.append(pooled)
+            self._cond.notify()
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """
+        Context manager mượn driver và luôn trả lại khi kết thúc.
+
+        Example:
+            with get_driver_pool().lease() as driver:
+                driver.get(url)
+        """
+        pooled = self.acquire(timeout)
+        try:
+            yield pooled.driver
+        finally:
+            self.release(pooled)
+
+    def close(self):
+        """Quit toàn bộ driver đang rảnh và ngăn việc mượn thêm."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for pooled in idle:
+            self._discard(pooled)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool():
+    """
+    Lấy pool driver dùng chung của process (tạo lần đầu khi được gọi).
+
+    Returns:
+        ChromeDriverPool: Pool singleton.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._closed:
+            _pool = ChromeDriverPool(
+                size=int(os.getenv("CHROME_POOL_SIZE", "2")),
+                max_pages_per_driver=int(os.getenv("CHROME_MAX_PAGES_PER_DRIVER", "50")),
+                max_memory_mb=float(os.getenv("CHROME_MAX_MEMORY_MB", "1024")),
+                lease_timeout=float(os.getenv("CHROME_LEASE_TIMEOUT", "120")),
+            )
+        return _pool
+
+
+def shutdown_driver_pool():
+    """Đóng pool driver dùng chung (được gọi tự động khi thoát process)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+atexit.register(shutdown_driver_pool)
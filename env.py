@@ -0,0 +1,25 @@
+"""
+Nạp file .env đúng một lần cho cả process.
+
+Entry point (main.py, batch_crawl.py) gọi load_env() trước khi import các
+module đọc biến môi trường lúc import; các module thư viện (parse, scrape_utils)
+cũng gọi để dùng được riêng lẻ, nhưng từ lần thứ hai trở đi không làm gì.
+"""
+
+import threading
+
+_loaded = False
+_lock = threading.Lock()
+
+
+def load_env():
+    """Nạp .env (python-dotenv) nếu chưa nạp; biến đã có trong môi trường không bị ghi đè."""
+    global _loaded
+    if _loaded:
+        return
+    with _lock:
+        if not _loaded:
+            from dotenv import load_dotenv
+
+            load_dotenv()
+            _loaded = True
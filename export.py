@@ -0,0 +1,487 @@
+"""
+Xuất kết quả phân tích ra Excel, JSONL, CSV và Parquet với bộ nhớ gần như không đổi.
+
+Excel: openpyxl ở chế độ write_only ghi từng dòng thẳng ra file tạm thay vì giữ
+cả workbook (mỗi ô một object) trong RAM. Độ rộng cột được tính trước khi ghi
+từ độ dài chuỗi của pandas (vectorized, có thể lấy mẫu với bảng rất lớn) thay
+vì duyệt lại từng ô của worksheet sau khi ghi.
+
+JSONL/CSV/Parquet: exporter nhận records theo từng đợt (ví dụ mỗi trang của
+batch_crawl) và ghi ngay ra đĩa; Parquet chỉ giữ tối đa một row group trong
+bộ nhớ. Cột được suy ra từ tên field đã chuẩn hóa (fields_from_description và
+các record đầu tiên); field mới xuất hiện sau khi schema đã cố định được gom
+vào cột _extra (JSON). iter_records() đọc lại output theo từng record, không
+cần nạp cả file.
+
+Parquet cần pyarrow (pip install pyarrow); các định dạng khác không cần thêm gì.
+pandas/openpyxl/pyarrow chỉ được import khi thật sự xuất file, nên import
+module này (để lấy EXPORTERS, MIME...) không làm chậm lúc khởi động app.
+"""
+
+import csv
+import io
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+
+from field_names import fields_from_description
+
+logger = logging.getLogger(__name__)
+
+# Giới hạn độ rộng cột (ký tự), giống giới hạn cũ trong main.py
+MAX_COLUMN_WIDTH = 50
+EXCEL_MIME = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+# Cột chứa các field không có trong schema (JSON), và số dòng mỗi row group Parquet
+EXTRA_COLUMN = "_extra"
+PARQUET_ROW_GROUP_SIZE = int(os.getenv("PARQUET_ROW_GROUP_SIZE", "10000"))
+
+
+def column_widths(df, max_width=MAX_COLUMN_WIDTH, sample_rows=None):
+    """
+    Độ rộng mỗi cột = độ dài lớn nhất của tiêu đề và giá trị + 2, tối đa max_width.
+
+    Args:
+        df (DataFrame): Dữ liệu
+        max_width (int): Độ rộng tối đa
+        sample_rows (int): Nếu bảng dài hơn, chỉ đo các dòng lấy mẫu đều (None = đo hết)
+
+    Returns:
+        list: Độ rộng theo thứ tự cột
+    """
+    import pandas as pd
+
+    if sample_rows and len(df) > sample_rows:
+        df = df.iloc[::-(-len(df) // sample_rows)]
+    widths = []
+    for column in df.columns:
+        values = df[column]
+        longest = values.astype(str).str.len().max() if len(values) else 0
+        longest = 0 if pd.isna(longest) else int(longest)
+        widths.append(min(max(longest, len(str(column))) + 2, max_width))
+    return widths
+
+
+def _cell_value(value, illegal_characters):
+    """Giá trị openpyxl ghi được: list/dict thành JSON, bỏ ký tự điều khiển Excel không chấp nhận."""
+    if isinstance(value, (list, dict)):
+        value = json.dumps(value, ensure_ascii=False)
+    if isinstance(value, str):
+        return illegal_characters.sub("", value)
+    return value
+
+
+def _prepare(df):
+    """Chuẩn bị DataFrame để ghi: NaN thành ô trống, cột object được làm sạch một lần theo cột."""
+    from openpyxl.cell.cell import ILLEGAL_CHARACTERS_RE
+
+    df = df.astype(object).where(df.notna(), None)
+    for column in df.columns:
+        if df[column].map(type).isin((str, list, dict)).any():
+            df[column] = df[column].map(lambda value: _cell_value(value, ILLEGAL_CHARACTERS_RE))
+    return df
+
+
+def write_excel(sheets, output=None, sample_rows=None):
+    """
+    Ghi một hoặc nhiều sheet ra file Excel bằng openpyxl write_only.
+
+    Args:
+        sheets (list): Danh sách (tên sheet, DataFrame, độ rộng cột hoặc None để tự tính)
+        output (str | file): Đường dẫn hoặc file object; None để trả về bytes
+        sample_rows (int): Số dòng lấy mẫu khi tính độ rộng cột (None = đo hết)
+
+    Returns:
+        bytes: Nội dung file nếu output là None
+    """
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+
+    workbook = Workbook(write_only=True)
+    for sheet_name, df, widths in sheets:
+        worksheet = workbook.create_sheet(title=sheet_name)
+        widths = widths or column_widths(df, sample_rows=sample_rows)
+        # Ở chế độ write_only, độ rộng cột phải được đặt trước khi ghi dòng đầu tiên
+        for index, width in enumerate(widths, start=1):
+            worksheet.column_dimensions[get_column_letter(index)].width = width
+        worksheet.append([str(column) for column in df.columns])
+        for row in _prepare(df).itertuples(index=False, name=None):
+            worksheet.append(row)
+
+    if output is None:
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+        return buffer.getvalue()
+    workbook.save(output)
+    return None
+
+
+def records_to_excel(records, sheet_name='Parsed Data', output=None):
+    """
+    Xuất danh sách records (structured_data) ra Excel.
+
+    Returns:
+        bytes: Nội dung file nếu output là None
+    """
+    import pandas as pd
+
+    df = records if isinstance(records, pd.DataFrame) else pd.DataFrame(records)
+    return write_excel([(sheet_name, df, None)], output)
+
+
+def text_results_to_excel(text_results, sheet_name='Parsed Text', output=None):
+    """
+    Xuất response thô của từng chunk (khi không có dữ liệu structured) ra Excel.
+
+    Returns:
+        bytes: Nội dung file nếu output là None
+    """
+    import pandas as pd
+
+    df = pd.DataFrame({
+        'Batch': [f"Batch {i + 1}" for i in range(len(text_results))],
+        'Content': list(text_results),
+    })
+    return write_excel([(sheet_name, df, [15, 80])], output)
+
+
+def _text_value(value):
+    """Giá trị dạng chuỗi cho CSV/Parquet: list/dict thành JSON, None giữ nguyên."""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+
+def as_record(record):
+    """Record dạng dict; record không phải dict (ví dụ chuỗi từ JSON dạng ["a", "b"]) thành {'value': ...}."""
+    return record if isinstance(record, dict) else {'value': record}
+
+
+class RecordExporter(ABC):
+    """
+    Exporter ghi records ra file theo từng đợt.
+
+    Args:
+        path (str | file): Đường dẫn, hoặc file object nhị phân (ví dụ BytesIO) do caller quản lý
+        columns (list): Các cột biết trước (ví dụ từ fields_from_description); None để suy ra
+        append (bool): Ghi tiếp vào file đã có thay vì ghi đè
+
+    Dùng:
+        with get_exporter("out.csv", columns=[...]) as exporter:
+            exporter.write(records)
+    """
+
+    format = None
+    extension = None
+    mime = None
+
+    def __init__(self, path, columns=None, append=False):
+        self.path = path
+        self.columns = list(columns) if columns else None
+        self.append = append
+        self.records = 0
+
+    @abstractmethod
+    def write(self, records):
+        """Ghi một đợt records (list dict); trả về số records đã ghi."""
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _open_text(self):
+        """Mở file text UTF-8 để ghi (đường dẫn hoặc bọc file object nhị phân)."""
+        if isinstance(self.path, (str, os.PathLike)):
+            return open(self.path, "a" if self.append else "w", encoding="utf-8", newline=""), True
+        return io.TextIOWrapper(self.path, encoding="utf-8", newline=""), False
+
+    def _close_text(self, handle, owned):
+        if owned:
+            handle.close()
+        else:
+            # Không đóng file object của caller
+            handle.flush()
+            handle.detach()
+
+    def _split(self, record):
+        """Tách record theo schema: (giá trị theo thứ tự cột, dict field ngoài schema)."""
+        record = as_record(record)
+        row = [_text_value(record.get(column)) for column in self.columns]
+        extra = {k: v for k, v in record.items() if k not in self._column_set}
+        return row, extra
+
+    def _infer_columns(self, records):
+        """Cố định schema: cột biết trước, rồi các field của đợt records đầu tiên theo thứ tự xuất hiện."""
+        columns = list(self.columns or [])
+        for record in records:
+            for key in as_record(record):
+                if key not in columns:
+                    columns.append(key)
+        if EXTRA_COLUMN in columns:
+            columns.remove(EXTRA_COLUMN)
+        self.columns = columns
+        self._column_set = set(columns)
+
+
+class JsonlExporter(RecordExporter):
+    """Mỗi record một dòng JSON; flush sau mỗi đợt để không mất dữ liệu khi job bị dừng."""
+
+    format = 'jsonl'
+    extension = '.jsonl'
+    mime = "application/x-ndjson"
+
+    def __init__(self, path, columns=None, append=False):
+        super().__init__(path, columns, append)
+        self._handle, self._owned = self._open_text()
+
+    def write(self, records):
+        for record in records:
+            self._handle.write(json.dumps(as_record(record), ensure_ascii=False) + "\n")
+        self._handle.flush()
+        self.records += len(records)
+        return len(records)
+
+    def close(self):
+        if self._handle is not None:
+            self._close_text(self._handle, self._owned)
+            self._handle = None
+
+
+class CsvExporter(RecordExporter):
+    """
+    CSV với header cố định từ cột biết trước và đợt records đầu tiên.
+
+    Khi ghi tiếp vào file đã có, header của file được dùng làm schema.
+    Field ngoài schema được ghi vào cột _extra dạng JSON.
+    """
+
+    format = 'csv'
+    extension = '.csv'
+    mime = "text/csv"
+
+    def __init__(self, path, columns=None, append=False):
+        super().__init__(path, columns, append)
+        if append and isinstance(path, (str, os.PathLike)) and os.path.exists(path) and os.path.getsize(path):
+            with open(path, encoding="utf-8", newline="") as f:
+                header = next(csv.reader(f), None)
+            if header:
+                # Header của file có sẵn là schema, kể cả khi caller truyền columns khác
+                self.columns = None
+                self._infer_columns([dict.fromkeys(header)])
+                self._header_written = True
+        else:
+            self._header_written = False
+        self._handle, self._owned = self._open_text()
+        self._writer = csv.writer(self._handle)
+
+    def write(self, records):
+        if not records:
+            return 0
+        if not self._header_written:
+            self._infer_columns(records)
+            self._writer.writerow(self.columns + [EXTRA_COLUMN])
+            self._header_written = True
+        for record in records:
+            row, extra = self._split(record)
+            row.append(json.dumps(extra, ensure_ascii=False) if extra else "")
+            self._writer.writerow(row)
+        self._handle.flush()
+        self.records += len(records)
+        return len(records)
+
+    def close(self):
+        if self._handle is not None:
+            self._close_text(self._handle, self._owned)
+            self._handle = None
+
+
+class ParquetExporter(RecordExporter):
+    """
+    Parquet dạng cột, mọi cột là string (giá trị do LLM trả về vốn là chuỗi).
+
+    Records được gom tới PARQUET_ROW_GROUP_SIZE dòng rồi ghi thành một row group,
+    nên bộ nhớ bị chặn bởi kích thước row group. File chỉ hợp lệ sau close().
+    Parquet không ghi tiếp được, nên khi append vào file đã có, records mới được
+    ghi ra file kế bên <tên>.1.parquet, <tên>.2.parquet...; iter_records() đọc cả nhóm.
+    """
+
+    format = 'parquet'
+    extension = '.parquet'
+    mime = "application/vnd.apache.parquet"
+
+    def __init__(self, path, columns=None, append=False, row_group_size=None):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("Cần cài pyarrow để xuất Parquet: pip install pyarrow")
+        super().__init__(path, columns, append)
+        if append and isinstance(path, (str, os.PathLike)) and os.path.exists(path):
+            self.path = _next_part_path(path)
+            logger.info("%s đã tồn tại, ghi tiếp ra %s", path, self.path)
+        self.row_group_size = row_group_size or PARQUET_ROW_GROUP_SIZE
+        self._rows = []
+        self._writer = None
+        self._schema = None
+
+    def write(self, records):
+        if not records:
+            return 0
+        if self._schema is None:
+            import pyarrow as pa
+
+            self._infer_columns(records)
+            self._schema = pa.schema([(column, pa.string()) for column in self.columns + [EXTRA_COLUMN]])
+        for record in records:
+            row, extra = self._split(record)
+            row.append(json.dumps(extra, ensure_ascii=False) if extra else None)
+            self._rows.append(row)
+            if len(self._rows) >= self.row_group_size:
+                self._flush()
+        self.records += len(records)
+        return len(records)
+
+    def _flush(self):
+        if not self._rows:
+            return
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, self._schema, compression="zstd")
+        columns = list(zip(*self._rows))
+        self._writer.write_table(pa.Table.from_arrays(
+            [pa.array(values, type=pa.string()) for values in columns], schema=self._schema
+        ))
+        self._rows = []
+
+    def close(self):
+        if self._schema is None:
+            return
+        self._flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+EXPORTERS = {
+    exporter.format: exporter for exporter in (JsonlExporter, CsvExporter, ParquetExporter)
+}
+
+
+def available_formats():
+    """Các định dạng export dùng được trong môi trường hiện tại (Parquet chỉ khi có pyarrow)."""
+    from importlib.util import find_spec
+
+    return [name for name in EXPORTERS if name != 'parquet' or find_spec("pyarrow") is not None]
+
+
+def _next_part_path(path):
+    """Đường dẫn <tên>.N.parquet đầu tiên chưa tồn tại."""
+    stem, extension = os.path.splitext(path)
+    index = 1
+    while os.path.exists(f"{stem}.{index}{extension}"):
+        index += 1
+    return f"{stem}.{index}{extension}"
+
+
+def _part_paths(path):
+    """File chính và các file <tên>.N.parquet ghi tiếp, theo thứ tự ghi."""
+    paths = [path] if os.path.exists(path) else []
+    stem, extension = os.path.splitext(path)
+    index = 1
+    while os.path.exists(f"{stem}.{index}{extension}"):
+        paths.append(f"{stem}.{index}{extension}")
+        index += 1
+    return paths
+
+
+def detect_format(path, format=None):
+    """Định dạng export từ tham số hoặc phần mở rộng của file (mặc định jsonl)."""
+    if format:
+        if format not in EXPORTERS:
+            raise ValueError(f"Định dạng không hỗ trợ: {format} (chọn {', '.join(EXPORTERS)})")
+        return format
+    extension = os.path.splitext(str(path))[1].lower()
+    for name, exporter in EXPORTERS.items():
+        if extension == exporter.extension:
+            return name
+    return 'jsonl'
+
+
+def get_exporter(path, format=None, columns=None, description=None, append=False):
+    """
+    Tạo exporter cho file output.
+
+    Args:
+        path (str | file): File output
+        format (str): 'jsonl', 'csv' hoặc 'parquet'; None để suy ra từ phần mở rộng
+        columns (list): Cột đặt đầu schema (ví dụ _source_url)
+        description (str): Mô tả dạng danh sách field; tên cột chuẩn hóa được thêm sau columns
+        append (bool): Ghi tiếp vào file đã có
+
+    Returns:
+        RecordExporter
+    """
+    columns = list(columns or [])
+    if description:
+        columns += [column for column in fields_from_description(description) if column not in columns]
+    return EXPORTERS[detect_format(path, format)](path, columns=columns, append=append)
+
+
+def export_records(records, format, columns=None, description=None):
+    """
+    Xuất records ra bytes theo định dạng (dùng cho nút tải xuống).
+
+    Returns:
+        bytes: Nội dung file
+    """
+    buffer = io.BytesIO()
+    exporter = get_exporter(buffer, format, columns=columns, description=description)
+    exporter.write(list(records))
+    exporter.close()
+    return buffer.getvalue()
+
+
+def _unpack_extra(record):
+    extra = record.pop(EXTRA_COLUMN, None)
+    if extra:
+        record.update(json.loads(extra))
+    return record
+
+
+def iter_records(path, format=None, batch_size=1000):
+    """
+    Đọc lại output của exporter theo từng record, không nạp cả file vào bộ nhớ.
+
+    Args:
+        path (str): File output (với Parquet gồm cả các file <tên>.N.parquet ghi tiếp)
+        format (str): None để suy ra từ phần mở rộng
+        batch_size (int): Số dòng đọc mỗi lần từ Parquet
+
+    Yields:
+        dict: Từng record; cột rỗng của CSV/Parquet bị bỏ, cột _extra được trải ra
+    """
+    format = detect_format(path, format)
+    if format == 'jsonl':
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif format == 'csv':
+        with open(path, encoding="utf-8", newline="") as f:
+            for row in csv.DictReader(f):
+                yield _unpack_extra({k: v for k, v in row.items() if v != ""})
+    else:
+        import pyarrow.parquet as pq
+
+        for part in _part_paths(path):
+            for batch in pq.ParquetFile(part).iter_batches(batch_size=batch_size):
+                for row in batch.to_pylist():
+                    yield _unpack_extra({k: v for k, v in row.items() if v is not None})
@@ -0,0 +1,324 @@
+"""
+Chuẩn hóa tên field do LLM trả về thành tên cột cố định cho Excel.
+
+Bảng mapping được biên dịch một lần thành index. Tên field được tách từ
+(NFC, tách camelCase/snake_case, chữ thường) rồi so khớp theo thứ tự:
+    1. Giữ nguyên dấu: khớp chính xác, rồi mẫu dài nhất xuất hiện trọn vẹn theo
+       ranh giới từ trong tên field (hòa thì mẫu khai báo trước thắng).
+    2. Bỏ dấu ('Họ và tên', 'ho_va_ten', 'HoVaTen' đều thành 'ho va ten'), cùng
+       hai bước như trên, nhưng chỉ với mẫu từ hai âm tiết trở lên: mẫu một âm
+       tiết như 'ảnh' khi bỏ dấu sẽ trùng từ khác ('tiếng Anh').
+Kết quả cho mỗi tên field gốc được ghi nhớ, nên chuẩn hóa 100k records chỉ
+tốn vài lookup dict.
+
+Mapping có thể mở rộng bằng register_field_mapping() hoặc file JSON chỉ định
+qua biến môi trường FIELD_MAPPING_FILE (dạng {"tên gốc": "TenCot"}).
+"""
+
+import functools
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_FIELD_MAPPING = {
+    # Họ và tên
+    'họ và tên': 'HoVaTen',
+    'họ tên': 'HoVaTen',
+    'tên': 'HoVaTen',
+    'name': 'HoVaTen',
+    'fullname': 'HoVaTen',
+    'ho_va_ten': 'HoVaTen',
+
+    # Năm sinh
+    'năm sinh': 'NamSinh',
+    'birth_year': 'NamSinh',
+    'year_of_birth': 'NamSinh',
+    'nam_sinh': 'NamSinh',
+
+    # Quê quán
+    'quê quán': 'QueQuan',
+    'que_quan': 'QueQuan',
+    'hometown': 'QueQuan',
+    'origin': 'QueQuan',
+
+    # Trình độ chuyên môn
+    'trình độ chuyên môn': 'TrinhDoChuyenMon',
+    'trinh_do_chuyen_mon': 'TrinhDoChuyenMon',
+    'education': 'TrinhDoChuyenMon',
+    'qualification': 'TrinhDoChuyenMon',
+
+    # Chức vụ
+    'chức vụ': 'ChucVu',
+    'chuc_vu': 'ChucVu',
+    'position': 'ChucVu',
+    'title': 'ChucVu',
+
+    # Đoàn ĐBQH
+    'đoàn đbqh': 'DoanDBQH',
+    'doan_dbqh': 'DoanDBQH',
+    'delegation': 'DoanDBQH',
+
+    # Số phiếu
+    'đạt % số phiếu': 'SoPhieu',
+    'số phiếu': 'SoPhieu',
+    'so_phieu': 'SoPhieu',
+    'votes': 'SoPhieu',
+    'vote_percentage': 'SoPhieu',
+
+    # Links và Images
+    'links': 'Links',
+    'link': 'Links',
+    'url': 'URL',
+    'urls': 'URLs',
+    'urls hình ảnh': 'URLsHinhAnh',
+    'image': 'HinhAnh',
+    'images': 'HinhAnh',
+    'hình ảnh': 'HinhAnh',
+    'ảnh': 'HinhAnh',
+    'img': 'HinhAnh',
+    'video': 'Video',
+    'audio': 'Audio',
+    'media': 'Media',
+    'địa chỉ ảnh': 'DiaChiAnh',
+    'đường dẫn': 'DuongDan',
+    'liên kết': 'LienKet'
+}
+
+# Tách camelCase/viết tắt: 'URLsHinhAnh' -> URLs, Hinh, Anh; 'DoanDBQH' -> Doan, DBQH
+_WORD_RE = re.compile(r"[A-Z]+s?(?![a-z])|[A-Z]?[a-z]+|\d+|[^\W\d_A-Za-z]+")
+
+
+@functools.lru_cache(maxsize=4096)
+def _fold_char(ch):
+    """Bỏ dấu một ký tự ('ả' -> 'a', 'đ' -> 'd'); giữ nguyên nếu không quy về đúng một ký tự."""
+    base = "".join(c for c in unicodedata.normalize("NFD", ch) if not unicodedata.combining(c))
+    base = base.replace("đ", "d").replace("Đ", "D")
+    return base if len(base) == 1 else ch
+
+
+def _field_words(name):
+    """
+    Tách tên field thành từ, chữ thường.
+
+    Ranh giới từ được tìm trên bản bỏ dấu (regex tách camelCase chỉ hiểu chữ
+    ASCII) rồi áp lại cho bản giữ dấu, vì hai bản dài bằng nhau.
+
+    Returns:
+        tuple: (danh sách từ đã bỏ dấu, danh sách từ giữ dấu)
+    """
+    text = unicodedata.normalize("NFC", str(name))
+    folded = "".join(_fold_char(ch) for ch in text)
+    spans = [match.span() for match in _WORD_RE.finditer(folded)]
+    return [folded[a:b].lower() for a, b in spans], [text[a:b].lower() for a, b in spans]
+
+
+def fold_field_name(name):
+    """
+    Fold tên field về dạng so sánh: bỏ dấu, tách từ, chữ thường, cách nhau bởi một khoảng trắng.
+
+    Args:
+        name (str): Tên field gốc, ví dụ 'Họ và tên', 'ho_va_ten', 'HoVaTen'
+
+    Returns:
+        str: Ví dụ 'ho va ten'
+    """
+    return " ".join(_field_words(name)[0])
+
+
+def accent_field_name(name):
+    """
+    Như fold_field_name nhưng giữ dấu tiếng Việt.
+
+    Returns:
+        str: Ví dụ 'Trình độ tiếng Anh' -> 'trình độ tiếng anh'
+    """
+    return " ".join(_field_words(name)[1])
+
+
+class FieldNameNormalizer:
+    """Bộ chuẩn hóa tên field đã biên dịch, thread-safe và có memoize."""
+
+    def __init__(self, mapping=None):
+        self._lock = threading.Lock()
+        self._mapping = dict(DEFAULT_FIELD_MAPPING)
+        if mapping:
+            self._mapping.update(mapping)
+        self._compile()
+
+    def _compile(self):
+        exact_accented, exact_folded = {}, {}
+        # Tên cột đích cũng khớp chính xác với chính nó ('HoVaTen' -> 'HoVaTen')
+        for target in self._mapping.values():
+            folded_words, accented_words = _field_words(target)
+            for index, words in ((exact_accented, accented_words), (exact_folded, folded_words)):
+                index.setdefault(" ".join(words), target)
+                index.setdefault("".join(words), target)
+
+        accented_patterns, folded_patterns = [], []
+        for original, target in self._mapping.items():
+            folded_words, accented_words = _field_words(original)
+            if not folded_words:
+                continue
+            accented = " ".join(accented_words)
+            exact_accented[accented] = target
+            exact_accented.setdefault("".join(accented_words), target)
+            accented_patterns.append((accented, target))
+            # Mẫu một âm tiết không được so khớp khi đã bỏ dấu ('ảnh' != 'Anh')
+            if len(folded_words) >= 2:
+                folded = " ".join(folded_words)
+                exact_folded[folded] = target
+                exact_folded.setdefault("".join(folded_words), target)
+                folded_patterns.append((folded, target))
+
+        # Mẫu dài hơn được thử trước; sort ổn định nên hòa thì giữ thứ tự khai báo
+        accented_patterns.sort(key=lambda item: -len(item[0]))
+        folded_patterns.sort(key=lambda item: -len(item[0]))
+        self._exact_accented = exact_accented
+        self._exact_folded = exact_folded
+        self._accented_patterns = [(f" {pattern} ", target) for pattern, target in accented_patterns]
+        self._folded_patterns = [(f" {pattern} ", target) for pattern, target in folded_patterns]
+        self._key_cache = {}
+        self._keys_cache = {}
+
+    @property
+    def mapping(self):
+        """Bản sao mapping hiện tại (tên gốc -> tên cột)."""
+        return dict(self._mapping)
+
+    def register(self, mapping):
+        """
+        Thêm hoặc ghi đè các mapping và biên dịch lại index.
+
+        Args:
+            mapping (dict): tên gốc -> tên cột, ví dụ {'giới tính': 'GioiTinh'}
+        """
+        with self._lock:
+            self._mapping.update(mapping)
+            self._compile()
+
+    def normalize_key(self, key):
+        """
+        Chuẩn hóa một tên field.
+
+        Returns:
+            str: Tên cột đã chuẩn hóa, hoặc tên gốc nếu không khớp mẫu nào
+        """
+        cached = self._key_cache.get(key)
+        if cached is not None:
+            return cached
+
+        folded_words, accented_words = _field_words(key)
+        normalized = (
+            self._match(accented_words, self._exact_accented, self._accented_patterns)
+            or self._match(folded_words, self._exact_folded, self._folded_patterns)
+            or key
+        )
+        self._key_cache[key] = normalized
+        return normalized
+
+    @staticmethod
+    def _match(words, exact, patterns):
+        """Khớp chính xác (có hoặc không có khoảng trắng), rồi mẫu dài nhất trọn từ; None nếu không khớp."""
+        text = " ".join(words)
+        normalized = exact.get(text) or exact.get("".join(words))
+        if normalized is not None:
+            return normalized
+        padded = f" {text} "
+        for pattern, target in patterns:
+            if pattern in padded:
+                return target
+        return None
+
+    def column_name(self, field):
+        """
+        Tên cột cho một field người dùng mô tả: theo mapping nếu khớp, nếu không
+        thì ghép các từ đã bỏ dấu theo PascalCase ('Giới tính' -> 'GioiTinh').
+        """
+        normalized = self.normalize_key(field)
+        if normalized != field:
+            return normalized
+        return "".join(word[:1].upper() + word[1:] for word in fold_field_name(field).split()) or field
+
+    def _normalize_item(self, item):
+        if not isinstance(item, dict):
+            return item
+        # Các record từ LLM thường có cùng bộ key, nên ghi nhớ theo cả bộ key
+        keys = tuple(item)
+        normalized_keys = self._keys_cache.get(keys)
+        if normalized_keys is None:
+            normalized_keys = [self.normalize_key(key) for key in keys]
+            self._keys_cache[keys] = normalized_keys
+        return dict(zip(normalized_keys, item.values()))
+
+    def normalize(self, data):
+        """Chuẩn hóa tên field của một record hoặc danh sách records."""
+        if isinstance(data, list):
+            return [self._normalize_item(item) for item in data]
+        if isinstance(data, dict):
+            return self._normalize_item(data)
+        return data
+
+
+def _load_mapping_file(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Không thể đọc FIELD_MAPPING_FILE {path}: {e}")
+        return {}
+
+
+_normalizer = FieldNameNormalizer(
+    _load_mapping_file(os.environ["FIELD_MAPPING_FILE"]) if os.getenv("FIELD_MAPPING_FILE") else None
+)
+
+
+def get_field_normalizer():
+    """Bộ chuẩn hóa dùng chung của process."""
+    return _normalizer
+
+
+def register_field_mapping(mapping):
+    """
+    Mở rộng mapping tên field dùng chung.
+
+    Args:
+        mapping (dict): tên gốc -> tên cột, ví dụ {'giới tính': 'GioiTinh'}
+    """
+    _normalizer.register(mapping)
+
+
+def fields_from_description(parse_description, max_words=6):
+    """
+    Tách mô tả dạng danh sách ("Họ và tên, Năm sinh; Quê quán") thành tên cột.
+
+    Args:
+        parse_description (str): Mô tả thông tin cần trích xuất
+        max_words (int): Phần nào dài hơn số từ này được coi là câu mô tả tự do
+
+    Returns:
+        list: Tên cột theo thứ tự, không trùng lặp; rỗng nếu mô tả không phải danh sách field
+    """
+    columns = []
+    for part in re.split(r"[,;\n]", parse_description or ""):
+        part = part.strip(" .:-*•\t")
+        if not part:
+            continue
+        if len(part.split()) > max_words:
+            return []
+        column = _normalizer.column_name(part)
+        if column not in columns:
+            columns.append(column)
+    return columns
+
+
+def normalize_field_names(data):
+    """
+    Chuẩn hóa tên field trong dữ liệu JSON để phù hợp với Excel
+    """
+    return _normalizer.normalize(data)
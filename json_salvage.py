@@ -0,0 +1,127 @@
+"""
+Cứu các record JSON hoàn chỉnh từ response bị cắt cụt hoặc lẫn text.
+
+Khi model hết token giữa chừng (ví dụ `[{...}, {...}, {"HoVaTen": "Ng`) hoặc
+viết thêm lời giải thích quanh JSON, json.loads thất bại và cả chunk bị bỏ,
+dù phần lớn records đã được sinh ra đầy đủ. Module này quét response một lượt
+bằng json.JSONDecoder.raw_decode:
+    - Giá trị JSON hoàn chỉnh được lấy nguyên vẹn.
+    - Mảng hoặc object bọc ngoài ({"records": [...]}) không đóng được thì quét
+      vào bên trong để lấy từng phần tử hoàn chỉnh.
+    - Record cuối bị cắt cụt và phần text thừa bị bỏ, số byte bị bỏ được báo lại.
+"""
+
+import json
+import re
+
+_DECODER = json.JSONDecoder()
+_VALUE_START_RE = re.compile(r"[\[{]")
+# Object bọc ngoài dạng {"records": [  (structured output, cùng key với parse._parse_response)
+_WRAPPER_RE = re.compile(r'\{\s*"records"\s*:\s*\[')
+# Chuỗi JSON đã đóng, dấu nháy mở một chuỗi chưa đóng (bị cắt cụt), hoặc dấu ngoặc
+_STRUCTURE_RE = re.compile(r'"(?:[^"\\]|\\.)*"|"|[\[\]{}]', re.DOTALL)
+
+
+def _span_end(text, start):
+    """
+    Vị trí ngay sau dấu ngoặc đóng tương ứng với text[start] (bỏ qua ngoặc trong chuỗi).
+
+    Returns:
+        int: Vị trí kết thúc, hoặc None nếu không bao giờ đóng (bị cắt cụt)
+    """
+    depth = 0
+    for match in _STRUCTURE_RE.finditer(text, start):
+        token = match.group()
+        if token == '"':
+            return None
+        if token[0] == '"':
+            continue
+        depth += 1 if token in "[{" else -1
+        if depth == 0:
+            return match.end()
+    return None
+
+
+def _compact_bytes(text):
+    """Số byte UTF-8 không tính khoảng trắng."""
+    return len("".join(text.split()).encode("utf-8"))
+
+
+def _records_from_value(value):
+    """Chuyển một giá trị JSON hoàn chỉnh thành danh sách records."""
+    if isinstance(value, list):
+        return value
+    if isinstance(value, dict):
+        # Object bọc ngoài của structured output: {"records": [...]}; object một key
+        # khác (ví dụ {"Links": [...]}) là một record và được giữ nguyên
+        if len(value) == 1 and isinstance(value.get("records"), list):
+            return value["records"]
+        return [value] if value else []
+    return []
+
+
+def salvage_json(text):
+    """
+    Lấy mọi giá trị JSON hoàn chỉnh từ một response bị cắt cụt hoặc lẫn text.
+
+    Args:
+        text (str): Response của model
+
+    Returns:
+        dict: records (danh sách record lấy được), complete (True nếu response chứa
+            đúng một giá trị JSON hoàn chỉnh, có thể kèm text xung quanh), salvaged_records,
+            discarded_bytes (số byte UTF-8 bị bỏ, không tính khoảng trắng) và total_bytes
+    """
+    text = text or ""
+    records = []
+    used_bytes = 0
+    complete_values = 0
+    skipped = False
+    descended = False
+    pos = 0
+
+    while True:
+        match = _VALUE_START_RE.search(text, pos)
+        if not match:
+            break
+        start = match.start()
+        try:
+            value, end = _DECODER.raw_decode(text, start)
+        except ValueError:
+            # Không decode được: mảng/object bọc ngoài cùng thì quét vào trong,
+            # giá trị khác thì bỏ qua cả cụm (hoặc dừng nếu bị cắt cụt tới cuối)
+            if text[start] == "[" and not descended:
+                descended = True
+                pos = start + 1
+                continue
+            wrapper = None if descended else _WRAPPER_RE.match(text, start)
+            if wrapper:
+                descended = True
+                pos = wrapper.end()
+                continue
+            skipped = True
+            end = _span_end(text, start)
+            if end is None:
+                break
+            pos = end
+            continue
+
+        if isinstance(value, (dict, list)):
+            if descended:
+                # Phần tử bên trong mảng/object bọc ngoài bị cắt cụt
+                records.extend([value] if isinstance(value, dict) else value)
+            else:
+                records.extend(_records_from_value(value))
+            used_bytes += _compact_bytes(text[start:end])
+            complete_values += 1
+        pos = end
+
+    total_bytes = _compact_bytes(text)
+    discarded = total_bytes - used_bytes
+    return {
+        'records': records,
+        'complete': complete_values == 1 and not descended and not skipped,
+        'salvaged_records': len(records),
+        'discarded_bytes': discarded,
+        'total_bytes': total_bytes,
+    }
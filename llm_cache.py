@@ -0,0 +1,215 @@
+"""
+Cache trên đĩa (SQLite) cho response của LLM theo từng chunk.
+
+Key là hash nội dung của (model, prompt template, chunk, parse_description),
+nên phân tích lại cùng một trang với cùng mô tả sẽ không gọi Ollama nữa.
+Khi tổng dung lượng vượt giới hạn, các entry ít được truy cập gần đây nhất
+(LRU) sẽ bị xóa. Cache hit không ghi vào SQLite: thời điểm truy cập được gom
+trong bộ nhớ (chỉ khi lần cập nhật trước đã cũ hơn ACCESS_UPDATE_INTERVAL) và
+ghi theo lô cùng lần put tiếp theo hoặc khi đủ ACCESS_FLUSH_BATCH entry, nên
+các worker song song không phải chờ nhau trên một transaction ghi.
+
+Cấu hình qua biến môi trường (tùy chọn):
+    LLM_CACHE_PATH      Đường dẫn file SQLite (mặc định .cache/llm_responses.sqlite3)
+    LLM_CACHE_MAX_MB    Dung lượng tối đa (mặc định 256 MB)
+    LLM_CACHE_DISABLED  Đặt 1 để tắt cache
+"""
+
+import atexit
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+# Thời điểm truy cập chỉ cần chính xác tới mức này để xếp hạng LRU
+ACCESS_UPDATE_INTERVAL = 60.0
+# Số entry có thời điểm truy cập chờ ghi tối đa trước khi ghi luôn trong get()
+ACCESS_FLUSH_BATCH = 256
+
+
+class LLMResponseCache:
+    """Cache response LLM thread-safe, lưu trong SQLite với eviction LRU theo dung lượng."""
+
+    def __init__(self, path, max_bytes=256 * 1024 * 1024, enabled=True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._total_bytes = 0
+        self._pending_access = {}  # key -> thời điểm truy cập chưa ghi vào SQLite
+
+        if self.enabled:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                " key TEXT PRIMARY KEY,"
+                " response TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created_at REAL NOT NULL,"
+                " last_access REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_responses_last_access ON responses (last_access)"
+            )
+            self._conn.commit()
+            self._total_bytes = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()[0]
+
+    @staticmethod
+    def make_key(model_name, prompt_template, chunk, parse_description, **extra):
+        """
+        Tạo key content-addressed cho một lần gọi LLM.
+
+        Args:
+            model_name (str): Tên model Ollama
+            prompt_template (str): Prompt template đang dùng
+            chunk (str): Nội dung chunk
+            parse_description (str): Mô tả thông tin cần trích xuất
+            **extra: Các tham số khác làm thay đổi output (ví dụ format)
+
+        Returns:
+            str: SHA-256 hex digest
+        """
+        payload = json.dumps(
+            [model_name, prompt_template, chunk, parse_description, extra],
+            ensure_ascii=False,
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Trả về response đã cache hoặc None."""
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, last_access FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            if now - row[1] >= ACCESS_UPDATE_INTERVAL:
+                self._pending_access[key] = now
+                if len(self._pending_access) >= ACCESS_FLUSH_BATCH:
+                    self._flush_access()
+                    self._conn.commit()
+            return row[0]
+
+    def _flush_access(self):
+        # Ghi các thời điểm truy cập đang chờ (gọi khi đang giữ lock, caller commit)
+        if self._pending_access:
+            self._conn.executemany(
+                "UPDATE responses SET last_access = ? WHERE key = ?",
+                [(accessed, key) for key, accessed in self._pending_access.items()],
+            )
+            self._pending_access.clear()
+
+    def flush(self):
+        """Ghi các thời điểm truy cập đang chờ vào SQLite."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._flush_access()
+            self._conn.commit()
+
+    def put(self, key, response):
+        """Lưu response vào cache và xóa bớt entry cũ nếu vượt dung lượng."""
+        if not self.enabled:
+            return
+        size = len(response.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, size, created_at, last_access)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, response, size, now, now),
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            self._pending_access.pop(key, None)
+            # Thứ tự LRU phải cập nhật trước khi chọn entry để xóa
+            self._flush_access()
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        # Xóa theo lô các entry có last_access cũ nhất cho tới khi dưới giới hạn
+        while self._total_bytes > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM responses ORDER BY last_access LIMIT 100"
+            ).fetchall()
+            if not rows:
+                self._total_bytes = 0
+                break
+            for key, size in rows:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._total_bytes -= size
+                if self._total_bytes <= self.max_bytes:
+                    break
+
+    def clear(self):
+        """Xóa toàn bộ cache."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+            self._pending_access.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        """
+        Returns:
+            dict: Số hit/miss, tỉ lệ hit, số entry và dung lượng hiện tại.
+        """
+        lookups = self.hits + self.misses
+        entries = 0
+        if self.enabled:
+            with self._lock:
+                entries = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            'enabled': self.enabled,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'entries': entries,
+            'size_bytes': self._total_bytes,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache():
+    """
+    Lấy cache response LLM dùng chung của process.
+
+    Returns:
+        LLMResponseCache: Cache singleton (bị tắt nếu LLM_CACHE_DISABLED=1).
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMResponseCache(
+                path=os.getenv("LLM_CACHE_PATH", os.path.join(".cache", "llm_responses.sqlite3")),
+                max_bytes=int(float(os.getenv("LLM_CACHE_MAX_MB", "256")) * 1024 * 1024),
+                enabled=os.getenv("LLM_CACHE_DISABLED", "0").lower() not in ("1", "true", "yes"),
+            )
+            atexit.register(_cache.flush)
+        return _cache
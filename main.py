@@ -1,18 +1,70 @@
 import streamlit as st
+import hashlib
 import json
-import pandas as pd
-from scrape_utils import (
-    scrape_website_brightdata,
-    scrape_website_nobright,
-    scrape_website_combined,
-    scrape_website_nobright_only,
-    extract_body_content,
-    clean_body_content,
-    clean_body_content_with_links_and_images,
-    split_dom_content,
-    analyze_content_for_missing_data,
+import os
+import time
+from env import load_env
+
+load_env()
+
+# Chỉ import các module nhẹ ở đây để trang hiển thị ngay; selenium/bs4 (scrape),
+# langchain (phân tích) và pandas/openpyxl (export) được import khi bước tương ứng chạy lần đầu
+from page_ready import get_readiness_stats
+from page_cache import get_page_cache
+from metrics import setup_logging
+from export import (
+    EXCEL_MIME,
+    EXPORTERS,
+    available_formats,
+    export_records,
+    records_to_excel,
+    text_results_to_excel,
 )
-from parse import parse_with_ollama
+
+setup_logging()
+
+# Số file export (theo nội dung + định dạng) được giữ lại để bấm tải lại không phải tạo lại
+EXPORT_CACHE_ENTRIES = int(os.getenv("EXPORT_CACHE_ENTRIES", "16"))
+
+
+def content_digest(parsed_data):
+    """Hash nội dung kết quả phân tích, dùng làm khóa cache cho file export."""
+    payload = json.dumps(
+        [parsed_data['structured_data'], parsed_data['text_results']],
+        ensure_ascii=False, sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@st.cache_data(max_entries=EXPORT_CACHE_ENTRIES, show_spinner=False)
+def build_export(digest, kind, description, _parsed_data):
+    """
+    Tạo nội dung file tải xuống. Streamlit chỉ hash digest/kind/description,
+    không hash _parsed_data (có thể rất lớn).
+
+    Args:
+        digest (str): content_digest(_parsed_data)
+        kind (str): 'json', 'json_text', 'excel', 'excel_text' hoặc định dạng trong EXPORTERS
+        description (str): Mô tả phân tích, dùng để suy ra cột cho CSV/Parquet
+        _parsed_data (dict): Kết quả phân tích
+
+    Returns:
+        str | bytes: Nội dung file
+    """
+    if kind == 'json':
+        return json.dumps(_parsed_data['structured_data'], ensure_ascii=False, indent=2)
+    if kind == 'json_text':
+        return json.dumps(_parsed_data['text_results'], ensure_ascii=False, indent=2)
+    if kind == 'excel':
+        return records_to_excel(_parsed_data['structured_data'])
+    if kind == 'excel_text':
+        return text_results_to_excel(_parsed_data['text_results'])
+    return export_records(_parsed_data['structured_data'], kind, description=description)
+
+
+def lazy_export(kind, parsed_data, description=None):
+    """Callable cho st.download_button: chỉ hash và tạo file khi người dùng bấm tải."""
+    return lambda: build_export(content_digest(parsed_data), kind, description, parsed_data)
 
 # Streamlit UI
 st.title("AI Web Scraper")
@@ -33,7 +85,12 @@ include_links_images = st.checkbox(
 
 # Tùy chọn nâng cao
 with st.expander("⚙️ Cài đặt nâng cao"):
-    col1, col2 = st.columns(2)
+    use_page_cache = st.checkbox(
+        "Dùng cache trang đã tải",
+        value=True,
+        help="Dùng lại HTML đã scrape gần đây thay vì mở lại trình duyệt (theo TTL của từng domain)"
+    )
+    col1, col2, col3 = st.columns(3)
     with col1:
         chunk_size = st.selectbox(
             "Kích thước chunk xử lý:",
@@ -48,6 +105,68 @@ with st.expander("⚙️ Cài đặt nâng cao"):
             index=1,  # Default 50
             help="Tăng để xử lý nhiều dữ liệu hơn"
         )
+    with col3:
+        parallel_chunks = st.selectbox(
+            "Số chunks xử lý song song:",
+            [1, 2, 4, 8],
+            index=2,  # Default 4
+            help="Nên khớp với OLLAMA_NUM_PARALLEL của Ollama server"
+        )
+    overlap_tokens = st.selectbox(
+        "Overlap giữa các chunks (tokens):",
+        [0, 100, 200, 400],
+        index=0,
+        help="Lặp lại phần cuối chunk trước ở đầu chunk sau để không mất record nằm ở ranh giới"
+    )
+    use_llm_cache = st.checkbox(
+        "Dùng cache kết quả AI",
+        value=True,
+        help="Bỏ chọn để luôn gửi lại các chunks tới Ollama thay vì dùng kết quả đã lưu"
+    )
+    structured_output = st.checkbox(
+        "Ép AI trả về JSON theo schema",
+        value=False,
+        help="Tạo JSON schema từ danh sách thông tin cần trích xuất và truyền vào tham số format "
+             "của Ollama, nên response luôn là JSON hợp lệ"
+    )
+    extract_tables = st.checkbox(
+        "Trích xuất bảng trực tiếp (không qua AI)",
+        value=True,
+        help="Đọc thẳng các bảng HTML và khối \"Nhãn: giá trị\" lặp lại có tiêu đề khớp với "
+             "thông tin cần trích xuất; chỉ phần còn lại mới được gửi tới Ollama"
+    )
+    col1, col2 = st.columns(2)
+    with col1:
+        relevance_threshold = st.selectbox(
+            "Ngưỡng lọc chunks không liên quan:",
+            [0.0, 0.05, 0.1, 0.2, 0.3],
+            index=0,
+            format_func=lambda value: "Tắt" if value == 0 else f"{value:.0%}",
+            help="Chấm điểm từng chunk theo các từ trong mô tả (BM25, không phân biệt dấu); "
+                 "chunks dưới ngưỡng (so với chunk liên quan nhất) không được gửi tới Ollama"
+        )
+    with col2:
+        chunk_budget = st.selectbox(
+            "Số chunks tối đa gửi tới AI:",
+            [None, 5, 10, 20, 50],
+            index=0,
+            format_func=lambda value: "Không giới hạn" if value is None else str(value),
+            help="Chunks liên quan nhất được gửi trước; chunks dưới ngưỡng chỉ được gửi nếu còn ngân sách"
+        )
+    col1, col2 = st.columns(2)
+    with col1:
+        follow_pagination = st.checkbox(
+            "Tự động theo phân trang",
+            value=False,
+            help="Tìm link trang tiếp/trang đánh số, tải các trang song song và phân tích chung một lần"
+        )
+    with col2:
+        max_pages = st.selectbox(
+            "Số trang tối đa:",
+            [5, 10, 20, 50],
+            index=1,
+            help="Dừng sớm hơn nếu gặp trang rỗng hoặc trang có nội dung lặp lại"
+        )
 
 # Step 1: Scrape the Website
 if st.button("Scrape Website"):
@@ -55,24 +174,45 @@ if st.button("Scrape Website"):
         st.write("Đang scraping website...")
 
         try:
+            from page_content import load_page_content
+
             # Chọn phương thức scraping dựa trên lựa chọn của người dùng
             if scrape_method == "Chỉ Chrome (No BrightData)":
-                dom_content = scrape_website_nobright_only(url)
+                method = 'nobright'
             elif scrape_method == "BrightData":
-                dom_content = scrape_website_brightdata(url)
+                method = 'brightdata'
             else:  # Tự động (Combined)
-                dom_content = scrape_website_combined(url)
-                
-            body_content = extract_body_content(dom_content)
-            
-            # Sử dụng hàm cleaning phù hợp dựa trên lựa chọn của người dùng
-            if include_links_images:
-                cleaned_content = clean_body_content_with_links_and_images(body_content, base_url=url)
-            else:
-                cleaned_content = clean_body_content(body_content)
+                method = 'combined'
+            # Kết quả scrape + làm sạch dùng chung giữa các phiên (theo URL và tùy chọn)
+            page = load_page_content(
+                url, method, include_links_images=include_links_images,
+                follow_pagination=follow_pagination, max_pages=max_pages, use_cache=use_page_cache
+            )
+            dom_content = page['html']
+            cleaned_content = page['cleaned_content']
+            page_sources = page['page_sources']
+
+            age = time.time() - page['scraped_at']
+            if age > 1:
+                st.caption(f"♻️ Dùng lại kết quả scrape {age:.0f}s trước (cache dùng chung giữa các phiên)")
+            if follow_pagination:
+                crawl = page['pagination']
+                if crawl['mode'] == 'none':
+                    st.info("Không tìm thấy link phân trang, chỉ scrape trang hiện tại.")
+                else:
+                    st.caption(
+                        f"📄 Đã scrape {len(page_sources)} trang trong {crawl['elapsed']:.1f}s "
+                        f"(dừng vì: {crawl['stop_reason']})"
+                    )
+            st.session_state.scraped_pages = len(page_sources)
 
             # Store the DOM content in Streamlit session state
             st.session_state.dom_content = cleaned_content
+            # HTML gốc của trang đầu, dùng để tìm link phân trang khi phân tích thiếu dữ liệu
+            st.session_state.page_html = dom_content
+            st.session_state.page_url = url
+            # HTML gốc của mọi trang, dùng để trích xuất bảng trực tiếp ở bước phân tích
+            st.session_state.page_sources = page_sources
 
             # Display the DOM content in an expandable text box
             with st.expander("Xem nội dung DOM"):
@@ -83,6 +223,20 @@ if st.button("Scrape Website"):
                 st.success("Scraping thành công! ✅ Đã bao gồm links và địa chỉ ảnh")
             else:
                 st.success("Scraping thành công! ℹ️ Chỉ text content (không bao gồm links/ảnh)")
+
+            # Hiển thị thời gian chờ trang thực tế so với thời gian sleep cố định trước đây
+            readiness = get_readiness_stats()
+            if readiness['pages']:
+                st.caption(
+                    f"⏱️ Thời gian chờ trang trung bình: {readiness['mean_wait']}s "
+                    f"({readiness['pages']} trang, tiết kiệm tổng cộng {readiness['total_saved']}s)"
+                )
+            page_cache_stats = get_page_cache().stats()
+            if page_cache_stats['enabled']:
+                st.caption(
+                    f"💾 Page cache: {page_cache_stats['hits']} hit, {page_cache_stats['revalidated']} revalidated, "
+                    f"{page_cache_stats['misses']} miss (tỉ lệ hit {page_cache_stats['hit_rate']:.0%})"
+                )
             
         except Exception as e:
             st.error(f"Lỗi khi scraping: {str(e)}")
@@ -127,7 +281,8 @@ if "dom_content" in st.session_state:
     parse_description = st.text_area(
         "Mô tả những gì bạn muốn phân tích từ nội dung:",
         placeholder=placeholder_text,
-        help=help_text
+        help=help_text,
+        key="parse_description"
     )
 
     if st.button("Phân tích nội dung"):
@@ -135,13 +290,73 @@ if "dom_content" in st.session_state:
             st.write("Đang phân tích nội dung...")
 
             try:
+                import pandas as pd
+                from parse import parse_with_ollama
+                from scrape_utils import split_dom_content, analyze_content_for_missing_data
+                from table_extract import extract_structured_pages
+
+                # Bảng và khối "Nhãn: giá trị" được đọc trực tiếp, chỉ phần còn lại gửi tới Ollama
+                llm_content = st.session_state.dom_content
+                direct_records = []
+                if extract_tables and st.session_state.get('page_sources'):
+                    extraction = extract_structured_pages(
+                        st.session_state.page_sources, parse_description,
+                        include_links_images=include_links_images
+                    )
+                    if extraction['records']:
+                        direct_records = extraction['records']
+                        llm_content = extraction['residual_text']
+                        st.caption(
+                            f"📋 Đọc trực tiếp {len(direct_records)} records từ {extraction['tables']} bảng "
+                            f"và {extraction['label_records']} khối nhãn, không cần AI"
+                        )
+
                 # Parse the content with Ollama
-                dom_chunks = split_dom_content(
-                    st.session_state.dom_content, 
+                dom_chunks, chunk_tokens = split_dom_content(
+                    llm_content, 
                     max_length=chunk_size, 
-                    max_batches=max_chunks
+                    max_batches=max_chunks,
+                    overlap_tokens=overlap_tokens,
+                    with_token_counts=True
+                )
+                st.caption(
+                    f"🧩 {len(dom_chunks)} chunks, tổng {sum(chunk_tokens)} tokens "
+                    f"(lớn nhất {max(chunk_tokens, default=0)} tokens/chunk)"
                 )
-                parsed_result = parse_with_ollama(dom_chunks, parse_description)
+                progress_bar = st.progress(0.0, text="Đang gửi chunks tới Ollama...")
+                # Bấm nút sẽ khiến Streamlit chạy lại script và dừng việc phân tích bên dưới
+                st.button("⏹️ Dừng phân tích", help="Dừng các chunks còn lại và giữ kết quả đã có")
+                live_table = st.empty()
+                streamed_rows = list(direct_records)
+                if streamed_rows:
+                    live_table.dataframe(pd.DataFrame(streamed_rows), use_container_width=True)
+
+                def show_progress(chunk_result, accumulator):
+                    """Hiển thị tiến độ và records ngay khi từng chunk hoàn thành."""
+                    # Lưu kết quả tạm để vẫn tải xuống được nếu người dùng dừng giữa chừng
+                    st.session_state.parsed_data = accumulator.result()
+
+                    chunk_status = "lỗi" if chunk_result['error'] else f"{len(chunk_result['records'])} records"
+                    progress_bar.progress(
+                        accumulator.completed_chunks / max(1, accumulator.total),
+                        text=f"Chunk {chunk_result['index']}/{accumulator.total}: {chunk_status} "
+                             f"({chunk_result['elapsed']:.1f}s) — đã xong "
+                             f"{accumulator.completed_chunks}/{accumulator.total}"
+                    )
+                    streamed_rows.extend(
+                        record for record in chunk_result['records'] if isinstance(record, dict)
+                    )
+                    if streamed_rows:
+                        live_table.dataframe(pd.DataFrame(streamed_rows), use_container_width=True)
+
+                # Chunks không liên quan (menu, footer, bài viết khác) bị bỏ trước khi gọi Ollama
+                parsed_result = parse_with_ollama(
+                    dom_chunks, parse_description, max_workers=parallel_chunks,
+                    use_cache=use_llm_cache, on_chunk=show_progress,
+                    structured_output=structured_output, direct_records=direct_records,
+                    relevance_threshold=relevance_threshold, chunk_budget=chunk_budget
+                )
+                live_table.empty()
                 
                 # Lưu kết quả vào session state
                 st.session_state.parsed_data = parsed_result
@@ -156,6 +371,48 @@ if "dom_content" in st.session_state:
                         st.metric("Chunks thành công", stats['successful_chunks'])
                     with col3:
                         st.metric("Tổng records", stats['total_records'])
+                    if stats.get('skipped_chunks'):
+                        st.caption(
+                            f"🎯 Bỏ qua {stats['skipped_chunks']} chunks không liên quan tới mô tả "
+                            f"(tiết kiệm ~{stats['llm_seconds_saved']}s gọi AI)"
+                        )
+                    if stats.get('records_without_llm'):
+                        st.caption(
+                            f"📋 {stats['records_without_llm']} records trích xuất trực tiếp không qua AI "
+                            f"({stats['llm_free_ratio']:.0%} tổng số records)"
+                        )
+                    if stats.get('duplicates_removed') or stats.get('records_merged'):
+                        st.caption(
+                            f"🧹 Đã loại {stats['duplicates_removed']} records trùng lặp và gộp "
+                            f"{stats['records_merged']} records bị tách giữa các chunks"
+                        )
+                    if stats.get('cache_hits'):
+                        st.caption(f"💾 {stats['cache_hits']}/{stats['total_chunks']} chunks lấy từ cache")
+                    mode_label = "theo schema" if stats['output_mode'] == 'schema' else "tự do"
+                    st.caption(
+                        f"🧾 JSON {mode_label}: parse thành công {stats['json_success_rate']:.0%} chunks, "
+                        f"lãng phí {stats['wasted_tokens']}/{stats['generated_tokens']} tokens "
+                        f"({stats['wasted_seconds']}s)"
+                    )
+                    if stats.get('prompt_eval_tokens'):
+                        st.caption(
+                            f"⚡ Prompt eval: {stats['prompt_eval_tokens']}/{stats['prompt_tokens']} tokens "
+                            f"trong {stats['prompt_eval_seconds']}s — phần hướng dẫn dùng chung được "
+                            f"Ollama tái sử dụng ~{stats['prompt_reuse_ratio']:.0%}"
+                        )
+                        with st.expander("📈 Chi tiết từng chunk"):
+                            st.dataframe(pd.DataFrame(parsed_result['chunk_metrics']), use_container_width=True)
+                    if stats.get('salvaged_chunks'):
+                        st.caption(
+                            f"🩹 Cứu được {stats['salvaged_records']} records từ {stats['salvaged_chunks']} "
+                            f"chunks có JSON bị cắt cụt/lẫn text (bỏ {stats['discarded_bytes']} bytes)"
+                        )
+
+                # Hiển thị các chunks bị lỗi (các chunks khác vẫn được xử lý bình thường)
+                if parsed_result.get('chunk_errors'):
+                    with st.expander(f"⚠️ {len(parsed_result['chunk_errors'])} chunks bị lỗi"):
+                        for chunk_error in parsed_result['chunk_errors']:
+                            st.write(f"- Chunk {chunk_error['chunk']}: {chunk_error['error']}")
                 
                 # Hiển thị kết quả dưới dạng bảng nếu có dữ liệu structured
                 if parsed_result['structured_data']:
@@ -170,11 +427,21 @@ if "dom_content" in st.session_state:
                     st.info(f"Các cột dữ liệu: {', '.join(df.columns.tolist())}")
                     
                     # Hiển thị cảnh báo nếu có vẻ như thiếu dữ liệu
-                    if 'stats' in parsed_result and parsed_result['stats']['total_records'] < 50:
+                    if 'stats' in parsed_result and (
+                        parsed_result['stats']['total_records'] + parsed_result['stats']['records_without_llm']
+                    ) < 50:
                         st.warning("⚠️ Số lượng records có vẻ thấp. Đang phân tích nguyên nhân...")
                         
                         # Phân tích content để tìm nguyên nhân
-                        analysis = analyze_content_for_missing_data(st.session_state.dom_content)
+                        analysis = analyze_content_for_missing_data(
+                            st.session_state.dom_content,
+                            # Đã theo phân trang thì không cần gợi ý lại
+                            html_content=(
+                                st.session_state.get('page_html')
+                                if st.session_state.get('scraped_pages', 1) == 1 else None
+                            ),
+                            base_url=st.session_state.get('page_url')
+                        )
                         
                         if analysis['potential_issues']:
                             st.write("**Các vấn đề phát hiện:**")
@@ -198,106 +465,71 @@ if "dom_content" in st.session_state:
                 st.error(f"Lỗi khi phân tích: {str(e)}")
 
 # Step 3: Download buttons
+# File tải xuống chỉ được tạo khi người dùng bấm nút (data là callable), không phải mỗi lần rerun
 if "parsed_data" in st.session_state:
     st.subheader("Tải xuống dữ liệu đã phân tích")
+
+    parsed_data = st.session_state.parsed_data
+    structured_data = parsed_data['structured_data']
+    description = st.session_state.get('parse_description')
+    timestamp = time.strftime('%Y%m%d_%H%M%S')
+
+    if not parsed_data.get('completed', True):
+        st.warning("⏹️ Phân tích đã bị dừng giữa chừng, dữ liệu chỉ gồm các chunks đã xử lý xong.")
     
     col1, col2 = st.columns(2)
     
     with col1:
         # Nút tải JSON
-        if st.session_state.parsed_data['structured_data']:
-            json_data = json.dumps(st.session_state.parsed_data['structured_data'], 
-                                 ensure_ascii=False, indent=2)
+        if structured_data:
             st.download_button(
                 label="📁 Tải dữ liệu JSON",
-                data=json_data,
-                file_name=f"parsed_data_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.json",
-                mime="application/json"
+                data=lazy_export('json', parsed_data),
+                file_name=f"parsed_data_{timestamp}.json",
+                mime="application/json",
+                on_click="ignore"
+            )
+
+            # Định dạng dòng/cột cho dữ liệu lớn (JSONL, CSV, Parquet)
+            export_format = st.selectbox("Định dạng khác", available_formats(), key="export_format")
+            exporter = EXPORTERS[export_format]
+            st.download_button(
+                label=f"📄 Tải dữ liệu {export_format.upper()}",
+                data=lazy_export(export_format, parsed_data, description),
+                file_name=f"parsed_data_{timestamp}{exporter.extension}",
+                mime=exporter.mime,
+                on_click="ignore"
             )
         else:
             # Nếu không có dữ liệu structured, tải text results
-            json_data = json.dumps(st.session_state.parsed_data['text_results'], 
-                                 ensure_ascii=False, indent=2)
             st.download_button(
                 label="📁 Tải dữ liệu JSON (Text)",
-                data=json_data,
-                file_name=f"parsed_text_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.json",
-                mime="application/json"
+                data=lazy_export('json_text', parsed_data),
+                file_name=f"parsed_text_{timestamp}.json",
+                mime="application/json",
+                on_click="ignore"
             )
     
     with col2:
-        # Nút tải Excel
-        if st.session_state.parsed_data['structured_data']:
-            try:
-                import pandas as pd
-                import io
-                
-                df = pd.DataFrame(st.session_state.parsed_data['structured_data'])
-                
-                # Tạo buffer để lưu file Excel
-                buffer = io.BytesIO()
-                with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                    df.to_excel(writer, index=False, sheet_name='Parsed Data')
-                    
-                    # Lấy worksheet để format
-                    worksheet = writer.sheets['Parsed Data']
-                    
-                    # Auto-adjust column width
-                    for column in worksheet.columns:
-                        max_length = 0
-                        column_letter = column[0].column_letter
-                        for cell in column:
-                            try:
-                                if len(str(cell.value)) > max_length:
-                                    max_length = len(str(cell.value))
-                            except:
-                                pass
-                        adjusted_width = min(max_length + 2, 50)  # Giới hạn độ rộng tối đa
-                        worksheet.column_dimensions[column_letter].width = adjusted_width
-                
-                st.download_button(
-                    label="📊 Tải dữ liệu Excel",
-                    data=buffer.getvalue(),
-                    file_name=f"parsed_data_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
-                
-                # Hiển thị preview của Excel
-                st.write("**Preview dữ liệu Excel:**")
-                st.dataframe(df.head(), use_container_width=True)
-                
-            except ImportError:
-                st.error("Cần cài đặt pandas và openpyxl để xuất Excel. Chạy: pip install pandas openpyxl")
-            except Exception as e:
-                st.error(f"Lỗi khi tạo file Excel: {str(e)}")
+        # Nút tải Excel (ghi bằng openpyxl write_only, độ rộng cột tính từ pandas)
+        if structured_data:
+            st.download_button(
+                label="📊 Tải dữ liệu Excel",
+                data=lazy_export('excel', parsed_data),
+                file_name=f"parsed_data_{timestamp}.xlsx",
+                mime=EXCEL_MIME,
+                on_click="ignore"
+            )
+
+            # Hiển thị preview của Excel (chỉ vài dòng đầu, không dựng DataFrame cho toàn bộ dữ liệu)
+            st.write("**Preview dữ liệu Excel:**")
+            st.dataframe(structured_data[:5], use_container_width=True)
         else:
             # Nếu không có dữ liệu structured, tạo Excel từ text
-            try:
-                import pandas as pd
-                import io
-                
-                # Tạo DataFrame từ text results
-                df = pd.DataFrame({
-                    'Batch': [f"Batch {i+1}" for i in range(len(st.session_state.parsed_data['text_results']))],
-                    'Content': st.session_state.parsed_data['text_results']
-                })
-                
-                buffer = io.BytesIO()
-                with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
-                    df.to_excel(writer, index=False, sheet_name='Parsed Text')
-                    
-                    # Format worksheet
-                    worksheet = writer.sheets['Parsed Text']
-                    worksheet.column_dimensions['A'].width = 15
-                    worksheet.column_dimensions['B'].width = 80
-                
-                st.download_button(
-                    label="📊 Tải dữ liệu Excel (Text)",
-                    data=buffer.getvalue(),
-                    file_name=f"parsed_text_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                )
-            except ImportError:
-                st.error("Cần cài đặt pandas và openpyxl để xuất Excel. Chạy: pip install pandas openpyxl")
-            except Exception as e:
-                st.error(f"Lỗi khi tạo file Excel: {str(e)}")
+            st.download_button(
+                label="📊 Tải dữ liệu Excel (Text)",
+                data=lazy_export('excel_text', parsed_data),
+                file_name=f"parsed_text_{timestamp}.xlsx",
+                mime=EXCEL_MIME,
+                on_click="ignore"
+            )
@@ -0,0 +1,375 @@
+"""
+Đo thời gian theo tầng (span), counter và histogram cho scrape/parse, thread-safe.
+
+Khi tắt (mặc định), span() trả về một đối tượng no-op dùng chung và incr()/
+observe() return ngay, nên chi phí chỉ là một lần kiểm tra cờ.
+
+Khi bật:
+    - Mỗi span kết thúc được ghi thành một dòng JSON (tên, thời gian, labels,
+      thuộc tính, span cha trong cùng thread, lỗi nếu có) vào METRICS_JSONL_PATH.
+    - Thời gian span được gộp vào histogram <tên>_seconds, cùng các counter, được
+      xuất dạng Prometheus text: ghi ra METRICS_PROM_PATH (định kỳ và khi thoát,
+      dùng với textfile collector của node_exporter) và/hoặc phục vụ tại
+      http://<host>:METRICS_PROM_PORT/metrics.
+
+Cấu hình qua biến môi trường (tùy chọn):
+    METRICS_ENABLED           Đặt 1 để bật (mặc định 0)
+    METRICS_JSONL_PATH        File JSONL ghi các span (mặc định .cache/metrics.jsonl, rỗng để tắt)
+    METRICS_PROM_PATH         File Prometheus text (mặc định không ghi)
+    METRICS_PROM_PORT         Port HTTP phục vụ /metrics (mặc định không mở)
+    METRICS_FLUSH_INTERVAL    Số giây giữa hai lần ghi file Prometheus (mặc định 10)
+    LOG_LEVEL                 Mức log của setup_logging() (mặc định INFO)
+"""
+
+import atexit
+import contextvars
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "0").lower() in ("1", "true", "yes")
+METRICS_JSONL_PATH = os.getenv("METRICS_JSONL_PATH", os.path.join(".cache", "metrics.jsonl"))
+METRICS_PROM_PATH = os.getenv("METRICS_PROM_PATH", "")
+METRICS_PROM_PORT = int(os.getenv("METRICS_PROM_PORT", "0") or 0)
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "10"))
+
+# Bucket (giây) cho histogram thời gian: từ thao tác DOM vài ms tới một lần gọi LLM vài phút
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+METRIC_PREFIX = "webscraper_"
+
+_current_span = contextvars.ContextVar("metrics_current_span", default=None)
+_span_ids = itertools.count(1)
+
+
+def setup_logging(level=None):
+    """
+    Cấu hình logging ra console cho các entry point (app Streamlit, batch_crawl, benchmark).
+
+    Không làm gì nếu root logger đã có handler (ví dụ ứng dụng khác đã cấu hình).
+    """
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    logging.basicConfig(
+        level=(level or os.getenv("LOG_LEVEL", "INFO")).upper(),
+        format="%(asctime)s %(levelname)s %(name)s [%(threadName)s] %(message)s",
+    )
+
+
+def _label_key(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key, extra=()):
+    items = list(key) + list(extra)
+    if not items:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in items) + "}"
+
+
+class _NoopSpan:
+    """Span dùng khi metrics bị tắt."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def set(self, **attributes):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    """Một lần đo thời gian, dùng với `with`; thuộc tính thêm bằng set() chỉ ghi vào JSONL."""
+
+    __slots__ = ('registry', 'name', 'labels', 'attributes', 'span_id', 'parent_id',
+                 'started_at', '_start', '_token')
+
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+        self.attributes = {}
+        self.span_id = next(_span_ids)
+        self.parent_id = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        parent = _current_span.get()
+        self.parent_id = parent.span_id if parent is not None else None
+        self._token = _current_span.set(self)
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = time.perf_counter() - self._start
+        _current_span.reset(self._token)
+        self.registry.finish_span(self, duration, exc)
+        return False
+
+
+class MetricsRegistry:
+    """Nơi lưu counter/histogram và ghi span ra JSONL, dùng chung cho mọi thread."""
+
+    def __init__(self, jsonl_path=None, prom_path=None, flush_interval=METRICS_FLUSH_INTERVAL):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self.jsonl_path = jsonl_path
+        self.prom_path = prom_path
+        self.flush_interval = flush_interval
+        self._jsonl = None
+        self._last_flush = 0.0
+        self._server = None
+
+    # --- Ghi nhận ---
+
+    def incr(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        self._maybe_flush()
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {
+                    'buckets': [0] * len(DURATION_BUCKETS), 'sum': 0.0, 'count': 0
+                }
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if value <= bound:
+                    histogram['buckets'][i] += 1
+                    break
+            histogram['sum'] += value
+            histogram['count'] += 1
+        self._maybe_flush()
+
+    def span(self, name, **labels):
+        return Span(self, name, labels)
+
+    def finish_span(self, span, duration, exc=None):
+        status = "error" if exc is not None else "ok"
+        self.observe(f"{span.name}_seconds", duration, **span.labels)
+        if not self.jsonl_path:
+            return
+        event = {
+            'ts': round(span.started_at, 6),
+            'type': 'span',
+            'name': span.name,
+            'duration_ms': round(duration * 1000, 3),
+            'status': status,
+            'span_id': span.span_id,
+            'parent_id': span.parent_id,
+            'thread': threading.current_thread().name,
+            'labels': span.labels,
+        }
+        if span.attributes:
+            event['attributes'] = span.attributes
+        if exc is not None:
+            event['error'] = f"{type(exc).__name__}: {exc}"
+        line = json.dumps(event, ensure_ascii=False, default=str) + "\n"
+        with self._lock:
+            if self._jsonl is None:
+                directory = os.path.dirname(self.jsonl_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._jsonl = open(self.jsonl_path, "a", encoding="utf-8")
+            self._jsonl.write(line)
+            self._jsonl.flush()
+
+    # --- Xuất ---
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: counters {tên: [{labels, value}]} và histograms {tên: [{labels, count, sum}]}
+        """
+        with self._lock:
+            counters = {}
+            for (name, key), value in self._counters.items():
+                counters.setdefault(name, []).append({'labels': dict(key), 'value': value})
+            histograms = {}
+            for (name, key), histogram in self._histograms.items():
+                histograms.setdefault(name, []).append({
+                    'labels': dict(key), 'count': histogram['count'], 'sum': round(histogram['sum'], 6)
+                })
+        return {'counters': counters, 'histograms': histograms}
+
+    def prometheus_text(self):
+        """Toàn bộ metrics theo định dạng Prometheus text exposition."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(
+                (key, dict(value, buckets=list(value['buckets']))) for key, value in self._histograms.items()
+            )
+
+        lines = []
+        declared = set()
+        for (name, key), value in counters:
+            metric = METRIC_PREFIX + name
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_format_labels(key)} {value}")
+        for (name, key), histogram in histograms:
+            metric = METRIC_PREFIX + name
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(DURATION_BUCKETS, histogram['buckets']):
+                cumulative += count
+                lines.append(f"{metric}_bucket{_format_labels(key, [('le', bound)])} {cumulative}")
+            lines.append(f"{metric}_bucket{_format_labels(key, [('le', '+Inf')])} {histogram['count']}")
+            lines.append(f"{metric}_sum{_format_labels(key)} {histogram['sum']:.6f}")
+            lines.append(f"{metric}_count{_format_labels(key)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus(self, path=None):
+        """Ghi file Prometheus text (ghi file tạm rồi đổi tên để collector không đọc file dở)."""
+        path = path or self.prom_path
+        if not path:
+            return
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(tmp_path, path)
+
+    def _maybe_flush(self):
+        if not self.prom_path:
+            return
+        now = time.monotonic()
+        if now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        try:
+            self.write_prometheus()
+        except OSError as e:
+            logging.getLogger(__name__).warning(f"Không thể ghi metrics Prometheus {self.prom_path}: {e}")
+
+    def start_http_server(self, port, host="0.0.0.0"):
+        """Phục vụ /metrics trên một thread nền (gọi nhiều lần chỉ mở một server)."""
+        if self._server is not None:
+            return self._server
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True).start()
+        logging.getLogger(__name__).info(f"Metrics Prometheus tại http://{host}:{port}/metrics")
+        return self._server
+
+    def close(self):
+        """Ghi nốt file Prometheus, thêm một dòng snapshot counter/histogram vào JSONL rồi đóng file."""
+        if self.prom_path:
+            try:
+                self.write_prometheus()
+            except OSError:
+                pass
+        snapshot = dict(self.snapshot(), ts=round(time.time(), 6), type='snapshot')
+        with self._lock:
+            if self._jsonl is not None:
+                self._jsonl.write(json.dumps(snapshot, ensure_ascii=False) + "\n")
+                self._jsonl.close()
+                self._jsonl = None
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_metrics():
+    """
+    Lấy registry metrics dùng chung của process (tạo khi gọi lần đầu).
+
+    Returns:
+        MetricsRegistry: Registry; khi METRICS_ENABLED=0 vẫn dùng được nhưng
+            span()/incr()/observe() ở module này không ghi vào.
+    """
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = MetricsRegistry(
+                jsonl_path=METRICS_JSONL_PATH if METRICS_ENABLED else None,
+                prom_path=METRICS_PROM_PATH or None,
+            )
+            if METRICS_ENABLED:
+                atexit.register(_registry.close)
+                if METRICS_PROM_PORT:
+                    try:
+                        _registry.start_http_server(METRICS_PROM_PORT)
+                    except OSError as e:
+                        # Streamlit/nhiều process có thể đã mở port này
+                        logging.getLogger(__name__).warning(
+                            f"Không mở được port metrics {METRICS_PROM_PORT}: {e}"
+                        )
+        return _registry
+
+
+def enabled():
+    return METRICS_ENABLED
+
+
+def span(name, **labels):
+    """
+    Đo thời gian một tầng xử lý.
+
+    Example:
+        with metrics.span("llm_chunk", model=OLLAMA_MODEL) as s:
+            ...
+            s.set(records=len(records))
+    """
+    if not METRICS_ENABLED:
+        return _NOOP_SPAN
+    return get_metrics().span(name, **labels)
+
+
+def incr(name, value=1, **labels):
+    """Tăng counter, ví dụ incr("chunks_total", status="ok")."""
+    if not METRICS_ENABLED:
+        return
+    get_metrics().incr(name, value, **labels)
+
+
+def observe(name, value, **labels):
+    """Ghi một giá trị (giây) vào histogram."""
+    if not METRICS_ENABLED:
+        return
+    get_metrics().observe(name, value, **labels)
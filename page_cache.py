@@ -0,0 +1,320 @@
+"""
+Cache HTML của các trang đã scrape, đặt bên dưới các hàm scrape_website_*.
+
+Key là URL đã chuẩn hóa + phương thức fetch (nobright/brightdata). Mỗi domain
+có thể có TTL riêng. ETag/Last-Modified được lấy từ response header mà Chrome
+đã nhận khi tải trang (CDP log, xem page_ready), nên lưu trang không tốn thêm
+request nào. Chỉ khi entry hết hạn và có validator, cache mới gửi một request
+HEAD có điều kiện (rẻ hơn nhiều so với render lại trong Chrome); nếu server
+trả 304 thì entry được gia hạn.
+
+Cấu hình qua biến môi trường (tùy chọn):
+    PAGE_CACHE_PATH         Đường dẫn file SQLite (mặc định .cache/pages.sqlite3)
+    PAGE_CACHE_TTL          TTL mặc định (giây, mặc định 600)
+    PAGE_CACHE_DOMAIN_TTLS  TTL theo domain, ví dụ "example.com=3600,news.vn=60"
+    PAGE_CACHE_MAX_MB       Dung lượng tối đa (mặc định 512 MB)
+    PAGE_CACHE_REVALIDATE   Đặt 0 để tắt revalidation bằng HTTP
+    PAGE_CACHE_DISABLED     Đặt 1 để tắt cache
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Các query param tracking không làm thay đổi nội dung trang
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+
+
+def normalize_url(url):
+    """
+    Chuẩn hóa URL để các biến thể tương đương dùng chung một entry cache.
+
+    Hạ chữ thường scheme/host, bỏ port mặc định, fragment, tracking params
+    và sắp xếp query params.
+
+    Args:
+        url (str): URL gốc
+
+    Returns:
+        str: URL đã chuẩn hóa
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "http"
+    host = (parts.hostname or "").lower()
+    port = parts.port
+    if port and not ((scheme == "http" and port == 80) or (scheme == "https" and port == 443)):
+        host = f"{host}:{port}"
+    path = parts.path or "/"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith(_TRACKING_PARAMS)
+    )
+    return urlunsplit((scheme, host, path, urlencode(query), ""))
+
+
+def parse_domain_ttls(spec):
+    """
+    Parse chuỗi cấu hình TTL theo domain.
+
+    Args:
+        spec (str): Dạng "example.com=3600,news.vn=60"
+
+    Returns:
+        dict: domain -> TTL (giây)
+    """
+    ttls = {}
+    for item in (spec or "").split(","):
+        if "=" not in item:
+            continue
+        domain, ttl = item.split("=", 1)
+        try:
+            ttls[domain.strip().lower()] = float(ttl)
+        except ValueError:
+            logger.warning(f"Bỏ qua cấu hình TTL không hợp lệ: {item}")
+    return ttls
+
+
+class PageCache:
+    """Cache HTML thread-safe trong SQLite, có TTL theo domain và revalidation HTTP."""
+
+    def __init__(self, path, default_ttl=600, domain_ttls=None, max_bytes=512 * 1024 * 1024,
+                 revalidate=True, enabled=True, probe_timeout=3):
+        self.path = path
+        self.default_ttl = default_ttl
+        self.domain_ttls = domain_ttls or {}
+        self.max_bytes = max_bytes
+        self.revalidate = revalidate
+        self.enabled = enabled
+        self.probe_timeout = probe_timeout
+
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._total_bytes = 0
+
+        if self.enabled:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS pages ("
+                " url TEXT NOT NULL,"
+                " method TEXT NOT NULL,"
+                " html TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " etag TEXT,"
+                " last_modified TEXT,"
+                " fetched_at REAL NOT NULL,"
+                " PRIMARY KEY (url, method))"
+            )
+            self._conn.commit()
+            self._total_bytes = self._conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM pages"
+            ).fetchone()[0]
+
+    def ttl_for(self, url):
+        """TTL (giây) áp dụng cho URL, ưu tiên cấu hình của domain dài nhất khớp."""
+        host = (urlsplit(url).hostname or "").lower()
+        best = None
+        for domain, ttl in self.domain_ttls.items():
+            if host == domain or host.endswith("." + domain):
+                if best is None or len(domain) > len(best[0]):
+                    best = (domain, ttl)
+        return best[1] if best else self.default_ttl
+
+    def _probe(self, url, etag=None, last_modified=None):
+        """
+        Gửi request HEAD (có điều kiện nếu có validator).
+
+        Returns:
+            tuple: (status, etag, last_modified) hoặc (None, None, None) nếu lỗi
+        """
+        headers = {"User-Agent": "Mozilla/5.0"}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        request = urllib.request.Request(url, headers=headers, method="HEAD")
+        try:
+            with urllib.request.urlopen(request, timeout=self.probe_timeout) as response:
+                return response.status, response.headers.get("ETag"), response.headers.get("Last-Modified")
+        except urllib.error.HTTPError as e:
+            return e.code, e.headers.get("ETag"), e.headers.get("Last-Modified")
+        except Exception:
+            return None, None, None
+
+    def _is_unchanged(self, url, etag, last_modified):
+        if not self.revalidate or not (etag or last_modified):
+            return False
+        status, new_etag, new_last_modified = self._probe(url, etag, last_modified)
+        if status == 304:
+            return True
+        # Một số server bỏ qua header điều kiện với HEAD nhưng vẫn trả validator
+        if status == 200:
+            if etag and new_etag:
+                return new_etag == etag
+            if last_modified and new_last_modified:
+                return new_last_modified == last_modified
+        return False
+
+    def get(self, url, method):
+        """
+        Lấy HTML đã cache nếu còn hạn (hoặc revalidate thành công).
+
+        Returns:
+            str: HTML hoặc None nếu cache miss
+        """
+        if not self.enabled:
+            return None
+        key_url = normalize_url(url)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT html, etag, last_modified, fetched_at FROM pages WHERE url = ? AND method = ?",
+                (key_url, method),
+            ).fetchone()
+        if row is None:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        html, etag, last_modified, fetched_at = row
+        if time.time() - fetched_at < self.ttl_for(url):
+            with self._lock:
+                self.hits += 1
+            return html
+
+        if self._is_unchanged(url, etag, last_modified):
+            with self._lock:
+                self._conn.execute(
+                    "UPDATE pages SET fetched_at = ? WHERE url = ? AND method = ?",
+                    (time.time(), key_url, method),
+                )
+                self._conn.commit()
+                self.revalidated += 1
+            return html
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, url, method, html, etag=None, last_modified=None):
+        """
+        Lưu HTML vừa scrape kèm ETag/Last-Modified từ response của trang (nếu có).
+
+        Entry không có validator thì không revalidate được, chỉ hết hạn theo TTL.
+        """
+        if not self.enabled or not html:
+            return
+        size = len(html.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        key_url = normalize_url(url)
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM pages WHERE url = ? AND method = ?", (key_url, method)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (url, method, html, size, etag, last_modified, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key_url, method, html, size, etag, last_modified, time.time()),
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            # Xóa các trang được tải lâu nhất cho tới khi dưới giới hạn dung lượng
+            while self._total_bytes > self.max_bytes:
+                oldest = self._conn.execute(
+                    "SELECT url, method, size FROM pages ORDER BY fetched_at LIMIT 1"
+                ).fetchone()
+                if oldest is None:
+                    self._total_bytes = 0
+                    break
+                self._conn.execute(
+                    "DELETE FROM pages WHERE url = ? AND method = ?", (oldest[0], oldest[1])
+                )
+                self._total_bytes -= oldest[2]
+            self._conn.commit()
+
+    def fetch(self, url, method, fetch_fn, use_cache=True):
+        """
+        Trả về HTML từ cache, hoặc gọi `fetch_fn()` rồi lưu kết quả.
+
+        Args:
+            url (str): URL cần lấy
+            method (str): Phương thức fetch, là một phần của key
+            fetch_fn (callable): Hàm scrape thực sự, trả về HTML hoặc tuple
+                (HTML, etag, last_modified) khi biết validator từ response header
+            use_cache (bool): False để bỏ qua cache và luôn fetch lại
+
+        Returns:
+            str: HTML của trang
+        """
+        if use_cache and self.enabled:
+            html = self.get(url, method)
+            metrics.incr("page_cache_total", result="hit" if html is not None else "miss")
+            if html is not None:
+                logger.info(f"💾 Page cache hit ({method}): {url}")
+                return html
+        result = fetch_fn()
+        html, etag, last_modified = result if isinstance(result, tuple) else (result, None, None)
+        self.put(url, method, html, etag, last_modified)
+        return html
+
+    def clear(self):
+        """Xóa toàn bộ cache."""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM pages")
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def stats(self):
+        """
+        Returns:
+            dict: Số hit, revalidated, miss và tỉ lệ hit (tính cả revalidated).
+        """
+        lookups = self.hits + self.revalidated + self.misses
+        return {
+            'enabled': self.enabled,
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'misses': self.misses,
+            'hit_rate': round((self.hits + self.revalidated) / lookups, 3) if lookups else 0.0,
+            'size_bytes': self._total_bytes,
+        }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_page_cache():
+    """
+    Lấy page cache dùng chung của process.
+
+    Returns:
+        PageCache: Cache singleton (bị tắt nếu PAGE_CACHE_DISABLED=1).
+    """
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = PageCache(
+                path=os.getenv("PAGE_CACHE_PATH", os.path.join(".cache", "pages.sqlite3")),
+                default_ttl=float(os.getenv("PAGE_CACHE_TTL", "600")),
+                domain_ttls=parse_domain_ttls(os.getenv("PAGE_CACHE_DOMAIN_TTLS", "")),
+                max_bytes=int(float(os.getenv("PAGE_CACHE_MAX_MB", "512")) * 1024 * 1024),
+                revalidate=os.getenv("PAGE_CACHE_REVALIDATE", "1").lower() not in ("0", "false", "no"),
+                enabled=os.getenv("PAGE_CACHE_DISABLED", "0").lower() not in ("1", "true", "yes"),
+            )
+        return _cache
@@ -0,0 +1,102 @@
+"""
+Scrape + làm sạch một URL (kèm các trang phân trang) thành nội dung cho bước phân tích.
+
+Kết quả được cache trong bộ nhớ dùng chung cho mọi phiên Streamlit, theo URL
+đã chuẩn hóa và các tùy chọn (phương thức, links/ảnh, phân trang): khi hai
+người cùng xem một URL, người thứ hai không phải mở Chrome, parse và làm
+sạch lại. Hai phiên scrape cùng URL cùng lúc thì chỉ một phiên thực sự chạy.
+
+Cấu hình qua biến môi trường (tùy chọn):
+    SCRAPE_CACHE_TTL          Thời gian giữ kết quả (giây, mặc định 600)
+    SCRAPE_CACHE_MAX_ENTRIES  Số kết quả tối đa (mặc định 32)
+    SCRAPE_CACHE_MAX_MB       Dung lượng ước lượng tối đa (mặc định 256 MB)
+"""
+
+import os
+import time
+
+from driver_pool import get_driver_pool
+from page_cache import normalize_url
+from pagination import crawl_pages, merge_page_texts
+from resource_cache import cache_data
+from scrape_utils import (
+    DomPipeline,
+    scrape_website_brightdata,
+    scrape_website_combined,
+    scrape_website_nobright_only,
+)
+
+SCRAPE_METHODS = {
+    'combined': scrape_website_combined,
+    'nobright': scrape_website_nobright_only,
+    'brightdata': scrape_website_brightdata,
+}
+
+SCRAPE_CACHE_TTL = float(os.getenv("SCRAPE_CACHE_TTL", "600"))
+SCRAPE_CACHE_MAX_ENTRIES = int(os.getenv("SCRAPE_CACHE_MAX_ENTRIES", "32"))
+SCRAPE_CACHE_MAX_MB = float(os.getenv("SCRAPE_CACHE_MAX_MB", "256"))
+
+
+@cache_data(
+    ttl=SCRAPE_CACHE_TTL, max_entries=SCRAPE_CACHE_MAX_ENTRIES,
+    max_bytes=int(SCRAPE_CACHE_MAX_MB * 1024 * 1024), name="page_content"
+)
+def _load_page_content(cache_url, method, include_links_images, max_pages, _url, _use_page_cache=True):
+    scrape_fn = SCRAPE_METHODS[method]
+    html = scrape_fn(_url, use_cache=_use_page_cache)
+
+    def clean_page(page_html, page_url):
+        # Parse HTML một lần, extract body và làm sạch trên cùng cây DOM
+        # (giữ lại links/ảnh nếu người dùng chọn)
+        return DomPipeline(page_html).clean_text(
+            include_links_images=include_links_images, base_url=page_url
+        )
+
+    result = {'html': html, 'pagination': None, 'scraped_at': time.time()}
+    if max_pages:
+        # Các trang tiếp theo được tải song song, mỗi trang dùng một driver trong pool
+        crawl = crawl_pages(
+            _url, html,
+            fetch_fn=lambda page_url: scrape_fn(page_url, use_cache=_use_page_cache),
+            clean_fn=clean_page,
+            max_pages=max_pages,
+            max_workers=get_driver_pool().size
+        )
+        result['cleaned_content'] = merge_page_texts(crawl['pages'])
+        result['page_sources'] = [{'url': page['url'], 'html': page['html']} for page in crawl['pages']]
+        result['pagination'] = {
+            'mode': crawl['mode'], 'elapsed': crawl['elapsed'], 'stop_reason': crawl['stop_reason']
+        }
+    else:
+        result['cleaned_content'] = clean_page(html, _url)
+        result['page_sources'] = [{'url': _url, 'html': html}]
+    return result
+
+
+def load_page_content(url, method='combined', include_links_images=False, follow_pagination=False,
+                      max_pages=10, use_cache=True):
+    """
+    Scrape và làm sạch URL, dùng lại kết quả của phiên khác nếu còn trong cache.
+
+    Args:
+        url (str): URL cần scrape
+        method (str): 'combined', 'nobright' hoặc 'brightdata'
+        include_links_images (bool): Giữ lại links và ảnh khi làm sạch
+        follow_pagination (bool): Tải thêm các trang phân trang
+        max_pages (int): Số trang tối đa khi theo phân trang
+        use_cache (bool): False để scrape lại (bỏ qua cả cache trang) và thay kết quả trong cache
+
+    Returns:
+        dict: cleaned_content, html (trang đầu), page_sources [{'url', 'html'}],
+              pagination (mode, elapsed, stop_reason hoặc None), scraped_at.
+              Dict được dùng chung giữa các phiên, không được sửa.
+    """
+    args = (normalize_url(url), method, include_links_images, max_pages if follow_pagination else None, url)
+    if use_cache:
+        return _load_page_content(*args)
+    return _load_page_content.refresh(*args, _use_page_cache=False)
+
+
+def page_content_cache_stats():
+    """Thống kê cache nội dung trang (entries, size_bytes, hits, misses, waits, evictions)."""
+    return _load_page_content.stats()
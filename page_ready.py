@@ -0,0 +1,214 @@
+"""
+Phát hiện thời điểm trang đã load xong thay cho time.sleep cố định.
+
+Trang được coi là sẵn sàng khi đồng thời:
+    1. document.readyState == "complete"
+    2. Không còn network request đang chạy (theo dõi qua CDP performance log,
+       hoặc qua Resource Timing nếu driver không hỗ trợ CDP log)
+    3. Nội dung DOM không thay đổi (MutationObserver theo dõi node và text,
+       không theo dõi attribute để carousel/animation đổi class hay style
+       liên tục không giữ trang ở trạng thái "bận") trong một khoảng `quiet_period`
+Tất cả nằm dưới một trần thời gian `max_wait` (mặc định 5 giây, bằng thời gian
+sleep cố định trước đây), nên trang tĩnh trả về gần như ngay lập tức và không
+trang nào chờ lâu hơn trước.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Cài MutationObserver (một lần mỗi document) và trả về trạng thái hiện tại của trang
+_PAGE_STATE_JS = """
+if (!window.__scrapeReady) {
+    window.__scrapeReady = {lastMutation: performance.now()};
+    try {
+        new MutationObserver(function () {
+            window.__scrapeReady.lastMutation = performance.now();
+        }).observe(document, {childList: true, subtree: true, characterData: true});
+    } catch (e) {}
+}
+return {
+    readyState: document.readyState,
+    msSinceMutation: performance.now() - window.__scrapeReady.lastMutation,
+    resourceCount: performance.getEntriesByType ? performance.getEntriesByType('resource').length : 0
+};
+"""
+
+DEFAULT_QUIET_PERIOD = float(os.getenv("PAGE_READY_QUIET_MS", "500")) / 1000
+# Request chạy lâu hơn ngưỡng này (long-polling, analytics...) không chặn trạng thái idle
+STALE_REQUEST_AFTER = 10.0
+
+_readiness_log = deque(maxlen=1000)
+_readiness_lock = threading.Lock()
+
+
+class NetworkTracker:
+    """
+    Đếm số request đang chạy dựa trên CDP performance log của Chrome.
+
+    Cần bật capability `goog:loggingPrefs = {"performance": "ALL"}` khi tạo
+    driver. Nếu driver không hỗ trợ (ví dụ Remote BrightData), `available`
+    sẽ là False và engine dùng Resource Timing thay thế.
+    """
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.available = True
+        self._inflight = {}
+        # Header của response document đầu tiên (trang chính), dùng cho page cache
+        self.document_headers = None
+
+    def drain(self):
+        """Bỏ các log cũ còn sót lại từ trang trước."""
+        try:
+            self.driver.get_log("performance")
+        except Exception:
+            self.available = False
+
+    def inflight(self):
+        if not self.available:
+            return 0
+        try:
+            entries = self.driver.get_log("performance")
+        except Exception:
+            self.available = False
+            return 0
+
+        now = time.monotonic()
+        for entry in entries:
+            try:
+                message = json.loads(entry["message"])["message"]
+            except (KeyError, ValueError, TypeError):
+                continue
+            method = message.get("method", "")
+            request_id = message.get("params", {}).get("requestId")
+            if not request_id:
+                continue
+            if method == "Network.requestWillBeSent":
+                self._inflight[request_id] = now
+            elif method in ("Network.loadingFinished", "Network.loadingFailed"):
+                self._inflight.pop(request_id, None)
+            elif method == "Network.responseReceived" and self.document_headers is None:
+                params = message.get("params", {})
+                if params.get("type") == "Document":
+                    self.document_headers = params.get("response", {}).get("headers") or {}
+
+        return sum(1 for started in self._inflight.values() if now - started < STALE_REQUEST_AFTER)
+
+
+def _header(headers, name):
+    """Giá trị header không phân biệt hoa thường (HTTP/2 trả tên header viết thường)."""
+    for key, value in (headers or {}).items():
+        if key.lower() == name.lower():
+            return value
+    return None
+
+
+def wait_for_page_ready(driver, max_wait=5, quiet_period=None, max_inflight=0,
+                        poll_interval=0.1, label=None, baseline_wait=None):
+    """
+    Chờ đến khi trang đã ổn định hoặc hết `max_wait` giây.
+
+    Args:
+        driver: Selenium WebDriver đã gọi driver.get().
+        max_wait (float): Trần thời gian chờ (giây).
+        quiet_period (float): Khoảng thời gian (giây) DOM và network phải yên lặng.
+        max_inflight (int): Số request đang chạy tối đa vẫn được coi là idle.
+        poll_interval (float): Chu kỳ kiểm tra (giây).
+        label (str): Tên trang/URL để ghi vào thống kê.
+        baseline_wait (float): Thời gian sleep cố định trước đây, dùng để tính thời gian tiết kiệm.
+
+    Returns:
+        dict: Thông tin lần chờ (elapsed, reason, ...), cũng được ghi vào thống kê.
+              'etag'/'last_modified' lấy từ response của trang chính (None nếu
+              server không trả hoặc driver không có CDP log).
+    """
+    quiet_period = DEFAULT_QUIET_PERIOD if quiet_period is None else quiet_period
+    tracker = NetworkTracker(driver)
+
+    start = time.monotonic()
+    network_quiet_since = start
+    last_resource_count = -1
+    state = {}
+    reason = "timeout"
+
+    while True:
+        now = time.monotonic()
+        try:
+            state = driver.execute_script(_PAGE_STATE_JS) or {}
+        except Exception:
+            state = {}
+
+        if tracker.available:
+            busy = tracker.inflight() > max_inflight
+        else:
+            # Không có CDP log: coi network yên lặng khi số resource không tăng nữa
+            resource_count = state.get("resourceCount", 0)
+            busy = resource_count != last_resource_count
+            last_resource_count = resource_count
+        if busy:
+            network_quiet_since = now
+
+        dom_quiet = state.get("msSinceMutation", 0) / 1000 >= quiet_period
+        network_quiet = now - network_quiet_since >= quiet_period
+        if state.get("readyState") == "complete" and dom_quiet and network_quiet:
+            reason = "ready"
+            break
+        if now - start >= max_wait:
+            break
+        time.sleep(poll_interval)
+
+    elapsed = time.monotonic() - start
+    record = {
+        'label': label,
+        'elapsed': round(elapsed, 3),
+        'reason': reason,
+        'network_source': "cdp" if tracker.available else "resource_timing",
+        'ready_state': state.get("readyState"),
+        'baseline_wait': baseline_wait,
+        'saved': round(baseline_wait - elapsed, 3) if baseline_wait is not None else None,
+        'etag': _header(tracker.document_headers, "ETag"),
+        'last_modified': _header(tracker.document_headers, "Last-Modified"),
+    }
+    with _readiness_lock:
+        _readiness_log.append(record)
+
+    metrics.observe("page_ready_seconds", elapsed, reason=reason)
+    logger.info(f"Page ready after {elapsed:.2f}s ({reason}): {label or ''}")
+    return record
+
+
+def drain_network_log(driver):
+    """Xóa CDP performance log đang chờ của driver (gọi khi driver được tái sử dụng)."""
+    NetworkTracker(driver).drain()
+
+
+def get_readiness_stats():
+    """
+    Thống kê thời gian chờ thực tế của các trang đã scrape.
+
+    Returns:
+        dict: Số trang, thời gian trung bình/p50/p95, số lần timeout và tổng thời gian tiết kiệm.
+    """
+    with _readiness_lock:
+        records = list(_readiness_log)
+    if not records:
+        return {'pages': 0}
+
+    elapsed = sorted(r['elapsed'] for r in records)
+    saved = [r['saved'] for r in records if r['saved'] is not None]
+    return {
+        'pages': len(records),
+        'mean_wait': round(sum(elapsed) / len(elapsed), 3),
+        'p50_wait': elapsed[len(elapsed) // 2],
+        'p95_wait': elapsed[min(len(elapsed) - 1, int(len(elapsed) * 0.95))],
+        'timeouts': sum(1 for r in records if r['reason'] == "timeout"),
+        'total_saved': round(sum(saved), 3),
+    }
@@ -0,0 +1,310 @@
+"""
+Tự động theo phân trang: tìm link trang tiếp/trang đánh số trong DOM và tải các
+trang song song.
+
+Hai chế độ:
+    - numbered: URL các trang khác nhau ở một tham số số có tên trong PAGE_PARAMS
+      (?page=2, ?trang=3, ?start=20) hoặc đoạn path (/page/2, /trang-3); tham số
+      số khác (?id=100 -> ?id=101) là link tới mục khác, không phải phân trang. Các trang 2..max_pages được
+      tải song song (giới hạn bởi max_workers); trang đầu tiên có nội dung trùng
+      một trang trước đó (nhiều site trả lại trang cuối hoặc trang 1 khi vượt
+      quá số trang) hoặc rỗng sẽ dừng việc crawl, các trang sau bị bỏ.
+    - next: chỉ có link "Trang tiếp"/"Next"/rel="next"; phải tải tuần tự vì link
+      của trang sau nằm trong trang trước.
+
+Nội dung các trang được ghép lại (bỏ header/footer lặp lại) để đưa vào cùng
+pipeline chia chunk và phân tích như một trang duy nhất.
+"""
+
+import hashlib
+import logging
+import re
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from math import gcd
+from urllib.parse import parse_qsl, urlencode, urljoin, urlsplit, urlunsplit
+
+from bs4 import BeautifulSoup, FeatureNotFound, SoupStrainer
+
+logger = logging.getLogger(__name__)
+
+# Text của link "trang tiếp" (so sánh sau khi strip và chữ thường)
+NEXT_LINK_TEXTS = (
+    'trang tiếp', 'trang sau', 'tiếp theo', 'tiếp', 'sau', 'next', 'next page',
+    'older posts', '›', '»', '>', '>>', '→',
+)
+# Các class/aria-label thường dùng cho nút trang tiếp
+_NEXT_HINT_RE = re.compile(r"\bnext\b|\btiep\b|pagination-next|page-next", re.IGNORECASE)
+# Tên tham số query được coi là số trang
+PAGE_PARAMS = ('page', 'trang', 'p', 'pg', 'paged', 'pageindex', 'page_no', 'pagenumber', 'start', 'offset')
+_PATH_PAGE_RE = re.compile(r"^(?P<prefix>.*?/(?:page|trang|p)[/-]?)(?P<number>\d+)(?P<suffix>/?)$", re.IGNORECASE)
+
+
+def _make_soup(html):
+    strainer = SoupStrainer(["a", "link"])
+    try:
+        return BeautifulSoup(html, "lxml", parse_only=strainer)
+    except FeatureNotFound:
+        return BeautifulSoup(html, "html.parser", parse_only=strainer)
+
+
+def _strip_path_page(path):
+    """Bỏ đoạn /page/N ở cuối path (nếu có) để so sánh với URL trang đầu."""
+    match = _PATH_PAGE_RE.match(path)
+    if match:
+        return match.group('prefix').rstrip("/-").rsplit("/", 1)[0] or "/", int(match.group('number'))
+    return path.rstrip("/") or "/", None
+
+
+def _numbered_candidate(base, url):
+    """
+    So sánh URL với URL trang đầu; nếu chỉ khác nhau ở một tham số số trang
+    (PAGE_PARAMS) hoặc số trong đoạn path /page/N thì trả về
+    (kiểu template, tên tham số hoặc prefix/suffix path, số).
+    """
+    parts = urlsplit(url)
+    if (parts.scheme, parts.netloc) != (base.scheme, base.netloc):
+        return None
+
+    base_query = dict(parse_qsl(base.query, keep_blank_values=True))
+    query = dict(parse_qsl(parts.query, keep_blank_values=True))
+
+    if parts.path.rstrip("/") == base.path.rstrip("/"):
+        changed = [
+            key for key in set(base_query) | set(query)
+            if base_query.get(key) != query.get(key)
+        ]
+        if (len(changed) == 1 and changed[0].lower() in PAGE_PARAMS
+                and query.get(changed[0], "").isdigit()):
+            return ('query', changed[0], int(query[changed[0]]))
+        return None
+
+    if query != base_query:
+        return None
+    match = _PATH_PAGE_RE.match(parts.path)
+    if match and _strip_path_page(parts.path)[0] == _strip_path_page(base.path)[0]:
+        return ('path', (match.group('prefix'), match.group('suffix')), int(match.group('number')))
+    return None
+
+
+def find_pagination(html, base_url):
+    """
+    Tìm thông tin phân trang trong HTML của một trang.
+
+    Args:
+        html (str): HTML gốc của trang
+        base_url (str): URL của trang (để chuyển link tương đối thành tuyệt đối)
+
+    Returns:
+        dict: next_url (str hoặc None), template (dict hoặc None) và numbered_urls
+            (danh sách URL trang đánh số tìm thấy trong trang)
+    """
+    soup = _make_soup(html or "")
+    base = urlsplit(base_url)
+    next_url = None
+    groups = {}
+
+    for tag in soup.find_all(["a", "link"]):
+        href = tag.get("href")
+        if not href or href.startswith(("#", "javascript:", "mailto:")):
+            continue
+        url = urljoin(base_url, href).split("#", 1)[0]
+        rel = [value.lower() for value in (tag.get("rel") or [])]
+
+        if next_url is None and url != base_url:
+            if "next" in rel:
+                next_url = url
+            elif tag.name == "a":
+                text = tag.get_text(" ", strip=True).lower()
+                hints = " ".join(tag.get("class") or []) + " " + (tag.get("aria-label") or "")
+                if text in NEXT_LINK_TEXTS or (not text and _NEXT_HINT_RE.search(hints)):
+                    next_url = url
+
+        candidate = _numbered_candidate(base, url)
+        if candidate:
+            kind, key, number = candidate
+            groups.setdefault((kind, key), {})[number] = url
+
+    templates = []
+    for (kind, key), numbers in groups.items():
+        values = sorted(numbers)
+        step = 0
+        for a, b in zip(values, values[1:]):
+            step = gcd(step, b - a)
+        step = step or 1
+
+        # Số của trang đầu: lấy từ URL hiện tại nếu có, nếu không suy ra từ bước nhảy.
+        # Khi suy ra, trang đầu phải là 0 hoặc 1 (?page=2,3 hoặc ?start=20,40), nếu
+        # không thì đây là các link khác (ví dụ /p/12345 của sản phẩm), không phải phân trang.
+        if kind == 'query':
+            current = dict(parse_qsl(base.query)).get(key, "")
+            current = int(current) if current.isdigit() else None
+        else:
+            current = _strip_path_page(base.path)[1]
+        first = current if current is not None else values[0] - step
+        if current is None and first not in (0, 1):
+            continue
+
+        templates.append((len(values), {
+            'kind': kind, 'key': key, 'first': first, 'step': step, 'max_seen': values[-1]
+        }))
+    template = max(templates, key=lambda item: item[0])[1] if templates else None
+
+    numbered_urls = [url for _, numbers in sorted(groups.items(), key=str) for url in numbers.values()]
+    return {'next_url': next_url, 'template': template, 'numbered_urls': numbered_urls}
+
+
+def page_url(base_url, template, page):
+    """
+    Tạo URL của trang thứ `page` (bắt đầu từ 1) theo template của find_pagination().
+    """
+    value = template['first'] + template['step'] * (page - 1)
+    parts = urlsplit(base_url)
+    if template['kind'] == 'query':
+        query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k != template['key']]
+        query.append((template['key'], str(value)))
+        return urlunsplit((parts.scheme, parts.netloc, parts.path, urlencode(query), ""))
+    prefix, suffix = template['key']
+    return urlunsplit((parts.scheme, parts.netloc, f"{prefix}{value}{suffix}", parts.query, ""))
+
+
+def _fingerprint(text):
+    return hashlib.blake2b(text.strip().encode("utf-8"), digest_size=16).digest()
+
+
+def crawl_pages(start_url, first_html, fetch_fn, clean_fn, max_pages=10, max_workers=4):
+    """
+    Theo phân trang bắt đầu từ một trang đã tải.
+
+    Args:
+        start_url (str): URL trang đầu
+        first_html (str): HTML của trang đầu (đã tải)
+        fetch_fn (callable): fetch_fn(url) -> html, ví dụ scrape_website_nobright
+        clean_fn (callable): clean_fn(html, url) -> text đã làm sạch
+        max_pages (int): Số trang tối đa, tính cả trang đầu
+        max_workers (int): Số trang tải song song tối đa
+
+    Returns:
+        dict: pages (danh sách {'page', 'url', 'text', 'html'} theo thứ tự), mode
+            ('numbered', 'next' hoặc 'none'), stop_reason và elapsed
+    """
+    start = time.perf_counter()
+    first_text = clean_fn(first_html, start_url)
+    pages = [{'page': 1, 'url': start_url, 'text': first_text, 'html': first_html}]
+    seen = {_fingerprint(first_text)}
+    info = find_pagination(first_html, start_url)
+
+    result = {'pages': pages, 'mode': 'none', 'stop_reason': 'no_pagination', 'elapsed': 0.0}
+    if max_pages <= 1:
+        result['stop_reason'] = 'max_pages'
+    elif info['template']:
+        result['mode'] = 'numbered'
+        result['stop_reason'] = _crawl_numbered(
+            start_url, info['template'], fetch_fn, clean_fn, max_pages, max_workers, pages, seen
+        )
+    elif info['next_url']:
+        result['mode'] = 'next'
+        result['stop_reason'] = _crawl_next(
+            info['next_url'], fetch_fn, clean_fn, max_pages, pages, seen
+        )
+
+    result['elapsed'] = time.perf_counter() - start
+    logger.info(
+        f"Phân trang ({result['mode']}): {len(pages)} trang trong {result['elapsed']:.1f}s, "
+        f"dừng vì {result['stop_reason']}"
+    )
+    return result
+
+
+def _load(url, fetch_fn, clean_fn):
+    html = fetch_fn(url)
+    return html, clean_fn(html, url)
+
+
+def _accept(page, url, text, pages, seen, html=None):
+    """Thêm trang nếu nội dung mới; trả về lý do dừng nếu không."""
+    if not text.strip():
+        return 'empty_page'
+    fingerprint = _fingerprint(text)
+    if fingerprint in seen:
+        return 'repeated_content'
+    seen.add(fingerprint)
+    pages.append({'page': page, 'url': url, 'text': text, 'html': html})
+    return None
+
+
+def _crawl_numbered(start_url, template, fetch_fn, clean_fn, max_pages, max_workers, pages, seen):
+    max_workers = max(1, max_workers)
+    next_page = 2
+    in_flight = deque()
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        # Chỉ tải trước tối đa max_workers trang; trang tiếp theo được gửi đi khi một trang đã xong,
+        # nên khi gặp điều kiện dừng không còn lượt tải thừa nào được xếp hàng
+        while in_flight or next_page <= max_pages:
+            while next_page <= max_pages and len(in_flight) < max_workers:
+                url = page_url(start_url, template, next_page)
+                in_flight.append((next_page, url, executor.submit(_load, url, fetch_fn, clean_fn)))
+                next_page += 1
+            # Xét kết quả theo thứ tự trang để dừng đúng tại trang cuối cùng có nội dung mới
+            page, url, future = in_flight.popleft()
+            try:
+                html, text = future.result()
+            except Exception as e:
+                logger.warning(f"Lỗi khi tải trang {page} ({url}): {e}")
+                return 'fetch_error'
+            stop_reason = _accept(page, url, text, pages, seen, html)
+            if stop_reason:
+                return stop_reason
+    finally:
+        # Khi đã dừng, không chờ các trang đang tải dở (kết quả bị bỏ)
+        executor.shutdown(wait=False, cancel_futures=True)
+    return 'max_pages'
+
+
+def _crawl_next(next_url, fetch_fn, clean_fn, max_pages, pages, seen):
+    visited = {pages[0]['url']}
+    while next_url and len(pages) < max_pages:
+        if next_url in visited:
+            return 'repeated_url'
+        visited.add(next_url)
+        try:
+            html = fetch_fn(next_url)
+        except Exception as e:
+            logger.warning(f"Lỗi khi tải trang {len(pages) + 1} ({next_url}): {e}")
+            return 'fetch_error'
+        stop_reason = _accept(len(pages) + 1, next_url, clean_fn(html, next_url), pages, seen, html)
+        if stop_reason:
+            return stop_reason
+        next_url = find_pagination(html, next_url)['next_url']
+    return 'max_pages' if next_url else 'no_next_link'
+
+
+def merge_page_texts(pages):
+    """
+    Ghép nội dung các trang, bỏ các dòng đầu/cuối trùng với trang đầu (menu, header, footer).
+
+    Args:
+        pages (list): Danh sách {'page', 'url', 'text'} từ crawl_pages()
+
+    Returns:
+        str: Nội dung ghép, các trang cách nhau bởi một dòng trống
+    """
+    if not pages:
+        return ""
+    first_lines = pages[0]['text'].split("\n")
+    texts = [pages[0]['text']]
+    for page in pages[1:]:
+        lines = page['text'].split("\n")
+        head = 0
+        while head < min(len(lines), len(first_lines)) and lines[head] == first_lines[head]:
+            head += 1
+        tail = 0
+        while (tail < min(len(lines), len(first_lines)) - head
+               and lines[-1 - tail] == first_lines[-1 - tail]):
+            tail += 1
+        body = lines[head:len(lines) - tail]
+        if body:
+            texts.append("\n".join(body))
+    return "\n\n".join(texts)
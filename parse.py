@@ -10,19 +10,34 @@
 """
 
 
-from langchain_ollama import OllamaLLM
-from langchain_core.prompts import ChatPromptTemplate
-import pandas as pd
 import json
-import re
+import logging
 import os
-from dotenv import load_dotenv
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import closing
+from env import load_env
+from llm_cache import get_llm_cache
+from chunking import OLLAMA_NUM_CTX, estimate_tokens
+from record_merge import RecordMerger
+from field_names import fields_from_description, normalize_field_names
+from json_salvage import salvage_json
+from relevance import select_chunks
+from resource_cache import cache_resource
+import metrics
 
-load_dotenv()
+load_env()
 
+logger = logging.getLogger(__name__)
+
+# Prompt được chia thành prefix cố định (hướng dẫn + mô tả của người dùng, gửi dưới dạng
+# system message) và chunk nội dung đặt ở cuối. Mọi chunk trong cùng một lần phân tích
+# có chung prefix nên Ollama dùng lại được KV cache của phần này thay vì đánh giá lại
+# toàn bộ hướng dẫn cho từng chunk. Không đưa nội dung thay đổi theo chunk vào prefix.
 template = (
-    "You are tasked with extracting and structuring information from the following text content: {dom_content}. "
-    "Based on the user's description: {parse_description}, extract the relevant data and return it as a JSON object. "
+    "You are tasked with extracting and structuring information from the text content given at the end "
+    "of this prompt. Based on the user's description below, extract the relevant data and return it "
+    "as a JSON object. "
     
     "CRITICAL EXTRACTION REQUIREMENTS: "
     "- Extract ALL matching records from the content, not just a few examples "
@@ -52,181 +67,590 @@ template = (
     "- If no matching data found, return an empty list: []"
 )
 
+request_template = " USER'S DESCRIPTION OF THE DATA TO EXTRACT: {parse_description}"
+content_template = "TEXT CONTENT:\n{dom_content}"
+
+# Bổ sung vào prompt khi bật structured output: Ollama bị ràng buộc bởi JSON schema,
+# nhưng model vẫn cần biết tên các field cần điền
+structured_output_instructions = (
+    " STRUCTURED OUTPUT: Return a JSON object of the form {{\"records\": [...]}} where each "
+    "element of \"records\" is one record with these fields: {output_fields}. "
+    "Use an empty string for values that are not present in the content."
+)
+
+
+def build_output_schema(parse_description):
+    """
+    Tạo JSON schema cho tham số `format` của Ollama từ mô tả dạng danh sách field.
+
+    Args:
+        parse_description (str): Ví dụ "Họ và tên, Năm sinh, Quê quán"
+
+    Returns:
+        dict: Schema {"records": [ {HoVaTen, NamSinh, QueQuan} ]}; nếu mô tả là câu
+            tự do thì mỗi record là một object bất kỳ
+    """
+    columns = fields_from_description(parse_description)
+    if columns:
+        item = {
+            "type": "object",
+            "properties": {column: {"type": "string"} for column in columns},
+            "required": columns,
+        }
+    else:
+        item = {"type": "object"}
+    return {
+        "type": "object",
+        "properties": {"records": {"type": "array", "items": item}},
+        "required": ["records"],
+    }
+
+
 # Lấy tên model từ biến môi trường, mặc định là llama3:latest
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "llama3:latest")
-model = OllamaLLM(model=OLLAMA_MODEL)
-
-def normalize_field_names(data):
-    """
-    Chuẩn hóa tên field trong dữ liệu JSON để phù hợp với Excel
-    """
-    field_mapping = {
-        # Họ và tên
-        'họ và tên': 'HoVaTen',
-        'họ tên': 'HoVaTen', 
-        'tên': 'HoVaTen',
-        'name': 'HoVaTen',
-        'fullname': 'HoVaTen',
-        'ho_va_ten': 'HoVaTen',
-        
-        # Năm sinh
-        'năm sinh': 'NamSinh',
-        'birth_year': 'NamSinh',
-        'year_of_birth': 'NamSinh',
-        'nam_sinh': 'NamSinh',
-        
-        # Quê quán
-        'quê quán': 'QueQuan',
-        'que_quan': 'QueQuan',
-        'hometown': 'QueQuan',
-        'origin': 'QueQuan',
-        
-        # Trình độ chuyên môn
-        'trình độ chuyên môn': 'TrinhDoChuyenMon',
-        'trinh_do_chuyen_mon': 'TrinhDoChuyenMon',
-        'education': 'TrinhDoChuyenMon',
-        'qualification': 'TrinhDoChuyenMon',
-        
-        # Chức vụ
-        'chức vụ': 'ChucVu',
-        'chuc_vu': 'ChucVu',
-        'position': 'ChucVu',
-        'title': 'ChucVu',
-        
-        # Đoàn ĐBQH
-        'đoàn đbqh': 'DoanDBQH',
-        'doan_dbqh': 'DoanDBQH',
-        'delegation': 'DoanDBQH',
-        
-        # Số phiếu
-        'đạt % số phiếu': 'SoPhieu',
-        'số phiếu': 'SoPhieu',
-        'so_phieu': 'SoPhieu',
-        'votes': 'SoPhieu',
-        'vote_percentage': 'SoPhieu',
-        
-        # Links và Images
-        'links': 'Links',
-        'link': 'Links',
-        'url': 'URL',
-        'urls': 'URLs',
-        'image': 'HinhAnh',
-        'images': 'HinhAnh',
-        'hình ảnh': 'HinhAnh',
-        'ảnh': 'HinhAnh',
-        'img': 'HinhAnh',
-        'video': 'Video',
-        'audio': 'Audio',
-        'media': 'Media',
-        'địa chỉ ảnh': 'DiaChiAnh',
-        'đường dẫn': 'DuongDan',
-        'liên kết': 'LienKet'
+# Địa chỉ Ollama server (mặc định http://localhost:11434), ví dụ server giả của benchmark
+OLLAMA_HOST = os.getenv("OLLAMA_HOST") or None
+# Số chunks gửi song song tới Ollama, nên khớp với OLLAMA_NUM_PARALLEL của server
+OLLAMA_NUM_PARALLEL = int(os.getenv("OLLAMA_NUM_PARALLEL", "4"))
+# Mặc định bật/tắt structured output (có thể chọn lại trong UI hoặc batch_crawl)
+OLLAMA_STRUCTURED_OUTPUT = os.getenv("OLLAMA_STRUCTURED_OUTPUT", "0").lower() in ("1", "true", "yes")
+
+
+@cache_resource
+def get_llm(model_name=OLLAMA_MODEL, num_ctx=OLLAMA_NUM_CTX, base_url=OLLAMA_HOST):
+    """
+    Lấy client Ollama dùng chung của process (tạo lần đầu khi được gọi, không phải lúc import).
+
+    Args:
+        model_name (str): Tên model
+        num_ctx (int): Context window, khớp với giới hạn mà split_dom_content dùng để chia chunks
+        base_url (str): Địa chỉ Ollama server (None = mặc định)
+
+    Returns:
+        OllamaLLM: Client thread-safe, dùng chung cho mọi phiên và mọi thread
+    """
+    # langchain chỉ được import khi gọi model lần đầu (import mất khoảng 1 giây)
+    from langchain_ollama import OllamaLLM
+
+    return OllamaLLM(model=model_name, num_ctx=num_ctx, base_url=base_url)
+
+
+def _call_model(prompt, variables, output_format=None):
+    """
+    Gọi model và trả về (text, generation_info, số token ước lượng của prompt) để lấy
+    được số token và thời gian từ metadata của Ollama.
+    """
+    prompt_value = prompt.format_prompt(**variables)
+    kwargs = {"format": output_format} if output_format else {}
+    with metrics.span("llm_call", model=OLLAMA_MODEL):
+        llm_result = get_llm().generate_prompt([prompt_value], **kwargs)
+    generation = llm_result.generations[0][0]
+    info = generation.generation_info or {}
+    # Số token và thời gian (nanosecond) lấy từ metadata của Ollama
+    metrics.incr("llm_prompt_eval_tokens_total", info.get('prompt_eval_count') or 0, model=OLLAMA_MODEL)
+    metrics.incr("llm_eval_tokens_total", info.get('eval_count') or 0, model=OLLAMA_MODEL)
+    metrics.incr("llm_prompt_eval_seconds_total", (info.get('prompt_eval_duration') or 0) / 1e9, model=OLLAMA_MODEL)
+    metrics.incr("llm_eval_seconds_total", (info.get('eval_duration') or 0) / 1e9, model=OLLAMA_MODEL)
+    return generation.text, info, estimate_tokens(prompt_value.to_string())
+
+
+def _parse_response(response, structured):
+    """
+    Parse response thành danh sách records.
+
+    Ở chế độ structured, response đã bị ràng buộc bởi schema nên được parse trực tiếp.
+    Ở chế độ tự do (hoặc khi JSON bị cắt cụt), salvage_json tách JSON khỏi phần text
+    thừa và lấy lại các records đã hoàn chỉnh.
+
+    Returns:
+        tuple: (records, salvage) với salvage là kết quả salvage_json nếu phải cứu
+            từ JSON lỗi, ngược lại None
+
+    Raises:
+        ValueError: Nếu response không chứa JSON nào dùng được
+    """
+    if structured:
+        try:
+            json_data = json.loads(response)
+        except ValueError:
+            json_data = None
+        if isinstance(json_data, dict) and "records" in json_data:
+            json_data = json_data["records"]
+        if isinstance(json_data, (list, dict)):
+            # Nếu là list, lấy toàn bộ; nếu là dict, lấy như một record
+            records = json_data if isinstance(json_data, list) else [json_data] if json_data else []
+            return normalize_field_names(records), None
+
+    salvage = salvage_json(response)
+    if salvage['complete']:
+        return normalize_field_names(salvage['records']), None
+    if salvage['records']:
+        return normalize_field_names(salvage['records']), salvage
+    raise ValueError("Không tìm thấy JSON hợp lệ trong response")
+
+
+def _process_chunk(prompt, index, total, chunk, parse_description, cache=None, output_format=None):
+    """
+    Gửi một chunk tới Ollama và parse JSON từ response.
+
+    Lỗi của chunk được ghi lại trong kết quả thay vì raise, để các chunk khác
+    vẫn tiếp tục được xử lý.
+
+    Returns:
+        dict: index, total, response, records, cached, cache_checked, elapsed,
+            json_ok, salvaged, discarded_bytes, eval_count (số token model sinh ra,
+            0 nếu lấy từ cache), prompt_eval_count và prompt_eval_ms (số token prompt
+            Ollama thực sự phải đánh giá và thời gian, phần prefix lấy từ KV cache không
+            được tính), prompt_tokens (số token prompt ước lượng) và error (None nếu thành công)
+    """
+    with metrics.span("llm_chunk", structured=output_format is not None) as span:
+        result = _run_chunk(prompt, index, total, chunk, parse_description, cache, output_format)
+        span.set(chunk=index, total=total, chunk_chars=len(chunk), records=len(result['records']),
+                 cached=result['cached'], error=result['error'])
+
+    if result['cache_checked']:
+        metrics.incr("llm_cache_total", result="hit" if result['cached'] else "miss")
+    if result['error']:
+        status = "failed"
+    elif result['salvaged']:
+        status = "salvaged"
+    else:
+        status = "ok" if result['records'] else "empty"
+    metrics.incr("chunks_total", status=status)
+    return result
+
+
+def _run_chunk(prompt, index, total, chunk, parse_description, cache, output_format):
+    logger.info(f"Đang xử lý chunk {index}/{total} (kích thước: {len(chunk)} ký tự)...")
+    start = time.perf_counter()
+    structured = output_format is not None
+    result = {
+        'index': index,
+        'total': total,
+        'response': "",
+        'records': [],
+        'cached': False,
+        'cache_checked': False,
+        'elapsed': 0.0,
+        'structured': structured,
+        'json_ok': False,
+        'salvaged': False,
+        'discarded_bytes': 0,
+        'eval_count': 0,
+        'prompt_eval_count': 0,
+        'prompt_eval_ms': 0.0,
+        'prompt_tokens': 0,
+        'error': None,
     }
-    
-    def normalize_item(item):
-        if isinstance(item, dict):
-            normalized = {}
-            for key, value in item.items():
-                # Tìm key mapping phù hợp
-                normalized_key = key
-                for original, mapped in field_mapping.items():
-                    if original.lower() in key.lower():
-                        normalized_key = mapped
-                        break
-                normalized[normalized_key] = value
-            return normalized
-        return item
-    
-    if isinstance(data, list):
-        return [normalize_item(item) for item in data]
-    elif isinstance(data, dict):
-        return normalize_item(data)
-    return data
-
-def parse_with_ollama(dom_chunks, parse_description):
-    prompt = ChatPromptTemplate.from_template(template)
-    chain = prompt | model
-
-    parsed_results = []
-    all_data = []
-    successful_chunks = 0
-    total_records_extracted = 0
-
-    print(f"Bắt đầu xử lý {len(dom_chunks)} chunks...")
-    
-    for i, chunk in enumerate(dom_chunks, start=1):
-        print(f"Đang xử lý chunk {i}/{len(dom_chunks)} (kích thước: {len(chunk)} ký tự)...")
-        
-        response = chain.invoke(
-            {"dom_content": chunk, "parse_description": parse_description}
-        )
-        parsed_results.append(response)
-        
-        # Thử parse JSON từ response
+
+    variables = {"dom_content": chunk, "parse_description": parse_description}
+    if structured:
+        variables["output_fields"] = ", ".join(
+            output_format["properties"]["records"]["items"].get("properties", {})
+        ) or "the fields described above"
+
+    cache_key = None
+    response = None
+    if cache is not None and cache.enabled:
+        extra = {"format": output_format} if structured else {}
+        cache_key = cache.make_key(OLLAMA_MODEL, prompt_template_text(structured), chunk,
+                                   parse_description, **extra)
+        response = cache.get(cache_key)
+        result['cached'] = response is not None
+        result['cache_checked'] = True
+
+    if response is None:
         try:
-            # Làm sạch response để lấy JSON
-            cleaned_response = clean_json_response(response)
-            json_data = json.loads(cleaned_response)
-            
-            # Chuẩn hóa tên field
-            json_data = normalize_field_names(json_data)
-            
-            # Đếm số records từ chunk này
-            chunk_records = 0
-            
-            # Nếu là list, extend vào all_data
-            if isinstance(json_data, list):
-                chunk_records = len(json_data)
-                all_data.extend(json_data)
-            # Nếu là dict, append vào all_data
-            elif isinstance(json_data, dict) and json_data:
-                chunk_records = 1
-                all_data.append(json_data)
-            
-            if chunk_records > 0:
-                successful_chunks += 1
-                total_records_extracted += chunk_records
-                print(f"✅ Chunk {i}: Trích xuất được {chunk_records} records")
+            response, generation_info, result['prompt_tokens'] = _call_model(
+                prompt, variables, output_format
+            )
+        except Exception as e:
+            logger.error(f"❌ Chunk {index}: Lỗi khi gọi Ollama - {e}")
+            result['error'] = f"Lỗi khi gọi Ollama: {e}"
+            result['elapsed'] = time.perf_counter() - start
+            return result
+        result['eval_count'] = generation_info.get('eval_count') or 0
+        result['prompt_eval_count'] = generation_info.get('prompt_eval_count') or 0
+        # Ollama trả thời gian theo nanosecond
+        result['prompt_eval_ms'] = (generation_info.get('prompt_eval_duration') or 0) / 1e6
+    else:
+        logger.info(f"💾 Chunk {index}: Dùng response từ cache")
+    result['response'] = response
+
+    # Thử parse JSON từ response; response bị cắt cụt hoặc lẫn text vẫn giữ lại các
+    # records đã hoàn chỉnh thay vì bỏ cả chunk (gọi lại model tốn cả một lần sinh)
+    try:
+        result['records'], salvage = _parse_response(response, structured)
+        if salvage is None:
+            result['json_ok'] = True
+        else:
+            result['salvaged'] = True
+            result['discarded_bytes'] = salvage['discarded_bytes']
+            logger.info(f"🩹 Chunk {index}: Cứu được {salvage['salvaged_records']} records từ JSON lỗi "
+                  f"(bỏ {salvage['discarded_bytes']}/{salvage['total_bytes']} bytes)")
+        # Chỉ cache response parse được trọn vẹn; response lỗi hoặc bị cắt cụt (chỉ cứu
+        # được một phần) sẽ được gọi lại ở lần chạy sau thay vì bị dùng lại mãi
+        if cache_key is not None and not result['cached'] and result['json_ok']:
+            cache.put(cache_key, response)
+
+        if result['records']:
+            logger.info(f"✅ Chunk {index}: Trích xuất được {len(result['records'])} records")
+        else:
+            logger.warning(f"⚠️ Chunk {index}: Không tìm thấy dữ liệu phù hợp")
+
+    except Exception as e:
+        logger.error(f"❌ Chunk {index}: Không thể parse JSON - {e}")
+        # In ra một phần response để debug
+        logger.debug(f"Response preview: {response[:200]}...")
+        result['error'] = f"Không thể parse JSON: {e}"
+
+    result['elapsed'] = time.perf_counter() - start
+    return result
+
+
+def prompt_template_text(structured=False):
+    """Prompt template đầy đủ (prefix cố định + chunk) cho chế độ tự do hoặc structured output."""
+    return _system_template(structured) + "\n" + content_template
+
+
+def _system_template(structured=False):
+    system = template + request_template
+    return system + structured_output_instructions if structured else system
+
+
+def build_prompt(structured=False):
+    """
+    Tạo prompt gồm system message cố định và chunk nội dung ở cuối.
+
+    Returns:
+        ChatPromptTemplate: Biến dom_content, parse_description (và output_fields nếu structured)
+    """
+    from langchain_core.prompts import ChatPromptTemplate
+
+    return ChatPromptTemplate.from_messages([
+        ("system", _system_template(structured)),
+        ("human", content_template),
+    ])
+
+
+def iter_parse_with_ollama(dom_chunks, parse_description, max_workers=None, use_cache=True,
+                           cancel_event=None, executor=None, structured_output=None):
+    """
+    Gửi các chunks tới Ollama song song và yield kết quả từng chunk ngay khi hoàn thành.
+
+    Args:
+        dom_chunks (list): Danh sách chunks cần phân tích
+        parse_description (str): Mô tả thông tin cần trích xuất
+        max_workers (int): Số chunks gửi song song tối đa (mặc định OLLAMA_NUM_PARALLEL, 1 = tuần tự)
+        use_cache (bool): Dùng cache response trên đĩa (False để luôn gọi lại Ollama)
+        cancel_event (threading.Event): Khi được set, dừng và bỏ các chunks chưa chạy
+        executor (Executor): Thread pool dùng chung (ví dụ giữa nhiều trang trong batch crawl);
+            khi truyền vào, max_workers bị bỏ qua và pool không bị shutdown ở đây
+        structured_output (bool): Ép Ollama trả về JSON theo schema tạo từ parse_description
+            (mặc định OLLAMA_STRUCTURED_OUTPUT)
+
+    Yields:
+        dict: Kết quả một chunk (index, total, records, response, elapsed, cached, error),
+            theo thứ tự hoàn thành. Đóng generator cũng hủy các chunks chưa chạy.
+    """
+    if structured_output is None:
+        structured_output = OLLAMA_STRUCTURED_OUTPUT
+    output_format = build_output_schema(parse_description) if structured_output else None
+    prompt = build_prompt(structured_output)
+
+    cache = get_llm_cache() if use_cache else None
+
+    total = len(dom_chunks)
+    owns_executor = executor is None
+    if owns_executor:
+        max_workers = max(1, min(max_workers or OLLAMA_NUM_PARALLEL, total or 1))
+        logger.info(f"Bắt đầu xử lý {total} chunks (song song tối đa {max_workers})...")
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+    else:
+        logger.info(f"Bắt đầu xử lý {total} chunks (thread pool dùng chung)...")
+
+    futures = []
+    try:
+        futures = [
+            executor.submit(
+                _process_chunk, prompt, i, total, chunk, parse_description, cache, output_format
+            )
+            for i, chunk in enumerate(dom_chunks, start=1)
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+            if cancel_event is not None and cancel_event.is_set():
+                logger.warning("⏹️ Đã hủy phân tích, bỏ qua các chunks còn lại")
+                break
+    finally:
+        if owns_executor:
+            executor.shutdown(wait=False, cancel_futures=True)
+        else:
+            for future in futures:
+                future.cancel()
+
+
+class ParseAccumulator:
+    """
+    Tổng hợp kết quả từng chunk thành kết quả cuối giống parse_with_ollama.
+
+    Kết quả có thể đến không theo thứ tự; records được gộp theo thứ tự chunk
+    (qua bộ đệm sắp xếp lại) nên output luôn xác định.
+    """
+
+    def __init__(self, total, deduplicate=True):
+        self.total = total
+        self.completed_chunks = 0
+        self._responses = [""] * total
+        self._pending = {}
+        self._next_index = 1
+        self._merger = RecordMerger() if deduplicate else None
+        self._records = []
+        self.chunk_errors = []
+        self.successful_chunks = 0
+        self.total_records = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.structured = False
+        self.responded_chunks = 0
+        self.parsed_chunks = 0
+        self.generated_tokens = 0
+        self.wasted_tokens = 0
+        self.wasted_seconds = 0.0
+        self.salvaged_chunks = 0
+        self.salvaged_records = 0
+        self.discarded_bytes = 0
+        self.prompt_tokens = 0
+        self.prompt_eval_tokens = 0
+        self.prompt_eval_ms = 0.0
+        self.chunk_metrics = []
+        self.records_without_llm = 0
+        self.skipped_chunks = 0
+        self.llm_calls = 0
+        self.llm_seconds = 0.0
+
+    def skip_chunks(self, count):
+        """Ghi nhận số chunks bị bộ lọc liên quan bỏ qua (không gửi tới LLM)."""
+        self.skipped_chunks += count
+
+    def add_records(self, records):
+        """
+        Thêm records đã trích xuất trực tiếp không qua LLM (ví dụ từ bảng HTML).
+
+        Nên gọi trước các chunks để records này đứng đầu kết quả và được dùng
+        làm gốc khi loại trùng với records từ LLM.
+        """
+        self.records_without_llm += len(records)
+        self._merge(normalize_field_names(list(records)))
+
+    def add(self, result):
+        """Thêm kết quả của một chunk (một phần tử yield bởi iter_parse_with_ollama)."""
+        index = result['index']
+        self.completed_chunks += 1
+        self._responses[index - 1] = result['response']
+        if result['cached']:
+            self.cache_hits += 1
+        elif result.get('cache_checked'):
+            self.cache_misses += 1
+        if not result['cached'] and result['response']:
+            self.llm_calls += 1
+            self.llm_seconds += result['elapsed']
+        if result['error']:
+            self.chunk_errors.append({'chunk': index, 'error': result['error']})
+        if result['records']:
+            self.successful_chunks += 1
+            self.total_records += len(result['records'])
+
+        if result.get('prompt_tokens'):
+            self.prompt_tokens += result['prompt_tokens']
+            self.prompt_eval_tokens += result.get('prompt_eval_count', 0)
+            self.prompt_eval_ms += result.get('prompt_eval_ms', 0.0)
+            self.chunk_metrics.append({
+                'chunk': index,
+                'elapsed_s': round(result['elapsed'], 2),
+                'prompt_tokens': result['prompt_tokens'],
+                'prompt_eval_count': result.get('prompt_eval_count', 0),
+                'prompt_eval_ms': round(result.get('prompt_eval_ms', 0.0), 1),
+                'eval_count': result.get('eval_count', 0),
+            })
+
+        # Tỉ lệ parse JSON thành công và số token model sinh ra nhưng bị bỏ vì không parse được
+        self.structured = self.structured or result.get('structured', False)
+        if result['response']:
+            self.responded_chunks += 1
+            self.generated_tokens += result.get('eval_count', 0)
+            if result.get('json_ok'):
+                self.parsed_chunks += 1
+            elif result.get('salvaged'):
+                self.salvaged_chunks += 1
+                self.salvaged_records += len(result['records'])
+                self.discarded_bytes += result.get('discarded_bytes', 0)
             else:
-                print(f"⚠️ Chunk {i}: Không tìm thấy dữ liệu phù hợp")
-                
-        except (json.JSONDecodeError, Exception) as e:
-            print(f"❌ Chunk {i}: Không thể parse JSON - {e}")
-            # In ra một phần response để debug
-            print(f"Response preview: {response[:200]}...")
-            continue
-
-    print(f"\n📊 Kết quả tổng hợp:")
-    print(f"- Tổng chunks: {len(dom_chunks)}")
-    print(f"- Chunks thành công: {successful_chunks}")
-    print(f"- Tổng records trích xuất: {total_records_extracted}")
-    
-    # Lưu dữ liệu vào session state để có thể tải xuống
-    return {
-        'text_results': parsed_results,
-        'structured_data': all_data,
-        'combined_text': "\n".join(parsed_results),
-        'stats': {
-            'total_chunks': len(dom_chunks),
-            'successful_chunks': successful_chunks,
-            'total_records': total_records_extracted
+                self.wasted_tokens += result.get('eval_count', 0)
+                self.wasted_seconds += result['elapsed']
+
+        self._pending[index] = result['records']
+        while self._next_index in self._pending:
+            self._merge(self._pending.pop(self._next_index))
+            self._next_index += 1
+
+    def _merge(self, records):
+        if self._merger is not None:
+            self._merger.extend(records)
+        else:
+            self._records.extend(records)
+
+    def finish(self):
+        """Gộp nốt các chunks còn chờ (khi bị hủy giữa chừng, có thể thiếu chunk ở giữa)."""
+        for index in sorted(self._pending):
+            self._merge(self._pending.pop(index))
+
+    @property
+    def records(self):
+        """Records đã gộp tới thời điểm hiện tại."""
+        return self._merger.records if self._merger is not None else self._records
+
+    def result(self):
+        """
+        Returns:
+            dict: text_results, structured_data, combined_text, stats, chunk_metrics
+                (số token/thời gian prompt eval từng chunk), chunk_errors và completed
+                (False nếu chưa xử lý hết các chunks).
+        """
+        merge_stats = self._merger.stats() if self._merger is not None else {}
+        chunk_errors = sorted(self.chunk_errors, key=lambda error: error['chunk'])
+        return {
+            'text_results': list(self._responses),
+            'structured_data': list(self.records),
+            'combined_text': "\n".join(self._responses),
+            'stats': {
+                'total_chunks': self.total,
+                'successful_chunks': self.successful_chunks,
+                'total_records': self.total_records,
+                'failed_chunks': len(chunk_errors),
+                'cache_hits': self.cache_hits,
+                'cache_misses': self.cache_misses,
+                'unique_records': len(self.records),
+                'duplicates_removed': merge_stats.get('duplicates_removed', 0),
+                'records_merged': merge_stats.get('records_merged', 0),
+                'output_mode': 'schema' if self.structured else 'free',
+                'parsed_chunks': self.parsed_chunks,
+                'json_success_rate': (
+                    self.parsed_chunks / self.responded_chunks if self.responded_chunks else 0.0
+                ),
+                'generated_tokens': self.generated_tokens,
+                'wasted_tokens': self.wasted_tokens,
+                'wasted_seconds': round(self.wasted_seconds, 2),
+                'salvaged_chunks': self.salvaged_chunks,
+                'salvaged_records': self.salvaged_records,
+                'discarded_bytes': self.discarded_bytes,
+                'prompt_tokens': self.prompt_tokens,
+                'prompt_eval_tokens': self.prompt_eval_tokens,
+                'prompt_eval_seconds': round(self.prompt_eval_ms / 1000, 2),
+                'skipped_chunks': self.skipped_chunks,
+                # Ước lượng theo thời gian trung bình của các chunks thực sự gọi Ollama
+                'llm_seconds_saved': (
+                    round(self.skipped_chunks * self.llm_seconds / self.llm_calls, 1)
+                    if self.llm_calls else 0.0
+                ),
+                'records_without_llm': self.records_without_llm,
+                'llm_free_ratio': (
+                    self.records_without_llm / (self.records_without_llm + self.total_records)
+                    if self.records_without_llm else 0.0
+                ),
+                # Phần prompt Ollama không phải đánh giá lại (lấy từ KV cache), ước lượng
+                'prompt_reuse_ratio': (
+                    max(0.0, 1 - self.prompt_eval_tokens / self.prompt_tokens)
+                    if self.prompt_tokens and self.prompt_eval_tokens else 0.0
+                )
+            },
+            'chunk_metrics': sorted(self.chunk_metrics, key=lambda metric: metric['chunk']),
+            'chunk_errors': chunk_errors,
+            'completed': self.completed_chunks == self.total
         }
-    }
 
-def clean_json_response(response):
+
+def parse_with_ollama(dom_chunks, parse_description, max_workers=None, use_cache=True,
+                      deduplicate=True, on_chunk=None, cancel_event=None, executor=None,
+                      structured_output=None, direct_records=None, relevance_threshold=None,
+                      chunk_budget=None):
     """
-    Làm sạch response để lấy JSON hợp lệ
+    Trích xuất dữ liệu từ các chunks bằng Ollama, xử lý song song nhiều chunks.
+
+    Args:
+        dom_chunks (list): Danh sách chunks cần phân tích
+        parse_description (str): Mô tả thông tin cần trích xuất
+        max_workers (int): Số chunks gửi song song tối đa (mặc định OLLAMA_NUM_PARALLEL, 1 = tuần tự)
+        use_cache (bool): Dùng cache response trên đĩa (False để luôn gọi lại Ollama)
+        deduplicate (bool): Loại record trùng và gộp record bị tách giữa các chunks
+        on_chunk (callable): on_chunk(result, accumulator) được gọi ngay khi mỗi chunk hoàn thành,
+            với kết quả của chunk đó và ParseAccumulator (accumulator.result() là kết quả tạm)
+        cancel_event (threading.Event): Khi được set, dừng và trả về kết quả đã có
+        executor (Executor): Thread pool dùng chung thay cho pool riêng của lần gọi này
+        structured_output (bool): Ép Ollama trả về JSON theo schema (mặc định OLLAMA_STRUCTURED_OUTPUT)
+        direct_records (list): Records đã trích xuất trực tiếp không qua LLM (xem table_extract)
+        relevance_threshold (float): Bỏ qua chunks có điểm liên quan dưới ngưỡng
+            (mặc định RELEVANCE_THRESHOLD, 0 để gửi mọi chunk)
+        chunk_budget (int): Số chunks tối đa gửi tới LLM; chunks dưới ngưỡng được gửi nếu còn ngân sách
+
+    Returns:
+        dict: text_results, structured_data, combined_text, stats, chunk_errors và completed.
+            Thứ tự kết quả luôn theo thứ tự chunks, không phụ thuộc thứ tự hoàn thành.
     """
-    # Tìm JSON trong response
-    json_match = re.search(r'\{.*\}|\[.*\]', response, re.DOTALL)
-    if json_match:
-        return json_match.group()
-    
-    # Nếu không tìm thấy JSON pattern, thử làm sạch basic
-    cleaned = response.strip()
-    if cleaned.startswith('```json'):
-        cleaned = cleaned[7:]
-    if cleaned.endswith('```'):
-        cleaned = cleaned[:-3]
-    
-    return cleaned.strip()
+    with metrics.span("parse") as span:
+        selection = select_chunks(dom_chunks, parse_description, relevance_threshold, chunk_budget)
+        dom_chunks = selection['chunks']
+        accumulator = ParseAccumulator(len(dom_chunks), deduplicate=deduplicate)
+        accumulator.skip_chunks(selection['skipped'])
+        if direct_records:
+            accumulator.add_records(direct_records)
+        # closing() hủy các chunks chưa chạy ngay cả khi on_chunk ném exception
+        # (ví dụ Streamlit dừng script khi người dùng bấm nút)
+        with closing(iter_parse_with_ollama(
+            dom_chunks, parse_description, max_workers=max_workers,
+            use_cache=use_cache, cancel_event=cancel_event, executor=executor,
+            structured_output=structured_output
+        )) as chunk_stream:
+            for result in chunk_stream:
+                accumulator.add(result)
+                if on_chunk is not None:
+                    on_chunk(result, accumulator)
+        accumulator.finish()
+        parsed = accumulator.result()
+        stats = parsed['stats']
+        span.set(chunks=stats['total_chunks'], skipped_chunks=stats['skipped_chunks'],
+                 failed_chunks=stats['failed_chunks'], records=stats['unique_records'])
+    metrics.incr("chunks_skipped_total", stats['skipped_chunks'])
+    metrics.incr("records_without_llm_total", stats['records_without_llm'])
+
+    # Ghi tổng kết thành một bản ghi log để không bị xen giữa khi nhiều trang chạy song song
+    summary = [
+        "📊 Kết quả tổng hợp:",
+        f"- Tổng chunks: {stats['total_chunks']}",
+        f"- Chunks thành công: {stats['successful_chunks']}",
+        f"- Chunks lỗi: {stats['failed_chunks']}",
+    ]
+    if stats['skipped_chunks']:
+        summary.append(f"- Chunks bỏ qua vì không liên quan: {stats['skipped_chunks']} "
+                       f"(tiết kiệm ~{stats['llm_seconds_saved']}s LLM)")
+    summary.append(f"- Tổng records trích xuất: {stats['total_records']}")
+    if stats['records_without_llm']:
+        summary.append(f"- Records trích xuất trực tiếp không qua LLM: {stats['records_without_llm']} "
+                       f"({stats['llm_free_ratio']:.0%})")
+    if deduplicate:
+        summary.append(f"- Records duy nhất: {stats['unique_records']} "
+                       f"(loại {stats['duplicates_removed']} trùng, gộp {stats['records_merged']})")
+    if stats['cache_hits'] or stats['cache_misses']:
+        summary.append(f"- Cache hits: {stats['cache_hits']}/{stats['total_chunks']}")
+    summary.append(f"- Parse JSON thành công ({stats['output_mode']}): {stats['json_success_rate']:.0%}, "
+                   f"lãng phí {stats['wasted_tokens']}/{stats['generated_tokens']} tokens "
+                   f"({stats['wasted_seconds']}s)")
+    if stats['prompt_eval_tokens']:
+        summary.append(f"- Prompt eval: {stats['prompt_eval_tokens']}/{stats['prompt_tokens']} tokens "
+                       f"({stats['prompt_eval_seconds']}s), tái sử dụng prefix ~{stats['prompt_reuse_ratio']:.0%}")
+    if stats['salvaged_chunks']:
+        summary.append(f"- Cứu được {stats['salvaged_records']} records từ {stats['salvaged_chunks']} "
+                       f"chunks JSON lỗi (bỏ {stats['discarded_bytes']} bytes)")
+    logger.info("\n".join(summary))
+
+    return parsed
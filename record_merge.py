@@ -0,0 +1,181 @@
+"""
+Loại bỏ record trùng lặp và gộp record bị tách giữa các chunks.
+
+Record được đưa vào lần lượt theo thứ tự chunk (streaming). Mỗi record được
+băm theo giá trị các field đã chuẩn hóa (NFC, bỏ dấu, chữ thường, gộp khoảng
+trắng):
+    - Record giống hệt một record đã thấy sẽ bị bỏ qua (duplicate).
+    - Record có cùng field định danh (ví dụ HoVaTen) và không mâu thuẫn với
+      record đã có sẽ được gộp vào: các field còn thiếu được bổ sung, giá trị
+      bị cắt cụt được thay bằng giá trị đầy đủ hơn.
+Bộ nhớ chỉ tỉ lệ với số record duy nhất (record đã gộp + các hash).
+"""
+
+import hashlib
+import json
+import re
+import unicodedata
+
+# Các field dùng làm định danh record, theo thứ tự ưu tiên
+DEFAULT_KEY_FIELDS = ('HoVaTen', 'URL', 'Links', 'LienKet', 'DuongDan')
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_NUMBER_RE = re.compile(r"[+-]?\d+(?:[.,]\d+)*%?")
+# Phần tiếp theo của một số (10 -> 10.5, 1 -> 1,000)
+_NUMBER_CONTINUATION_RE = re.compile(r"[.,]\d")
+_EDGE_PUNCT = " \t\n.,;:-–—\"'()[]"
+
+
+def normalize_value(value):
+    """
+    Chuẩn hóa giá trị để so sánh: NFC, bỏ dấu tiếng Việt, chữ thường, gộp khoảng trắng.
+
+    Returns:
+        str: Giá trị đã chuẩn hóa ("" nếu rỗng)
+    """
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        # 1.0 (số thực trong JSON) và 1 / "1" là cùng một giá trị; chuỗi "1.0" giữ nguyên
+        # vì "1.000" trong tiếng Việt là một nghìn
+        value = int(value)
+    if isinstance(value, (list, dict)):
+        value = json.dumps(value, ensure_ascii=False, sort_keys=True)
+    text = unicodedata.normalize("NFD", str(value))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = text.replace("đ", "d").replace("Đ", "D").casefold()
+    return _WHITESPACE_RE.sub(" ", text).strip(_EDGE_PUNCT)
+
+
+def _digest(*parts):
+    payload = "\x1f".join(parts).encode("utf-8")
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+def _compatible(a, b):
+    """
+    Hai giá trị chuẩn hóa không mâu thuẫn: bằng nhau hoặc một bên là phần đầu
+    (cắt tại ranh giới từ) của bên kia, như khi record bị tách giữa hai chunks.
+
+    Giá trị số phải bằng nhau chính xác ("10" và "10.5" là hai giá trị khác
+    nhau), kể cả khi số nằm cuối phần đầu của một chuỗi dài hơn.
+    """
+    if a == b:
+        return True
+    if _NUMBER_RE.fullmatch(a) or _NUMBER_RE.fullmatch(b):
+        return False
+    short, long_ = (a, b) if len(a) < len(b) else (b, a)
+    if not long_.startswith(short) or long_[len(short)].isalnum():
+        return False
+    return not (short[-1].isdigit() and _NUMBER_CONTINUATION_RE.match(long_, len(short)))
+
+
+class RecordMerger:
+    """
+    Gộp record theo kiểu streaming.
+
+    Example:
+        merger = RecordMerger()
+        for chunk_records in results:
+            merger.extend(chunk_records)
+        merger.records, merger.stats()
+    """
+
+    def __init__(self, key_fields=DEFAULT_KEY_FIELDS):
+        self.key_fields = tuple(key_fields)
+        self.records = []
+        self._normalized = []  # giá trị chuẩn hóa của từng record đã gộp
+        self._fingerprints = set()
+        self._entities = {}  # hash field định danh -> danh sách index trong self.records
+        self.received = 0
+        self.duplicates = 0
+        self.merged = 0
+
+    def _entity_key(self, normalized):
+        for field in self.key_fields:
+            if normalized.get(field):
+                return _digest(field, normalized[field])
+        # Không có field định danh quen thuộc: dùng mọi field có giá trị, để hai
+        # record chỉ trùng field đầu tiên (ví dụ cùng ChucVu) không bị gộp nhầm
+        values = sorted(f"{field}={value}" for field, value in normalized.items() if value)
+        return _digest("__all__", *values) if values else None
+
+    def add(self, record):
+        """
+        Thêm một record.
+
+        Returns:
+            str: 'new', 'duplicate' hoặc 'merged'
+        """
+        self.received += 1
+
+        if not isinstance(record, dict):
+            fingerprint = _digest("__value__", normalize_value(record))
+            if fingerprint in self._fingerprints:
+                self.duplicates += 1
+                return 'duplicate'
+            self._fingerprints.add(fingerprint)
+            self.records.append(record)
+            self._normalized.append({})
+            return 'new'
+
+        normalized = {field: normalize_value(value) for field, value in record.items()}
+        fingerprint = _digest(*sorted(f"{k}={v}" for k, v in normalized.items() if v))
+        if fingerprint in self._fingerprints:
+            self.duplicates += 1
+            return 'duplicate'
+        self._fingerprints.add(fingerprint)
+
+        entity_key = self._entity_key(normalized)
+        if entity_key is not None:
+            for index in self._entities.get(entity_key, ()):
+                existing = self._normalized[index]
+                if all(
+                    _compatible(value, existing[field])
+                    for field, value in normalized.items()
+                    if value and existing.get(field)
+                ):
+                    return self._merge_into(index, record, normalized)
+
+        index = len(self.records)
+        self.records.append(dict(record))
+        self._normalized.append(normalized)
+        if entity_key is not None:
+            self._entities.setdefault(entity_key, []).append(index)
+        return 'new'
+
+    def _merge_into(self, index, record, normalized):
+        target = self.records[index]
+        existing = self._normalized[index]
+        changed = False
+        for field, value in record.items():
+            new_value = normalized[field]
+            if not new_value:
+                continue
+            # Bổ sung field còn thiếu hoặc thay giá trị bị cắt cụt bằng giá trị dài hơn
+            if len(new_value) > len(existing.get(field, "")):
+                target[field] = value
+                existing[field] = new_value
+                changed = True
+        if changed:
+            self.merged += 1
+            return 'merged'
+        self.duplicates += 1
+        return 'duplicate'
+
+    def extend(self, records):
+        """Thêm lần lượt nhiều records."""
+        for record in records:
+            self.add(record)
+
+    def stats(self):
+        """
+        Returns:
+            dict: Số record nhận vào, số record duy nhất, số bản trùng bị loại và số lần gộp.
+        """
+        return {
+            'received_records': self.received,
+            'unique_records': len(self.records),
+            'duplicates_removed': self.duplicates,
+            'records_merged': self.merged,
+        }
@@ -0,0 +1,191 @@
+"""
+Lọc các chunks không liên quan tới thông tin cần trích xuất trước khi gửi tới Ollama.
+
+Mỗi chunk được chấm điểm BM25 theo các từ trong mô tả của người dùng:
+    - Text được fold (bỏ dấu, chữ thường) nên "Quê quán", "que quan" và
+      "QUÊ QUÁN" khớp nhau. Ngoài từng âm tiết, các cặp âm tiết liền nhau cũng
+      là một term ("nam_sinh", "que_quan") vì từ tiếng Việt thường có hai âm tiết.
+    - Các chunk tiếp theo của một danh sách dài thường không lặp lại nhãn cột
+      nhưng lặp lại nhiều giá trị (tỉnh, chức vụ, trình độ). Vì vậy có thêm một
+      truy vấn thứ hai gồm các term đặc trưng của những chunk điểm cao nhất và
+      cũng xuất hiện ở chunk khác (pseudo-relevance feedback).
+Mỗi truy vấn được chia cho điểm cao nhất của chính nó; điểm của chunk là giá
+trị lớn hơn giữa điểm truy vấn chính và điểm feedback (nhân FEEDBACK_WEIGHT),
+nên term feedback không làm các chunk khác bị tụt hạng. Chunk dưới ngưỡng bị
+bỏ qua, trừ khi còn ngân sách số chunks được gửi.
+
+Cấu hình qua biến môi trường (tùy chọn):
+    RELEVANCE_THRESHOLD  Ngưỡng điểm tương đối 0..1 (mặc định 0 = tắt, ví dụ 0.1 để bật)
+"""
+
+import logging
+import math
+import os
+import re
+from collections import Counter
+
+from record_merge import normalize_value
+
+logger = logging.getLogger(__name__)
+
+# Mặc định tắt: bộ lọc có thể bỏ sót chunks chứa record nên chỉ bật khi đã kiểm chứng trên trang thật
+RELEVANCE_THRESHOLD = float(os.getenv("RELEVANCE_THRESHOLD", "0"))
+
+# Từ nối không mang nghĩa khi so khớp (đã bỏ dấu)
+STOPWORDS = {
+    'va', 'cua', 'cac', 'nhung', 'la', 'co', 'trong', 'cho', 'voi', 'mot', 'hoac', 'theo',
+    'the', 'and', 'or', 'of', 'a', 'an', 'to', 'in', 'for', 'with',
+}
+BM25_K1 = 1.5
+BM25_B = 0.75
+# Pseudo-relevance feedback: số chunk điểm cao và số term được thêm vào truy vấn
+FEEDBACK_CHUNKS = 3
+FEEDBACK_TERMS = 20
+FEEDBACK_WEIGHT = 0.5
+
+_WORD_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(text):
+    """
+    Tách text thành các term đã bỏ dấu: âm tiết và cặp âm tiết liền nhau.
+
+    Args:
+        text (str): Đoạn text
+
+    Returns:
+        list: Ví dụ 'Năm sinh' -> ['nam', 'sinh', 'nam_sinh']
+    """
+    words = _WORD_RE.findall(normalize_value(text))
+    return words + [f"{a}_{b}" for a, b in zip(words, words[1:])]
+
+
+def query_terms(parse_description):
+    """Các term của mô tả, bỏ từ nối và các cặp âm tiết chứa từ nối."""
+    terms = []
+    for term in tokenize(parse_description):
+        if any(part in STOPWORDS for part in term.split("_")):
+            continue
+        if term not in terms:
+            terms.append(term)
+    return terms
+
+
+class BM25:
+    """Chỉ mục BM25 trên một danh sách chunks."""
+
+    def __init__(self, documents):
+        self.tfs = [Counter(tokenize(document)) for document in documents]
+        self.lengths = [sum(tf.values()) for tf in self.tfs]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        self.df = Counter(term for tf in self.tfs for term in tf)
+        total = len(self.tfs)
+        self.idf = {term: math.log(1 + (total - count + 0.5) / (count + 0.5)) for term, count in self.df.items()}
+
+    def score(self, index, weights):
+        """Điểm BM25 của chunk `index` với truy vấn {term: trọng số}."""
+        tf = self.tfs[index]
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[index] / (self.avg_length or 1))
+        total = 0.0
+        for term, weight in weights.items():
+            frequency = tf.get(term)
+            if frequency:
+                total += weight * self.idf[term] * frequency * (BM25_K1 + 1) / (frequency + norm)
+        return total
+
+    def scores(self, weights):
+        return [self.score(index, weights) for index in range(len(self.tfs))]
+
+    def feedback_terms(self, indices, exclude, limit):
+        """
+        Các term đặc trưng nhất (tf * idf) của những chunks cho trước, chỉ tính
+        term có ở ít nhất một chunk khác (term riêng của một chunk không giúp tìm chunk khác).
+        """
+        weights = Counter()
+        for index in indices:
+            for term, frequency in self.tfs[index].items():
+                if term not in exclude and self.df[term] > len(indices):
+                    weights[term] += frequency * self.idf[term]
+        return [term for term, _ in weights.most_common(limit)]
+
+
+def score_chunks(chunks, parse_description):
+    """
+    Chấm điểm mức độ liên quan của từng chunk với mô tả.
+
+    Args:
+        chunks (list): Danh sách chunks (str)
+        parse_description (str): Mô tả thông tin cần trích xuất
+
+    Returns:
+        list: Điểm tương đối 0..1 của từng chunk (toàn 1.0 nếu không chunk nào khớp)
+    """
+    terms = query_terms(parse_description)
+    if not chunks or not terms:
+        return [1.0] * len(chunks)
+
+    index = BM25(chunks)
+    weights = {term: 1.0 for term in terms}
+    scores = index.scores(weights)
+    top = max(scores)
+    if top <= 0:
+        # Không chunk nào chứa từ nào của mô tả: không đủ căn cứ để bỏ chunk nào
+        return [1.0] * len(chunks)
+
+    relative = [score / top for score in scores]
+
+    ranked = sorted(range(len(chunks)), key=lambda i: -scores[i])
+    relevant = [i for i in ranked[:FEEDBACK_CHUNKS] if scores[i] > 0]
+    feedback = index.feedback_terms(relevant, weights, FEEDBACK_TERMS)
+    if feedback:
+        feedback_scores = index.scores({term: 1.0 for term in feedback})
+        feedback_top = max(feedback_scores)
+        if feedback_top > 0:
+            relative = [
+                max(score, FEEDBACK_WEIGHT * feedback_score / feedback_top)
+                for score, feedback_score in zip(relative, feedback_scores)
+            ]
+    return relative
+
+
+def select_chunks(chunks, parse_description, threshold=None, budget=None):
+    """
+    Chọn các chunks sẽ gửi tới LLM.
+
+    Chunk đạt ngưỡng luôn được ưu tiên; nếu có budget, các chunk dưới ngưỡng
+    vẫn được gửi (theo thứ tự điểm giảm dần) khi còn ngân sách. Trang chỉ có
+    một chunk thì chunk đó luôn được gửi.
+
+    Args:
+        chunks (list): Danh sách chunks (str)
+        parse_description (str): Mô tả thông tin cần trích xuất
+        threshold (float): Ngưỡng điểm tương đối (mặc định RELEVANCE_THRESHOLD, 0 để tắt)
+        budget (int): Số chunks tối đa được gửi (None = chỉ lọc theo ngưỡng)
+
+    Returns:
+        dict: chunks (các chunk được chọn, giữ thứ tự gốc), indices (vị trí gốc),
+            scores (điểm của mọi chunk) và skipped (số chunk bị bỏ)
+    """
+    threshold = RELEVANCE_THRESHOLD if threshold is None else threshold
+    if (threshold <= 0 and budget is None) or len(chunks) <= 1:
+        return {'chunks': list(chunks), 'indices': list(range(len(chunks))),
+                'scores': [1.0] * len(chunks), 'skipped': 0}
+
+    scores = score_chunks(chunks, parse_description)
+    ranked = sorted(range(len(chunks)), key=lambda i: -scores[i])
+    selected = [i for i in ranked if scores[i] >= threshold]
+    if budget is not None:
+        below = [i for i in ranked if scores[i] < threshold]
+        selected = (selected + below)[:max(0, budget)]
+    selected.sort()
+
+    skipped = len(chunks) - len(selected)
+    if skipped:
+        logger.info(f"Lọc liên quan: gửi {len(selected)}/{len(chunks)} chunks, bỏ qua {skipped} chunks "
+                    f"(ngưỡng {threshold:.2f}" + (f", ngân sách {budget})" if budget is not None else ")"))
+    return {
+        'chunks': [chunks[i] for i in selected],
+        'indices': selected,
+        'scores': scores,
+        'skipped': skipped,
+    }
@@ -0,0 +1,250 @@
+"""
+Cache trong bộ nhớ dùng chung cho mọi phiên Streamlit và mọi thread của process.
+
+Hai decorator, theo tinh thần st.cache_resource / st.cache_data nhưng không
+phụ thuộc Streamlit (dùng được cả trong batch_crawl và benchmark):
+    - cache_resource: một object dùng chung cho mỗi bộ tham số (LLM client,
+      pool...), tạo lần đầu khi được gọi, không hết hạn.
+    - cache_data: kết quả tính toán theo tham số, có TTL, giới hạn số entry và
+      dung lượng ước lượng (eviction LRU).
+
+Cả hai đều thread-safe và single-flight: nhiều thread cùng gọi với cùng tham
+số khi chưa có trong cache thì chỉ một thread tính, các thread còn lại chờ và
+nhận cùng kết quả (hoặc cùng exception; exception không được cache).
+
+Giống Streamlit, tham số có tên bắt đầu bằng "_" không thuộc khóa cache (dùng
+cho object lớn hoặc không hash được). Giá trị trả về được dùng chung giữa các
+phiên nên caller không được sửa trực tiếp.
+"""
+
+import functools
+import inspect
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+
+def estimate_size(value, _depth=0):
+    """Ước lượng dung lượng (byte) của giá trị: chuỗi/bytes theo độ dài, list/dict đệ quy."""
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if _depth > 6:
+        return sys.getsizeof(value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(k, _depth + 1) + estimate_size(v, _depth + 1) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(estimate_size(item, _depth + 1) for item in value)
+    return sys.getsizeof(value)
+
+
+class _Flight:
+    """Một lần tính đang chạy; các thread khác chờ trên event."""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class MemoryCache:
+    """
+    Cache LRU thread-safe với TTL, giới hạn số entry/dung lượng và single-flight.
+
+    Args:
+        name (str): Tên cache (label của metrics)
+        ttl (float): Thời gian sống của entry (giây); None = không hết hạn
+        max_entries (int): Số entry tối đa; None = không giới hạn
+        max_bytes (int): Tổng dung lượng ước lượng tối đa; None = không giới hạn
+    """
+
+    def __init__(self, name, ttl=None, max_entries=None, max_bytes=None):
+        self.name = name
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, expires_at, size)
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.evictions = 0
+
+    def _lookup(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        value, expires_at, _ = entry
+        if expires_at is not None and expires_at <= now:
+            self._remove(key)
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._total_bytes -= size
+
+    def _store(self, key, value):
+        size = estimate_size(value) if self.max_bytes else 0
+        if self.max_bytes and size > self.max_bytes:
+            # Lớn hơn cả giới hạn: không cache
+            return
+        if key in self._entries:
+            self._remove(key)
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        self._entries[key] = (value, expires_at, size)
+        self._total_bytes += size
+        while self._entries and (
+            (self.max_entries and len(self._entries) > self.max_entries)
+            or (self.max_bytes and self._total_bytes > self.max_bytes)
+        ):
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def get_or_compute(self, key, compute, refresh=False):
+        """
+        Lấy giá trị theo key, tính bằng compute() nếu chưa có hoặc đã hết hạn.
+
+        Args:
+            key: Khóa (hashable)
+            compute (callable): Hàm không tham số tính giá trị
+            refresh (bool): Bỏ qua entry hiện có và tính lại
+
+        Returns:
+            Giá trị đã cache hoặc vừa tính
+        """
+        with self._lock:
+            if not refresh:
+                found, value = self._lookup(key, time.monotonic())
+                if found:
+                    self.hits += 1
+                    metrics.incr("memory_cache_total", cache=self.name, result="hit")
+                    return value
+            flight = self._flights.get(key)
+            owner = flight is None
+            if owner:
+                flight = self._flights[key] = _Flight()
+                self.misses += 1
+            else:
+                self.waits += 1
+        metrics.incr("memory_cache_total", cache=self.name, result="miss" if owner else "wait")
+
+        if not owner:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if flight.error is None:
+                    self._store(key, flight.value)
+                del self._flights[key]
+            flight.event.set()
+        return flight.value
+
+    def invalidate(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'size_bytes': self._total_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'waits': self.waits,
+                'evictions': self.evictions,
+            }
+
+
+def _key_builder(func):
+    """Hàm tạo khóa cache từ tham số của func, bỏ các tham số tên bắt đầu bằng '_'."""
+    signature = inspect.signature(func)
+
+    def build(args, kwargs):
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        return tuple(
+            (name, value) for name, value in bound.arguments.items() if not name.startswith("_")
+        )
+
+    return build
+
+
+def _decorate(func, cache):
+    build_key = _key_builder(func)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        key = build_key(args, kwargs)
+        return cache.get_or_compute(key, lambda: func(*args, **kwargs))
+
+    def refresh(*args, **kwargs):
+        """Tính lại và thay entry trong cache (ví dụ khi người dùng tắt cache)."""
+        key = build_key(args, kwargs)
+        return cache.get_or_compute(key, lambda: func(*args, **kwargs), refresh=True)
+
+    def invalidate(*args, **kwargs):
+        cache.invalidate(build_key(args, kwargs))
+
+    wrapper.refresh = refresh
+    wrapper.invalidate = invalidate
+    wrapper.clear = cache.clear
+    wrapper.stats = cache.stats
+    wrapper.cache = cache
+    return wrapper
+
+
+def cache_resource(func=None, *, name=None):
+    """
+    Decorator: mỗi bộ tham số một object dùng chung cho cả process.
+
+    Dùng:
+        @cache_resource
+        def get_llm(model): ...
+    """
+    if func is None:
+        return functools.partial(cache_resource, name=name)
+    return _decorate(func, MemoryCache(name or func.__name__))
+
+
+def cache_data(ttl=None, max_entries=None, max_bytes=None, name=None):
+    """
+    Decorator: cache kết quả theo tham số với TTL và giới hạn bộ nhớ.
+
+    Args:
+        ttl (float): Thời gian sống (giây); None = không hết hạn
+        max_entries (int): Số entry tối đa
+        max_bytes (int): Tổng dung lượng ước lượng tối đa
+        name (str): Tên cache (mặc định tên hàm)
+
+    Dùng:
+        @cache_data(ttl=600, max_entries=32)
+        def load(url, options): ...
+    """
+    def decorator(func):
+        return _decorate(func, MemoryCache(name or func.__name__, ttl, max_entries, max_bytes))
+
+    return decorator
@@ -1,82 +1,86 @@
 #without Brightdata
-import selenium.webdriver as webdriver
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-import time
+from driver_pool import get_driver_pool
+from page_ready import wait_for_page_ready
+from page_cache import get_page_cache
+from chunking import CHARS_PER_TOKEN, chunk_text, context_chunk_budget
+from pagination import find_pagination
+import metrics
 
 #With brightdata 
-from selenium.webdriver import Remote, ChromeOptions
-from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
-from bs4 import BeautifulSoup
-from dotenv import load_dotenv
+from env import load_env
+from bs4 import BeautifulSoup, FeatureNotFound
+import logging
 import os
 import re
 from urllib.parse import urljoin, urlparse
 
-load_dotenv()
+logger = logging.getLogger(__name__)
+
+load_env()
 SBR_WEBDRIVER = os.getenv("SBR_WEBDRIVER")
-print(f"SBR WebDriver URL: {SBR_WEBDRIVER}")
 # Không raise exception ở đây, sẽ kiểm tra khi sử dụng hàm scrape_website_brightdata
 
-def scrape_website_nobright(website, timeout=5):
+def scrape_website_nobright(website, timeout=5, use_cache=True):
     """
     Scrapes a website without using Brightdata.
 
     Args:
         website (str): The URL of the website to scrape.
-        timeout (int): Wait time after loading the page.
+        timeout (int): Maximum time to wait for the page to settle after loading.
+        use_cache (bool): Reuse a cached snapshot of the page if it is still fresh.
 
     Returns:
         str: The HTML content of the scraped webpage.
     """
-    print("Launching chromedriver (nobright)...")
-    
-    # Sử dụng WebDriver Manager để tự động tải và quản lý ChromeDriver
-    options = webdriver.ChromeOptions()
-    options.add_argument("--headless")  # Optional: Run in headless mode
-    options.add_argument("--no-sandbox")
-    options.add_argument("--disable-dev-shm-usage")
-    options.add_argument("--disable-gpu")
-    options.add_argument("--window-size=1920,1080")
+    return get_page_cache().fetch(
+        website, "nobright", lambda: _fetch_nobright(website, timeout), use_cache=use_cache
+    )
+
+def _fetch_nobright(website, timeout):
+    logger.info("Leasing chromedriver from pool (nobright)...")
     
     try:
-        # WebDriver Manager sẽ tự động tải ChromeDriver phiên bản tương thích
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        
-        driver.get(website)
-        print(f"Page has been loaded: {website}")
-        time.sleep(timeout)  # Wait for dynamic content to load
-        html = driver.page_source
-        return html
+        # Mượn driver đã khởi động sẵn từ pool thay vì khởi chạy Chrome mới cho mỗi URL
+        with metrics.span("fetch", method="nobright"), get_driver_pool().lease() as driver:
+            driver.get(website)
+            logger.info(f"Page has been loaded: {website}")
+            # Chờ đến khi trang ổn định thay vì sleep cố định
+            ready = wait_for_page_ready(driver, max_wait=timeout, label=website, baseline_wait=5)
+            # Trả kèm validator để page cache không phải gửi thêm request
+            return driver.page_source, ready['etag'], ready['last_modified']
     except Exception as e:
-        print(f"Error in scrape_website_nobright: {e}")
+        logger.error(f"Error in scrape_website_nobright: {e}")
         raise e
-    finally:
-        try:
-            driver.quit()
-        except:
-            pass
 
-def scrape_website_brightdata(website, timeout=10):
+def scrape_website_brightdata(website, timeout=10, use_cache=True):
     """
     Scrapes a website using Brightdata (with captcha handling).
 
     Args:
         website (str): The URL of the website to scrape.
-        timeout (int): Wait time after loading the page.
+        timeout (int): Maximum time to wait for the page to settle after loading.
+        use_cache (bool): Reuse a cached snapshot of the page if it is still fresh.
 
     Returns:
         str: The HTML content of the scraped webpage.
     """
     if not SBR_WEBDRIVER:
         raise ValueError("SBR_WEBDRIVER URL is missing or not loaded from .env")
-    
-    print("Connecting to Scraping Browser (Brightdata)...")
+
+    return get_page_cache().fetch(
+        website, "brightdata", lambda: _fetch_brightdata(website, timeout), use_cache=use_cache
+    )
+
+def _fetch_brightdata(website, timeout):
+    # selenium chỉ được import khi thật sự scrape qua Brightdata
+    from selenium.webdriver import Remote, ChromeOptions
+    from selenium.webdriver.chromium.remote_connection import ChromiumRemoteConnection
+
+    logger.info("Connecting to Scraping Browser (Brightdata)...")
     sbr_connection = ChromiumRemoteConnection(SBR_WEBDRIVER, "goog", "chrome")
-    with Remote(sbr_connection, options=ChromeOptions()) as driver:
+    with metrics.span("fetch", method="brightdata"), Remote(sbr_connection, options=ChromeOptions()) as driver:
         driver.get(website)
-        print("Waiting captcha to solve...")
+        logger.info("Waiting captcha to solve...")
         try:
             solve_res = driver.execute(
                 "executeCdpCommand",
@@ -85,17 +89,18 @@ def scrape_website_brightdata(website, timeout=10):
                     "params": {"detectTimeout": 10000},
                 },
             )
-            print("Captcha solve status:", solve_res["value"]["status"])
+            logger.info(f"Captcha solve status: {solve_res['value']['status']}")
+            metrics.incr("captcha_solve_total", status=solve_res["value"]["status"])
         except Exception as e:
-            print(f"Error while solving captcha: {e}")
+            logger.warning(f"Error while solving captcha: {e}")
+            metrics.incr("captcha_solve_total", status="error")
             # Depending on implementation, you might choose to proceed or raise an error
 
-        print("Navigated! Scraping page content...")
-        time.sleep(timeout)  # Wait for dynamic content to load
-        html = driver.page_source
-        return html
+        logger.info("Navigated! Scraping page content...")
+        ready = wait_for_page_ready(driver, max_wait=timeout, label=website, baseline_wait=10)
+        return driver.page_source, ready['etag'], ready['last_modified']
     
-def scrape_website_combined(website, nobright_timeout=5, brightdata_timeout=10):
+def scrape_website_combined(website, nobright_timeout=5, brightdata_timeout=10, use_cache=True):
     """
     Attempts to scrape a website using the nobright method.
     If a captcha is detected and SBR_WEBDRIVER is available, falls back to the brightdata method.
@@ -103,95 +108,135 @@ def scrape_website_combined(website, nobright_timeout=5, brightdata_timeout=10):
 
     Args:
         website (str): The URL of the website to scrape.
-        nobright_timeout (int): Wait time after loading the page with the nobright method.
-        brightdata_timeout (int): Wait time after loading the page with the brightdata method.
+        nobright_timeout (int): Maximum wait for the page to settle with the nobright method.
+        brightdata_timeout (int): Maximum wait for the page to settle with the brightdata method.
+        use_cache (bool): Reuse cached snapshots of the page if they are still fresh.
 
     Returns:
         str: The HTML content of the scraped webpage.
     """
-    print("Attempting to scrape without Brightdata...")
+    logger.info("Attempting to scrape without Brightdata...")
     try:
-        html = scrape_website_nobright(website, timeout=nobright_timeout)
-        print("Scraping completed with nobright method.")
+        html = scrape_website_nobright(website, timeout=nobright_timeout, use_cache=use_cache)
+        logger.info("Scraping completed with nobright method.")
         if detect_captcha(html):
-            print("Captcha detected using nobright method.")
+            logger.warning("Captcha detected using nobright method.")
+            metrics.incr("captcha_detected_total", method="nobright")
             if SBR_WEBDRIVER:
-                print("SBR_WEBDRIVER available. Switching to brightdata method...")
+                logger.info("SBR_WEBDRIVER available. Switching to brightdata method...")
                 try:
-                    html = scrape_website_brightdata(website, timeout=brightdata_timeout)
-                    print("Scraping completed with brightdata method.")
+                    html = scrape_website_brightdata(
+                        website, timeout=brightdata_timeout, use_cache=use_cache
+                    )
+                    logger.info("Scraping completed with brightdata method.")
+                    metrics.incr("captcha_fallback_total", result="ok")
                 except Exception as e_bright:
-                    print(f"Error during brightdata scraping: {e_bright}")
-                    print("Using nobright method's content despite captcha detection.")
+                    logger.warning(f"Error during brightdata scraping: {e_bright}")
+                    logger.warning("Using nobright method's content despite captcha detection.")
+                    metrics.incr("captcha_fallback_total", result="error")
             else:
-                print("SBR_WEBDRIVER not available. Using nobright method's content despite captcha detection.")
+                logger.warning("SBR_WEBDRIVER not available. Using nobright method's content despite captcha detection.")
+                metrics.incr("captcha_fallback_total", result="unavailable")
         else:
-            print("No captcha detected. Using nobright method's content.")
+            logger.info("No captcha detected. Using nobright method's content.")
         return html
     except Exception as e:
-        print(f"Error during nobright scraping: {e}")
+        logger.warning(f"Error during nobright scraping: {e}")
         if SBR_WEBDRIVER:
-            print("Attempting to scrape using brightdata method...")
+            logger.info("Attempting to scrape using brightdata method...")
             try:
-                html = scrape_website_brightdata(website, timeout=brightdata_timeout)
-                print("Scraping completed with brightdata method.")
+                html = scrape_website_brightdata(
+                    website, timeout=brightdata_timeout, use_cache=use_cache
+                )
+                logger.info("Scraping completed with brightdata method.")
+                metrics.incr("error_fallback_total", result="ok")
                 return html
             except Exception as e_bright:
-                print(f"Error during brightdata scraping: {e_bright}")
+                logger.error(f"Error during brightdata scraping: {e_bright}")
+                metrics.incr("error_fallback_total", result="error")
                 raise e_bright  # Re-raise exception after logging
         else:
-            print("SBR_WEBDRIVER not available. Cannot use brightdata method.")
+            logger.error("SBR_WEBDRIVER not available. Cannot use brightdata method.")
             raise e  # Re-raise the original exception
 
 
 
+def _ascii_ci(literal):
+    """
+    Chuyển literal thành regex không phân biệt hoa/thường chỉ với chữ ASCII,
+    khớp đúng hành vi của html_content.lower() trong bản detect cũ.
+    """
+    return "".join(
+        f"[{ch.lower()}{ch.upper()}]" if ch.isascii() and ch.isalpha() else re.escape(ch)
+        for ch in literal
+    )
+
+
+# Một regex duy nhất gom toàn bộ tín hiệu captcha. Thứ tự alternatives quan trọng:
+# tại cùng vị trí, tín hiệu cụ thể (script, id, widget) được ưu tiên hơn từ khóa chung.
+_CAPTCHA_SIGNALS = [
+    # (tên tín hiệu, pattern, strong)
+    ("script", _ascii_ci("www.google.com/recaptcha/") + "|" + _ascii_ci("www.gstatic.com/recaptcha/")
+     + "|" + _ascii_ci("api.hcaptcha.com") + "|" + _ascii_ci("hcaptcha.com"), True),
+    ("element_id", _ascii_ci("id") + r"\s*=\s*[\"']?(?:" + _ascii_ci("captcha") + "|" + _ascii_ci("recaptcha")
+     + "|" + _ascii_ci("h-captcha") + r")(?=[\"'\s/>])", True),
+    ("sitekey", r"(?i:data-sitekey\s*=)", True),
+    ("init_recaptcha", r"(?i:onload=initRecaptcha)", True),
+    ("widget", _ascii_ci("g-recaptcha") + "|" + _ascii_ci("h-captcha"), True),
+    ("human_verification", _ascii_ci("human verification"), True),
+    ("keyword", _ascii_ci("recaptcha") + "|" + _ascii_ci("captcha"), False),
+]
+# Lookahead trên ký tự đầu của các tín hiệu giúp regex engine bỏ qua nhanh
+# những vị trí không thể khớp (nhanh hơn ~4 lần so với alternation trần)
+_CAPTCHA_RE = re.compile(
+    "(?=[wWaAhHiIdDoOgGrRcC])(?:"
+    + "|".join(f"(?P<{name}>{pattern})" for name, pattern, _ in _CAPTCHA_SIGNALS)
+    + ")"
+)
+_STRONG_CAPTCHA_SIGNALS = {name for name, _, strong in _CAPTCHA_SIGNALS if strong}
+
+
 def detect_captcha(html_content):
     """
     Detects the presence of a captcha in the provided HTML content.
 
+    Scans the raw HTML once with a single compiled regex instead of building
+    a BeautifulSoup tree.
+
     Args:
         html_content (str): The HTML content of the webpage.
 
     Returns:
         bool: True if a captcha is detected, False otherwise.
     """
-    soup = BeautifulSoup(html_content, "html.parser")
-    lower_html = html_content.lower()
-
-    # 1. Look for common captcha keywords
-    captcha_keywords = ["captcha", "g-recaptcha", "h-captcha", "recaptcha", "human verification"]
-    for keyword in captcha_keywords:
-        if keyword in lower_html:
-            return True
-
-    # 2. Look for known captcha service scripts
-    captcha_scripts = [
-        "www.google.com/recaptcha/",
-        "www.gstatic.com/recaptcha/",
-        "hcaptcha.com",
-        "api.hcaptcha.com",
-    ]
-    for script_url in captcha_scripts:
-        if script_url in lower_html:
-            return True
-
-    # 3. Check for specific HTML elements commonly used in captchas
-    captcha_div_ids = ["captcha", "recaptcha", "h-captcha"]
-    for div_id in captcha_div_ids:
-        if soup.find(id=div_id):
-            return True
-
-    # 4. Use regex to detect captcha-related patterns (optional)
-    captcha_patterns = [
-        r"data-sitekey\s*=",
-        r"api\.hcaptcha\.com",
-        r"onload=initRecaptcha",
-    ]
-    for pattern in captcha_patterns:
-        if re.search(pattern, html_content, re.IGNORECASE):
-            return True
+    return _CAPTCHA_RE.search(html_content) is not None
 
-    return False
+
+def detect_captcha_signals(html_content, stop_on_strong=True):
+    """
+    Liệt kê các tín hiệu captcha tìm thấy trong HTML.
+
+    Args:
+        html_content (str): The HTML content of the webpage.
+        stop_on_strong (bool): Dừng quét ngay khi gặp tín hiệu mạnh (script,
+            id, sitekey, widget...). Từ khóa "captcha" đơn thuần là tín hiệu yếu.
+
+    Returns:
+        list: Danh sách dict {'signal', 'match', 'position', 'strong'} theo thứ tự xuất hiện
+    """
+    signals = []
+    for match in _CAPTCHA_RE.finditer(html_content):
+        name = match.lastgroup
+        strong = name in _STRONG_CAPTCHA_SIGNALS
+        signals.append({
+            'signal': name,
+            'match': match.group(),
+            'position': match.start(),
+            'strong': strong,
+        })
+        if strong and stop_on_strong:
+            break
+    return signals
 
 
 
@@ -205,7 +250,11 @@ def extract_body_content(html_content):
 
 def clean_body_content(body_content):
     soup = BeautifulSoup(body_content, "html.parser")
+    return _clean_soup(soup)
+
 
+def _clean_soup(soup):
+    """Lấy text đã làm sạch từ cây DOM (thay đổi trực tiếp cây DOM)."""
     for script_or_style in soup(["script", "style"]):
         script_or_style.extract()
 
@@ -230,7 +279,11 @@ def clean_body_content_with_links_and_images(body_content, base_url=None):
         str: Cleaned content với thông tin links và images được giữ lại
     """
     soup = BeautifulSoup(body_content, "html.parser")
+    return _clean_soup_with_links_and_images(soup, base_url)
 
+
+def _clean_soup_with_links_and_images(soup, base_url=None):
+    """Giống clean_body_content_with_links_and_images nhưng trên cây DOM đã parse sẵn."""
     def make_absolute_url(url, base_url):
         """Chuyển đổi relative URL thành absolute URL"""
         if not url or not base_url:
@@ -316,63 +369,190 @@ def clean_body_content_with_links_and_images(body_content, base_url=None):
     return cleaned_content
 
 
-def split_dom_content(dom_content, max_length=8000, max_batches=50):
+class DomPipeline:
     """
-    Phân chia DOM content thành các chunks nhỏ hơn để AI có thể xử lý tốt hơn
-    
+    Parse HTML một lần duy nhất rồi chạy detect captcha, extract body và
+    làm sạch nội dung trên cùng một cây DOM.
+
+    Dùng lxml (nhanh hơn nhiều so với html.parser thuần Python), tự động
+    chuyển về html.parser nếu lxml chưa được cài đặt hoặc cây lxml không có
+    <body> (khi đó kết quả giống hệt các hàm cũ dùng html.parser).
+
+    Với trang bình thường kết quả giống html.parser, nhưng lxml sửa HTML lỗi
+    theo cách của trình duyệt nên một số trường hợp khác nhau:
+        - HTML không có thẻ body (fragment): lxml tự tạo <body>, nên nội dung
+          vẫn được lấy ra thay vì trả về chuỗi rỗng.
+        - <a> lồng trong <a>: lxml đóng link ngoài trước link trong, nên text
+          của link trong không còn nằm trong link ngoài.
+        - <textarea>: nội dung bên trong là text thô, thẻ HTML trong đó không
+          được parse thành phần tử.
+        - <body> đặt sai chỗ (ví dụ trong <div>): lxml giữ lại phần tử bao ngoài.
+
+    Example:
+        pipeline = DomPipeline(html)
+        if pipeline.has_captcha():
+            ...
+        cleaned_content = pipeline.clean_text(include_links_images=True, base_url=url)
+    """
+
+    def __init__(self, html_content, parser="lxml"):
+        self.html = html_content or ""
+        with metrics.span("parse_html") as span:
+            try:
+                self.soup = BeautifulSoup(self.html, parser)
+                self.parser = parser
+            except FeatureNotFound:
+                self.soup = None
+            if self.soup is None or (self.soup.body is None and parser != "html.parser"):
+                self.soup = BeautifulSoup(self.html, "html.parser")
+                self.parser = "html.parser"
+            span.set(html_bytes=len(self.html), parser=self.parser)
+        self._cleaned = {}
+
+    def has_captcha(self):
+        """Tương đương detect_captcha() (quét HTML gốc, không cần cây DOM)."""
+        return detect_captcha(self.html)
+
+    def body(self):
+        """Thẻ body của trang (None nếu không có)."""
+        return self.soup.body
+
+    def body_html(self):
+        """Tương đương extract_body_content()."""
+        body = self.body()
+        return str(body) if body else ""
+
+    def clean_text(self, include_links_images=False, base_url=None):
+        """
+        Tương đương clean_body_content() / clean_body_content_with_links_and_images()
+        chạy trên body đã extract.
+
+        Việc làm sạch thay đổi trực tiếp cây DOM nên kết quả được giữ lại;
+        gọi lại với tham số khác sẽ parse lại HTML.
+
+        Args:
+            include_links_images (bool): Giữ lại thông tin links, images và media
+            base_url (str): Base URL để convert relative URLs thành absolute URLs
+
+        Returns:
+            str: Nội dung đã làm sạch
+        """
+        key = (include_links_images, base_url if include_links_images else None)
+        if key in self._cleaned:
+            return self._cleaned[key]
+
+        if self._cleaned:
+            # Cây DOM đã bị thay đổi bởi lần làm sạch trước
+            self.soup = BeautifulSoup(self.html, self.parser)
+
+        with metrics.span("clean", links=include_links_images) as span:
+            body = self.body()
+            if body is None:
+                cleaned_content = ""
+            elif include_links_images:
+                cleaned_content = _clean_soup_with_links_and_images(body, base_url)
+            else:
+                cleaned_content = _clean_soup(body)
+            span.set(html_bytes=len(self.html), text_chars=len(cleaned_content))
+
+        self._cleaned[key] = cleaned_content
+        return cleaned_content
+
+
+def split_dom_content(dom_content, max_length=8000, max_batches=50, overlap_tokens=0,
+                      num_ctx=None, with_token_counts=False):
+    """
+    Phân chia DOM content thành các chunks theo số token để AI có thể xử lý tốt hơn.
+
+    Chunk chỉ được cắt tại ranh giới dòng/đoạn/record nên một record không bị
+    tách ra hai chunks. Kích thước chunk không vượt quá context window của model.
+
     Args:
         dom_content (str): Nội dung DOM cần phân chia
-        max_length (int): Độ dài tối đa mỗi chunk (giảm xuống để AI xử lý tốt hơn)
-        max_batches (int): Số lượng batch tối đa (tăng lên để xử lý nhiều dữ liệu hơn)
-    
+        max_length (int): Độ dài tối đa mỗi chunk tính theo ký tự (quy đổi ra token)
+        max_batches (int): Số lượng batch mong muốn; nếu vượt quá, chunk sẽ được
+            nới tới giới hạn context window thay vì báo lỗi
+        overlap_tokens (int): Số token lặp lại giữa hai chunks liên tiếp
+        num_ctx (int): Context window của model (mặc định OLLAMA_NUM_CTX)
+        with_token_counts (bool): Trả về thêm danh sách số token của từng chunk
+
     Returns:
-        list: Danh sách các chunks
+        list: Danh sách các chunks (hoặc tuple (chunks, token_counts) nếu with_token_counts=True)
     """
-    chunks = [
-        dom_content[i : i + max_length] for i in range(0, len(dom_content), max_length)
-    ]
+    context_budget = context_chunk_budget(num_ctx)
+    max_tokens = min(max(1, max_length // CHARS_PER_TOKEN), context_budget)
+    with metrics.span("split") as span:
+        chunks = chunk_text(dom_content, max_tokens, overlap_tokens)
+
+        if len(chunks) > max_batches and max_tokens < context_budget:
+            # Dùng chunk lớn nhất mà context window cho phép để giảm số lần gọi LLM
+            max_tokens = context_budget
+            chunks = chunk_text(dom_content, max_tokens, overlap_tokens)
+        span.set(text_chars=len(dom_content), chunks=len(chunks), max_tokens=max_tokens)
     if len(chunks) > max_batches:
-        raise ValueError(
-            f"Content exceeds the maximum allowed size of {max_length * max_batches} characters "
-            f"({max_batches} batches of {max_length} characters each). Please provide a shorter URL or "
-            f"adjust the content length."
+        logger.warning(
+            f"⚠️ Nội dung cần {len(chunks)} chunks, nhiều hơn {max_batches} chunks mong muốn "
+            f"(giới hạn context {context_budget} tokens/chunk)"
         )
-    
-    print(f"Chia DOM content thành {len(chunks)} chunks, mỗi chunk tối đa {max_length} ký tự")
-    return chunks
+
+    token_counts = [chunk['tokens'] for chunk in chunks]
+    logger.info(
+        f"Chia DOM content thành {len(chunks)} chunks, mỗi chunk tối đa {max_tokens} tokens "
+        f"(tổng {sum(token_counts)} tokens)"
+    )
+    texts = [chunk['text'] for chunk in chunks]
+    if with_token_counts:
+        return texts, token_counts
+    return texts
 
 
-def scrape_website_nobright_only(website, timeout=5):
+def scrape_website_nobright_only(website, timeout=5, use_cache=True):
     """
     Scrapes a website using only the nobright method (without BrightData).
     This is a simplified version that doesn't require SBR_WEBDRIVER.
 
     Args:
         website (str): The URL of the website to scrape.
-        timeout (int): Wait time after loading the page.
+        timeout (int): Maximum time to wait for the page to settle after loading.
+        use_cache (bool): Reuse a cached snapshot of the page if it is still fresh.
 
     Returns:
         str: The HTML content of the scraped webpage.
     """
-    print("Scraping using nobright method only...")
-    return scrape_website_nobright(website, timeout)
+    logger.info("Scraping using nobright method only...")
+    return scrape_website_nobright(website, timeout, use_cache=use_cache)
 
 
-def analyze_content_for_missing_data(dom_content):
+def analyze_content_for_missing_data(dom_content, html_content=None, base_url=None):
     """
     Phân tích DOM content để tìm dấu hiệu có thể có nhiều dữ liệu hơn
     
     Args:
         dom_content (str): Nội dung DOM đã được clean
+        html_content (str): HTML gốc (tùy chọn) để tìm link phân trang thực tế
+        base_url (str): URL của trang, dùng cùng html_content
         
     Returns:
-        dict: Thông tin phân tích và gợi ý
+        dict: Thông tin phân tích và gợi ý; 'pagination' là kết quả find_pagination()
+            nếu có html_content và tìm thấy link phân trang, ngược lại None
     """
     analysis = {
         'total_length': len(dom_content),
         'potential_issues': [],
-        'suggestions': []
+        'suggestions': [],
+        'pagination': None
     }
+
+    if html_content and base_url:
+        pagination = find_pagination(html_content, base_url)
+        if pagination['template'] or pagination['next_url']:
+            analysis['pagination'] = pagination
+            analysis['potential_issues'].append(
+                f"Phát hiện link phân trang: {pagination['next_url'] or pagination['numbered_urls'][0]}"
+            )
+            analysis['suggestions'].append(
+                "Bật 'Tự động theo phân trang' để scrape và phân tích tất cả các trang trong một lần"
+            )
     
     # Kiểm tra các dấu hiệu pagination
     pagination_keywords = [
@@ -381,7 +561,7 @@ def analyze_content_for_missing_data(dom_content):
         'infinite scroll', 'lazy load'
     ]
     
-    for keyword in pagination_keywords:
+    for keyword in pagination_keywords if analysis['pagination'] is None else ():
         if keyword.lower() in dom_content.lower():
             analysis['potential_issues'].append(f"Phát hiện từ khóa phân trang: '{keyword}'")
             analysis['suggestions'].append("Website có thể sử dụng phân trang - cần crawl nhiều trang")
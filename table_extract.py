@@ -0,0 +1,248 @@
+"""
+Trích xuất records trực tiếp từ bảng HTML và các khối "Nhãn: giá trị" lặp lại, không cần LLM.
+
+Các field người dùng mô tả ("Họ và tên, Năm sinh, Quê quán") được đổi thành tên
+cột bằng bộ chuẩn hóa tên field dùng chung. Sau đó:
+    1. Mỗi <table> có tiêu đề khớp đủ mọi field được đọc từng dòng thành
+       record, rồi các dòng đã đọc bị bỏ khỏi DOM (các dòng phía trên dòng tiêu
+       đề, ví dụ tên bảng, được giữ lại). Bảng chỉ khớp một phần được giữ
+       nguyên để LLM đọc, vì các field còn lại không lấy được từ tiêu đề.
+    2. Trên text đã làm sạch của phần còn lại, các khối dòng "Nhãn: giá trị"
+       (hoặc "Nhãn:" rồi giá trị ở dòng sau, như <b>Năm sinh:</b> 1970) lặp lại
+       ít nhất MIN_REPEATED_RECORDS lần được đọc thành records, các dòng đã dùng bị bỏ.
+Phần text còn lại (residual) mới được chia chunk và gửi tới Ollama.
+"""
+
+import logging
+import math
+import re
+from urllib.parse import urljoin
+
+from field_names import fields_from_description, get_field_normalizer
+from pagination import merge_page_texts
+from scrape_utils import DomPipeline
+
+logger = logging.getLogger(__name__)
+
+# Các cột mà giá trị nên là URL của link/ảnh trong ô thay vì text hiển thị
+LINK_COLUMNS = {'Links', 'URL', 'URLs', 'LienKet', 'DuongDan'}
+IMAGE_COLUMNS = {'HinhAnh', 'URLsHinhAnh', 'DiaChiAnh'}
+# Số record tối thiểu để coi một khối "Nhãn: giá trị" là cấu trúc lặp lại
+MIN_REPEATED_RECORDS = 3
+# Dòng tiêu đề được tìm trong số dòng đầu này (phía trên có thể là tên bảng, ghi chú)
+MAX_HEADER_ROWS = 3
+
+_LABEL_LINE_RE = re.compile(r"^\s*([^:\n]{1,40}?)\s*:\s*(.*)$")
+
+
+def _required_matches(columns):
+    """Số field tối thiểu một khối "Nhãn: giá trị" phải có (ít nhất một nửa số field)."""
+    return max(1, math.ceil(len(columns) / 2))
+
+
+def _direct_rows(table):
+    """Các dòng <tr> của bảng, không tính dòng của bảng lồng bên trong."""
+    return [row for row in table.find_all("tr") if row.find_parent("table") is table]
+
+
+def _row_cells(row):
+    cells = []
+    for cell in row.find_all(["td", "th"], recursive=False):
+        try:
+            span = max(1, min(int(cell.get("colspan", 1)), 50))
+        except (TypeError, ValueError):
+            span = 1
+        cells.extend([cell] * span)
+    return cells
+
+
+def _header_mapping(row, wanted, normalizer):
+    """Vị trí ô -> tên cột cho các ô tiêu đề khớp field cần lấy."""
+    mapping = {}
+    for position, cell in enumerate(_row_cells(row)):
+        text = cell.get_text(" ", strip=True)
+        column = normalizer.column_name(text) if text else None
+        if column in wanted and column not in mapping.values():
+            mapping[position] = column
+    return mapping
+
+
+def _absolute(url, base_url):
+    return urljoin(base_url, url) if base_url else url
+
+
+def _cell_value(cell, column, base_url):
+    if column in LINK_COLUMNS:
+        link = cell.find("a", href=True)
+        if link:
+            return _absolute(link["href"], base_url)
+    if column in IMAGE_COLUMNS:
+        image = cell.find("img", src=True)
+        if image:
+            return _absolute(image["src"], base_url)
+    return cell.get_text(" ", strip=True)
+
+
+def _extract_tables(soup, columns, base_url):
+    """Đọc các bảng có đủ mọi field và bỏ các dòng đã đọc khỏi cây DOM."""
+    normalizer = get_field_normalizer()
+    wanted = set(columns)
+    records = []
+    tables = 0
+
+    for table in soup.find_all("table"):
+        if table.find_parent("table") is not None or table.parent is None:
+            continue
+        rows = _direct_rows(table)
+        if len(rows) < 2:
+            continue
+        # Dòng tiêu đề: dòng đầu tiên (trong MAX_HEADER_ROWS dòng) có đủ mọi field
+        header_index = mapping = None
+        for index, row in enumerate(rows[:MAX_HEADER_ROWS]):
+            candidate = _header_mapping(row, wanted, normalizer)
+            if len(candidate) == len(wanted):
+                header_index, mapping = index, candidate
+                break
+        if mapping is None:
+            # Thiếu cột: giữ nguyên bảng để LLM tìm các field còn lại
+            continue
+
+        table_records = []
+        for row in rows[header_index + 1:]:
+            cells = _row_cells(row)
+            record = {}
+            for position, column in mapping.items():
+                if position < len(cells):
+                    value = _cell_value(cells[position], column, base_url)
+                    if value:
+                        record[column] = value
+            if record:
+                table_records.append(record)
+
+        if table_records:
+            records.extend(table_records)
+            tables += 1
+            if header_index == 0:
+                table.decompose()
+            else:
+                # Giữ các dòng phía trên tiêu đề (tên bảng, ghi chú) trong text gửi tới LLM
+                for row in rows[header_index:]:
+                    row.decompose()
+    return records, tables
+
+
+def _extract_label_blocks(text, columns):
+    """
+    Đọc các khối "Nhãn: giá trị" lặp lại trong text đã làm sạch.
+
+    Returns:
+        tuple: (records, text còn lại sau khi bỏ các dòng đã dùng)
+    """
+    normalizer = get_field_normalizer()
+    wanted = set(columns)
+    lines = text.split("\n")
+    records = []   # (record, các chỉ số dòng đã dùng)
+    current, used = {}, []
+
+    i = 0
+    while i < len(lines):
+        match = _LABEL_LINE_RE.match(lines[i])
+        column = normalizer.column_name(match.group(1)) if match else None
+        if column in wanted:
+            value, consumed = match.group(2).strip(), [i]
+            # "<b>Năm sinh:</b> 1970" được làm sạch thành hai dòng
+            if not value and i + 1 < len(lines) and not _LABEL_LINE_RE.match(lines[i + 1]):
+                value, consumed = lines[i + 1].strip(), [i, i + 1]
+            if column in current:
+                records.append((current, used))
+                current, used = {}, []
+            if value:
+                current[column] = value
+                used.extend(consumed)
+            i = consumed[-1] + 1
+            continue
+        i += 1
+    if current:
+        records.append((current, used))
+
+    accepted = [(record, used) for record, used in records if len(record) >= _required_matches(columns)]
+    if len(accepted) < MIN_REPEATED_RECORDS:
+        return [], text
+    used_lines = {index for _, used in accepted for index in used}
+    residual = "\n".join(line for index, line in enumerate(lines) if index not in used_lines)
+    return [record for record, _ in accepted], residual
+
+
+def extract_structured(html, parse_description, base_url=None, include_links_images=False):
+    """
+    Trích xuất records từ bảng và khối "Nhãn: giá trị" của một trang.
+
+    Args:
+        html (str): HTML gốc của trang
+        parse_description (str): Mô tả dạng danh sách field, ví dụ "Họ và tên, Năm sinh"
+        base_url (str): URL của trang (để chuyển link tương đối thành tuyệt đối)
+        include_links_images (bool): Giữ lại links/ảnh trong text còn lại (giống bước scrape)
+
+    Returns:
+        dict: records, residual_text (text còn lại cần gửi tới LLM), tables (số bảng
+            đã dùng), label_records (số records lấy từ khối nhãn) và columns
+    """
+    pipeline = DomPipeline(html)
+    columns = fields_from_description(parse_description)
+    if not columns:
+        # Mô tả là câu tự do: không biết cần cột nào, để LLM xử lý toàn bộ
+        return {
+            'records': [],
+            'residual_text': pipeline.clean_text(include_links_images, base_url),
+            'tables': 0,
+            'label_records': 0,
+            'columns': [],
+        }
+
+    table_records, tables = _extract_tables(pipeline.soup, columns, base_url)
+    residual = pipeline.clean_text(include_links_images, base_url)
+    label_records, residual = _extract_label_blocks(residual, columns)
+
+    return {
+        'records': table_records + label_records,
+        'residual_text': residual,
+        'tables': tables,
+        'label_records': len(label_records),
+        'columns': columns,
+    }
+
+
+def extract_structured_pages(pages, parse_description, include_links_images=False):
+    """
+    Chạy extract_structured trên nhiều trang (ví dụ kết quả theo phân trang).
+
+    Args:
+        pages (list): Danh sách dict {'url', 'html'}
+
+    Returns:
+        dict: records, residual_text (ghép các trang, bỏ header/footer lặp lại),
+            tables, label_records và columns
+    """
+    records = []
+    residual_pages = []
+    tables = label_records = 0
+    columns = []
+    for page in pages:
+        extraction = extract_structured(
+            page['html'], parse_description, base_url=page['url'],
+            include_links_images=include_links_images
+        )
+        records.extend(extraction['records'])
+        residual_pages.append({'url': page['url'], 'text': extraction['residual_text']})
+        tables += extraction['tables']
+        label_records += extraction['label_records']
+        columns = extraction['columns']
+    logger.info(f"Trích xuất trực tiếp {len(records)} records ({tables} bảng, {label_records} records "
+                f"từ khối nhãn) từ {len(pages)} trang")
+    return {
+        'records': records,
+        'residual_text': merge_page_texts(residual_pages),
+        'tables': tables,
+        'label_records': label_records,
+        'columns': columns,
+    }
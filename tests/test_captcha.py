@@ -0,0 +1,30 @@
+import pytest
+
+from benchmarks.bench_captcha import build_corpus, detect_captcha_legacy
+from benchmarks.fixtures import build_page
+from scrape_utils import detect_captcha, detect_captcha_signals
+
+CORPUS = build_corpus(large_rows=2000)
+CORPUS.update({
+    'delegate_list': build_page(50),
+    'recapture': "<html><body><p>Recapture the moment, capt. Nguyễn chụp ảnh</p></body></html>",
+    'human_text': "<html><body><p>Human resources verification form</p></body></html>",
+    'empty': "",
+    'id_prefix': '<html><body><div id="captchas-info"><p>Hướng dẫn</p></div></body></html>',
+})
+# Trang không có captcha (kể cả trang có chữ gần giống tín hiệu)
+NEGATIVE = {'clean', 'clean_large', 'sitekey_no_equals', 'capture', 'human_verification_spaces', 'dotted_i',
+            'delegate_list', 'recapture', 'human_text', 'empty'}
+
+
+@pytest.mark.parametrize("name", sorted(CORPUS))
+def test_regex_matches_legacy_verdict(name):
+    html = CORPUS[name]
+    legacy = detect_captcha_legacy(html)
+    assert legacy == (name not in NEGATIVE)
+    assert detect_captcha(html) == legacy
+
+
+@pytest.mark.parametrize("name", sorted(NEGATIVE))
+def test_negative_pages_have_no_signals(name):
+    assert detect_captcha_signals(CORPUS[name]) == []
@@ -0,0 +1,31 @@
+import pytest
+
+from chunking import _split_long_line, chunk_text, estimate_tokens
+
+
+@pytest.mark.parametrize("max_tokens", [2, 5, 16, 64])
+def test_long_line_pieces_fit_budget_with_newline(max_tokens):
+    line = " ".join(f"word{i} họ và tên." for i in range(200))
+    pieces = _split_long_line(line, max_tokens)
+    assert all(estimate_tokens(piece) + 1 <= max_tokens for piece in pieces)
+    assert "".join(pieces).replace(" ", "") == line.replace(" ", "")
+
+
+def test_word_longer_than_budget_is_split_by_characters():
+    word = "x" * 500
+    pieces = _split_long_line(f"a {word} b", 10)
+    assert all(estimate_tokens(piece) + 1 <= 10 for piece in pieces)
+    assert "".join(pieces).replace(" ", "") == f"a{word}b"
+
+
+@pytest.mark.parametrize("max_tokens", [8, 32, 100])
+def test_chunks_never_exceed_budget(max_tokens):
+    text = "\n".join([
+        "Họ và tên: Nguyễn Văn A",
+        "Mô tả: " + "rất dài. " * 300,
+        "https://example.com/" + "a" * 2000,
+        "Họ và tên: Trần Thị B",
+    ])
+    chunks = chunk_text(text, max_tokens, overlap_tokens=4)
+    assert chunks
+    assert all(chunk['tokens'] <= max_tokens for chunk in chunks)
@@ -0,0 +1,97 @@
+import io
+
+import pytest
+
+from export import (
+    EXTRA_COLUMN, CsvExporter, RecordExporter, export_records, get_exporter, iter_records,
+)
+
+RECORDS = [
+    {'HoVaTen': 'Nguyễn Văn An', 'SoDienThoai': '0901234567', 'Tags': ['a', 'b']},
+    {'HoVaTen': 'Trần Thị Bình', 'Email': 'binh@example.com'},
+    'giá trị lẻ',
+]
+
+
+def _expected(records):
+    """Giá trị đọc lại: CSV/Parquet lưu chuỗi, list/dict thành JSON, ô trống bị bỏ."""
+    import json
+
+    expected = []
+    for record in records:
+        record = record if isinstance(record, dict) else {'value': record}
+        expected.append({
+            k: v if isinstance(v, str) else json.dumps(v, ensure_ascii=False) for k, v in record.items()
+        })
+    return expected
+
+
+def test_record_exporter_is_abstract():
+    with pytest.raises(TypeError):
+        RecordExporter("out.jsonl")
+
+    class Incomplete(RecordExporter):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete("out.jsonl")
+
+
+def test_jsonl_round_trip_and_append(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    with get_exporter(path) as exporter:
+        assert exporter.write(RECORDS[:2]) == 2
+    with get_exporter(path, append=True) as exporter:
+        exporter.write(RECORDS[2:])
+    assert list(iter_records(path)) == [RECORDS[0], RECORDS[1], {'value': 'giá trị lẻ'}]
+
+
+def test_jsonl_overwrite_without_append(tmp_path):
+    path = str(tmp_path / "out.jsonl")
+    for _ in range(2):
+        with get_exporter(path) as exporter:
+            exporter.write(RECORDS[:1])
+    assert list(iter_records(path)) == RECORDS[:1]
+
+
+def test_csv_round_trip_and_append(tmp_path):
+    path = str(tmp_path / "out.csv")
+    with get_exporter(path, description="Họ và tên, Số điện thoại") as exporter:
+        exporter.write(RECORDS[:1])
+        # Field mới sau khi schema đã cố định đi vào cột _extra
+        exporter.write(RECORDS[1:2])
+    with get_exporter(path, append=True, columns=['Khac']) as exporter:
+        assert exporter.columns == ['HoVaTen', 'SoDienThoai', 'Tags']
+        exporter.write(RECORDS[2:])
+
+    with open(path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    assert lines[0] == f"HoVaTen,SoDienThoai,Tags,{EXTRA_COLUMN}"
+    assert len(lines) == 4
+    assert list(iter_records(path)) == _expected(RECORDS)
+
+
+def test_csv_to_caller_file_object():
+    buffer = io.BytesIO()
+    with CsvExporter(buffer) as exporter:
+        exporter.write(RECORDS[:1])
+    assert not buffer.closed
+    assert buffer.getvalue().decode("utf-8").startswith("HoVaTen,SoDienThoai,Tags,")
+
+
+def test_parquet_round_trip_and_append(tmp_path):
+    pytest.importorskip("pyarrow")
+    path = str(tmp_path / "out.parquet")
+    exporter = get_exporter(path)
+    exporter.row_group_size = 1
+    exporter.write(RECORDS[:2])
+    exporter.close()
+    with get_exporter(path, append=True) as exporter:
+        assert exporter.path == str(tmp_path / "out.1.parquet")
+        exporter.write(RECORDS[2:])
+    assert list(iter_records(path)) == _expected(RECORDS)
+
+
+def test_export_records_bytes():
+    data = export_records(RECORDS[:2], 'jsonl')
+    assert data.decode("utf-8").count("\n") == 2
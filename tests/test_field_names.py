@@ -0,0 +1,33 @@
+import pytest
+
+from field_names import FieldNameNormalizer, fields_from_description
+
+
+@pytest.fixture
+def normalizer():
+    return FieldNameNormalizer()
+
+
+@pytest.mark.parametrize("key", ["Trình độ tiếng Anh", "Điểm tiếng Anh", "Ngoại ngữ (Anh)", "Anh"])
+def test_single_syllable_pattern_does_not_match_folded_word(normalizer, key):
+    # 'ảnh' -> HinhAnh không được khớp với 'Anh' sau khi bỏ dấu
+    assert normalizer.normalize_key(key) == key
+
+
+@pytest.mark.parametrize("key, expected", [
+    ("Ảnh đại diện", "HinhAnh"),
+    ("Hình ảnh", "HinhAnh"),
+    ("hinh anh", "HinhAnh"),
+    ("Họ và tên", "HoVaTen"),
+    ("ho_va_ten", "HoVaTen"),
+    ("HoVaTen", "HoVaTen"),
+    ("Tên", "HoVaTen"),
+    ("que quan", "QueQuan"),
+    ("URLs hình ảnh", "URLsHinhAnh"),
+])
+def test_accented_then_multi_syllable_folded_matching(normalizer, key, expected):
+    assert normalizer.normalize_key(key) == expected
+
+
+def test_fields_from_description_keeps_unrelated_anh_field():
+    assert fields_from_description("Họ và tên, Trình độ tiếng Anh") == ["HoVaTen", "TrinhDoTiengAnh"]
@@ -0,0 +1,59 @@
+from json_salvage import salvage_json
+
+
+def test_complete_array_is_returned_as_is():
+    result = salvage_json('[{"HoVaTen": "An"}, {"HoVaTen": "Bình"}]')
+    assert result['records'] == [{'HoVaTen': 'An'}, {'HoVaTen': 'Bình'}]
+    assert result['complete'] is True
+    assert result['discarded_bytes'] == 0
+
+
+def test_truncated_array_keeps_complete_records():
+    result = salvage_json('[{"HoVaTen": "An", "NamSinh": "1960"}, {"HoVaTen": "Bình"}, {"HoVaTen": "Ng')
+    assert result['records'] == [{'HoVaTen': 'An', 'NamSinh': '1960'}, {'HoVaTen': 'Bình'}]
+    assert result['complete'] is False
+    assert result['salvaged_records'] == 2
+    assert result['discarded_bytes'] > 0
+
+
+def test_truncated_records_wrapper_is_unwrapped():
+    result = salvage_json('{"records": [{"HoVaTen": "An"}, {"HoVaTen": "Bì')
+    assert result['records'] == [{'HoVaTen': 'An'}]
+    assert result['complete'] is False
+
+
+def test_fenced_output():
+    text = 'Kết quả:\n```json\n[\n  {"HoVaTen": "An"},\n  {"HoVaTen": "Bình"}\n]\n```\n'
+    result = salvage_json(text)
+    assert result['records'] == [{'HoVaTen': 'An'}, {'HoVaTen': 'Bình'}]
+    assert result['complete'] is True
+
+
+def test_leading_prose_preamble_and_trailing_note():
+    text = ('Dưới đây là danh sách [đã kiểm tra] các đại biểu:\n'
+            '[{"HoVaTen": "An"}]\nLưu ý: {dữ liệu} có thể chưa đầy đủ.')
+    result = salvage_json(text)
+    assert result['records'] == [{'HoVaTen': 'An'}]
+    assert result['discarded_bytes'] > 0
+
+
+def test_nested_objects_are_kept_whole():
+    text = ('[{"HoVaTen": "An", "LienHe": {"Email": "an@x.vn", "DienThoai": ["090", "091"]}}, '
+            '{"HoVaTen": "Bình", "LienHe": {"Email": "bi')
+    result = salvage_json(text)
+    assert result['records'] == [
+        {'HoVaTen': 'An', 'LienHe': {'Email': 'an@x.vn', 'DienThoai': ['090', '091']}},
+    ]
+
+
+def test_single_key_object_other_than_records_is_a_record():
+    result = salvage_json('{"Links": ["https://a.vn", "https://b.vn"]}')
+    assert result['records'] == [{'Links': ['https://a.vn', 'https://b.vn']}]
+
+
+def test_no_json_at_all():
+    for text in ("Không tìm thấy thông tin phù hợp.", "", None):
+        result = salvage_json(text)
+        assert result['records'] == []
+        assert result['complete'] is False
+        assert result['salvaged_records'] == 0
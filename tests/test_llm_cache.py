@@ -0,0 +1,75 @@
+import pytest
+
+import llm_cache
+import parse
+from llm_cache import LLMResponseCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMResponseCache(str(tmp_path / "llm.sqlite3"))
+
+
+def _last_access(cache, key):
+    return cache._conn.execute("SELECT last_access FROM responses WHERE key = ?", (key,)).fetchone()[0]
+
+
+def test_hit_does_not_write(cache):
+    cache.put("a", "[]")
+    changes = cache._conn.total_changes
+    assert cache.get("a") == "[]"
+    assert cache.get("missing") is None
+    assert cache._conn.total_changes == changes
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_stale_access_time_is_batched_until_flush(cache, monkeypatch):
+    cache.put("a", "[]")
+    cache._conn.execute("UPDATE responses SET last_access = 0")
+    cache._conn.commit()
+    cache.get("a")
+    assert _last_access(cache, "a") == 0
+    cache.flush()
+    assert _last_access(cache, "a") > 0
+
+
+def test_access_times_flushed_in_batches(cache, monkeypatch):
+    monkeypatch.setattr(llm_cache, "ACCESS_FLUSH_BATCH", 2)
+    for key in ("a", "b"):
+        cache.put(key, "[]")
+    cache._conn.execute("UPDATE responses SET last_access = 0")
+    cache._conn.commit()
+    cache.get("a")
+    assert _last_access(cache, "a") == 0
+    cache.get("b")
+    assert _last_access(cache, "a") > 0 and _last_access(cache, "b") > 0
+
+
+def test_eviction_uses_pending_access_times(tmp_path):
+    cache = LLMResponseCache(str(tmp_path / "llm.sqlite3"), max_bytes=25)
+    cache.put("old", "x" * 10)
+    cache.put("new", "y" * 10)
+    cache._conn.execute("UPDATE responses SET last_access = CASE key WHEN 'old' THEN 1 ELSE 2 END")
+    cache._conn.commit()
+    # "old" vừa được đọc lại nên "new" mới là entry lâu không dùng nhất
+    assert cache.get("old") == "x" * 10
+    cache.put("third", "z" * 10)
+    assert cache.get("old") is not None
+    assert cache.get("new") is None
+
+
+class _Prompt:
+    pass
+
+
+@pytest.mark.parametrize("response, cached", [
+    ('[{"HoVaTen": "An"}]', True),
+    ('[]', True),
+    ('[{"HoVaTen": "An"}, {"HoVaTen": "Bì', False),
+    ('Không có dữ liệu', False),
+])
+def test_only_fully_parsed_responses_are_cached(cache, monkeypatch, response, cached):
+    monkeypatch.setattr(parse, "_call_model", lambda prompt, variables, output_format=None: (response, {}, 10))
+    result = parse._run_chunk(_Prompt(), 1, 1, "Họ và tên: An", "Họ và tên", cache, None)
+    assert result['cached'] is False
+    assert cache.stats()['entries'] == (1 if cached else 0)
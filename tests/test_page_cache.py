@@ -0,0 +1,158 @@
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from page_cache import PageCache, normalize_url
+
+
+class _Site:
+    """Trang trên server local: nội dung, validator và các request đã nhận."""
+
+    def __init__(self):
+        self.body = "<html><body>v1</body></html>"
+        self.etag = '"v1"'
+        self.last_modified = "Mon, 01 Jan 2024 00:00:00 GMT"
+        self.requests = []
+
+
+@pytest.fixture
+def site():
+    state = _Site()
+
+    class Handler(BaseHTTPRequestHandler):
+        def _respond(self, with_body):
+            state.requests.append((self.command, dict(self.headers)))
+            # Như HTTP: If-None-Match được ưu tiên hơn If-Modified-Since
+            if self.headers.get("If-None-Match"):
+                unchanged = self.headers["If-None-Match"] == state.etag
+            else:
+                unchanged = bool(state.last_modified) and self.headers.get("If-Modified-Since") == state.last_modified
+            if unchanged:
+                self.send_response(304)
+                self.end_headers()
+                return
+            data = state.body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            if state.etag:
+                self.send_header("ETag", state.etag)
+            if state.last_modified:
+                self.send_header("Last-Modified", state.last_modified)
+            self.end_headers()
+            if with_body:
+                self.wfile.write(data)
+
+        def do_GET(self):
+            self._respond(True)
+
+        def do_HEAD(self):
+            self._respond(False)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, kwargs={"poll_interval": 0.05}, daemon=True)
+    thread.start()
+    state.url = f"http://127.0.0.1:{server.server_address[1]}/page"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def _fetcher(site):
+    """fetch_fn như scrape_utils: trả về HTML kèm validator của response."""
+    calls = []
+
+    def fetch():
+        calls.append(time.time())
+        with urllib.request.urlopen(site.url, timeout=5) as response:
+            return (response.read().decode("utf-8"), response.headers.get("ETag"),
+                    response.headers.get("Last-Modified"))
+
+    return fetch, calls
+
+
+def _row(cache, url):
+    return cache._conn.execute(
+        "SELECT html, etag, last_modified, fetched_at FROM pages WHERE url = ?", (normalize_url(url),)
+    ).fetchone()
+
+
+def test_fresh_entry_is_served_without_any_request(site, tmp_path):
+    cache = PageCache(str(tmp_path / "pages.sqlite3"), default_ttl=600)
+    fetch, calls = _fetcher(site)
+    assert cache.fetch(site.url, "nobright", fetch) == site.body
+    assert cache.fetch(site.url, "nobright", fetch) == site.body
+    assert len(calls) == 1
+    # Lưu trang không gửi thêm request HEAD nào
+    assert [method for method, _ in site.requests] == ["GET"]
+    assert cache.stats()['hits'] == 1
+
+
+@pytest.mark.parametrize("validator", ["etag", "last_modified"])
+def test_expired_entry_revalidated_with_304(site, tmp_path, validator):
+    if validator == "etag":
+        site.last_modified = None
+    else:
+        site.etag = None
+    cache = PageCache(str(tmp_path / "pages.sqlite3"), default_ttl=0)
+    fetch, calls = _fetcher(site)
+    cache.fetch(site.url, "nobright", fetch)
+    fetched_at = _row(cache, site.url)[3]
+    time.sleep(0.01)
+
+    assert cache.fetch(site.url, "nobright", fetch) == site.body
+    assert len(calls) == 1
+    method, headers = site.requests[-1]
+    assert method == "HEAD"
+    if validator == "etag":
+        assert headers.get("If-None-Match") == '"v1"'
+    else:
+        assert headers.get("If-Modified-Since") == "Mon, 01 Jan 2024 00:00:00 GMT"
+    assert _row(cache, site.url)[3] > fetched_at
+    assert cache.stats()['revalidated'] == 1
+
+
+def test_changed_page_replaces_entry(site, tmp_path):
+    cache = PageCache(str(tmp_path / "pages.sqlite3"), default_ttl=0)
+    fetch, calls = _fetcher(site)
+    cache.fetch(site.url, "nobright", fetch)
+
+    site.body, site.etag = "<html><body>v2</body></html>", '"v2"'
+    assert cache.fetch(site.url, "nobright", fetch) == "<html><body>v2</body></html>"
+    assert len(calls) == 2
+    assert [method for method, _ in site.requests] == ["GET", "HEAD", "GET"]
+    html, etag, _, _ = _row(cache, site.url)
+    assert (html, etag) == ("<html><body>v2</body></html>", '"v2"')
+
+
+def test_entry_without_validators_expires_without_probe(site, tmp_path):
+    cache = PageCache(str(tmp_path / "pages.sqlite3"), default_ttl=0)
+    cache.put(site.url, "nobright", "<html>old</html>")
+    fetch, calls = _fetcher(site)
+    assert cache.fetch(site.url, "nobright", fetch) == site.body
+    assert [method for method, _ in site.requests] == ["GET"]
+
+
+def test_domain_ttl_overrides_default(tmp_path):
+    cache = PageCache(str(tmp_path / "pages.sqlite3"), default_ttl=600,
+                      domain_ttls={'example.com': 60, 'news.example.com': 5})
+    assert cache.ttl_for("https://www.example.com/a") == 60
+    assert cache.ttl_for("https://news.example.com/a") == 5
+    assert cache.ttl_for("https://other.vn/a") == 600
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("HTTP://Example.COM:80/a#section", "http://example.com/a"),
+    ("https://example.com:443/a?b=2&a=1", "https://example.com/a?a=1&b=2"),
+    ("https://example.com/a?utm_source=x&id=3&fbclid=y&gclid=z", "https://example.com/a?id=3"),
+    ("https://example.com", "https://example.com/"),
+    ("https://example.com:8443/a", "https://example.com:8443/a"),
+])
+def test_normalize_url(url, expected):
+    assert normalize_url(url) == expected
@@ -0,0 +1,56 @@
+import threading
+
+from pagination import crawl_pages
+
+START_URL = "https://example.com/list"
+FIRST_HTML = '<a href="/list?page=2">2</a> <a href="/list?page=3">3</a>'
+
+
+def _page_number(url):
+    return int(url.rsplit("=", 1)[1]) if "page=" in url else 1
+
+
+def _crawl(last_page, max_pages=50, max_workers=4):
+    fetched = []
+    active = [0, 0]
+    lock = threading.Lock()
+
+    def fetch(url):
+        with lock:
+            fetched.append(_page_number(url))
+            active[0] += 1
+            active[1] = max(active[1], active[0])
+        try:
+            page = _page_number(url)
+            return f"Trang {page}" if page <= last_page else ""
+        finally:
+            with lock:
+                active[0] -= 1
+
+    result = crawl_pages(START_URL, FIRST_HTML, fetch, lambda html, url: html,
+                         max_pages=max_pages, max_workers=max_workers)
+    return result, fetched, active[1]
+
+
+def test_numbered_pages_in_order():
+    result, fetched, _ = _crawl(last_page=6, max_pages=6)
+    assert result['mode'] == 'numbered'
+    assert result['stop_reason'] == 'max_pages'
+    assert [page['page'] for page in result['pages']] == [1, 2, 3, 4, 5, 6]
+    assert sorted(fetched) == [2, 3, 4, 5, 6]
+
+
+def test_stops_submitting_after_last_page():
+    result, fetched, max_active = _crawl(last_page=3, max_pages=50, max_workers=4)
+    assert result['stop_reason'] == 'empty_page'
+    assert [page['page'] for page in result['pages']] == [1, 2, 3]
+    # Chỉ các trang trong cửa sổ max_workers sau trang cuối được tải, không phải cả 49 trang
+    assert max(fetched) <= 4 + 4
+    assert max_active <= 4
+
+
+def test_single_worker_fetches_sequentially():
+    result, fetched, max_active = _crawl(last_page=2, max_pages=20, max_workers=1)
+    assert [page['page'] for page in result['pages']] == [1, 2]
+    assert fetched == [2, 3]
+    assert max_active == 1
@@ -0,0 +1,59 @@
+import threading
+import time
+
+import parse
+
+
+def test_parse_with_ollama_reports_each_chunk(monkeypatch):
+    responses = {
+        "Họ và tên: An": '[{"Họ và tên": "An"}]',
+        "Họ và tên: Bình": '[{"Họ và tên": "Bình"}]',
+    }
+    monkeypatch.setattr(
+        parse, "_call_model",
+        lambda prompt, variables, output_format=None: (responses[variables['dom_content']], {}, 10),
+    )
+    progress = []
+
+    def on_chunk(result, accumulator):
+        progress.append((result['index'], accumulator.completed_chunks, accumulator.total,
+                         len(accumulator.result()['structured_data'])))
+
+    parsed = parse.parse_with_ollama(
+        list(responses), "Họ và tên", max_workers=1, use_cache=False, on_chunk=on_chunk,
+        structured_output=False, direct_records=[{'HoVaTen': 'Chi'}], relevance_threshold=0,
+    )
+    assert sorted(index for index, *_ in progress) == [1, 2]
+    assert [(done, total) for _, done, total, _ in progress] == [(1, 2), (2, 2)]
+    assert progress[-1][3] == 3
+    assert [record['HoVaTen'] for record in parsed['structured_data']] == ['Chi', 'An', 'Bình']
+    assert parsed['stats']['records_without_llm'] == 1
+    assert parsed['completed']
+
+
+def test_on_chunk_exception_cancels_remaining_chunks(monkeypatch):
+    calls = []
+    lock = threading.Lock()
+
+    def call_model(prompt, variables, output_format=None):
+        with lock:
+            calls.append(variables['dom_content'])
+        time.sleep(0.02)
+        return '[]', {}, 10
+
+    monkeypatch.setattr(parse, "_call_model", call_model)
+
+    class Stop(Exception):
+        pass
+
+    def on_chunk(result, accumulator):
+        raise Stop
+
+    chunks = [f"Họ và tên: {i}" for i in range(20)]
+    try:
+        parse.parse_with_ollama(chunks, "Họ và tên", max_workers=1, use_cache=False,
+                                on_chunk=on_chunk, structured_output=False, relevance_threshold=0)
+    except Stop:
+        pass
+    # Chunk đang chạy được làm xong, các chunks còn lại bị hủy
+    assert len(calls) <= 2
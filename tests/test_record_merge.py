@@ -0,0 +1,86 @@
+import pytest
+
+from record_merge import RecordMerger, normalize_value
+
+
+def _merge(records):
+    merger = RecordMerger()
+    statuses = [merger.add(record) for record in records]
+    return merger, statuses
+
+
+def test_normalize_value_folds_case_accents_and_whitespace():
+    assert normalize_value("  Nguyễn   VĂN  Đức. ") == "nguyen van duc"
+    assert normalize_value(None) == ""
+
+
+@pytest.mark.parametrize("value", [1, 1.0, "1", " 1 "])
+def test_same_number_in_any_form_is_a_duplicate(value):
+    merger, statuses = _merge([{'HoVaTen': 'An', 'SoNha': 1}, {'HoVaTen': 'An', 'SoNha': value}])
+    assert statuses == ['new', 'duplicate']
+    assert merger.records == [{'HoVaTen': 'An', 'SoNha': 1}]
+
+
+@pytest.mark.parametrize("first, second", [
+    ("10", "10.5"),
+    ("1", "1,000"),
+    (1, 1.5),
+    ("1", "1.0"),
+    ("Giá 10", "Giá 10.5 triệu"),
+])
+def test_different_numbers_are_not_merged(first, second):
+    merger, statuses = _merge([{'HoVaTen': 'An', 'Gia': first}, {'HoVaTen': 'An', 'Gia': second}])
+    assert statuses == ['new', 'new']
+    assert [record['Gia'] for record in merger.records] == [first, second]
+
+
+def test_records_with_same_identity_are_merged():
+    merger, statuses = _merge([
+        {'HoVaTen': 'Nguyễn Văn An', 'NamSinh': '1960', 'DiaChi': 'Hà'},
+        {'HoVaTen': 'nguyen van an', 'QueQuan': 'Hà Nội', 'DiaChi': 'Hà Nội, Việt Nam'},
+    ])
+    assert statuses == ['new', 'merged']
+    assert merger.records == [{
+        'HoVaTen': 'Nguyễn Văn An', 'NamSinh': '1960', 'DiaChi': 'Hà Nội, Việt Nam', 'QueQuan': 'Hà Nội',
+    }]
+    assert merger.stats()['records_merged'] == 1
+
+
+def test_conflicting_records_with_same_identity_are_kept_apart():
+    merger, statuses = _merge([
+        {'HoVaTen': 'Nguyễn Văn An', 'NamSinh': '1960'},
+        {'HoVaTen': 'Nguyễn Văn An', 'NamSinh': '1975'},
+    ])
+    assert statuses == ['new', 'new']
+    assert len(merger.records) == 2
+
+
+def test_records_without_identity_are_keyed_on_all_fields():
+    merger, statuses = _merge([
+        {'ChucVu': 'Giám đốc', 'Ten': 'Nguyễn'},
+        {'ChucVu': 'Giám đốc', 'Ten': 'Nguyễn Văn A'},
+        {'ChucVu': 'giám đốc', 'Ten': 'nguyễn'},
+    ])
+    # Chỉ trùng field đầu tiên thì không gộp; trùng mọi field thì là bản trùng
+    assert statuses == ['new', 'new', 'duplicate']
+    assert merger.records == [
+        {'ChucVu': 'Giám đốc', 'Ten': 'Nguyễn'},
+        {'ChucVu': 'Giám đốc', 'Ten': 'Nguyễn Văn A'},
+    ]
+
+
+def test_first_seen_order_is_preserved():
+    merger, _ = _merge([
+        {'HoVaTen': 'C'}, {'HoVaTen': 'A', 'NamSinh': '1960'}, {'HoVaTen': 'B'},
+        {'HoVaTen': 'A', 'QueQuan': 'Huế'}, {'HoVaTen': 'C'}, {'HoVaTen': 'D'},
+    ])
+    assert [record['HoVaTen'] for record in merger.records] == ['C', 'A', 'B', 'D']
+    assert merger.records[1] == {'HoVaTen': 'A', 'NamSinh': '1960', 'QueQuan': 'Huế'}
+    assert merger.stats() == {
+        'received_records': 6, 'unique_records': 4, 'duplicates_removed': 1, 'records_merged': 1,
+    }
+
+
+def test_non_dict_records_are_deduplicated_by_value():
+    merger, statuses = _merge(["Nguyễn Văn An", "nguyen van an", "Trần Thị Bình"])
+    assert statuses == ['new', 'duplicate', 'new']
@@ -0,0 +1,56 @@
+import pytest
+
+import relevance
+from benchmarks.fixtures import build_page
+from relevance import score_chunks, select_chunks
+from scrape_utils import DomPipeline, split_dom_content
+
+DESCRIPTION = "Họ và tên, Năm sinh, Quê quán"
+
+RECORD_CHUNKS = [
+    "Họ và tên: Nguyễn Văn An\nNăm sinh: 1960\nQuê quán: Hà Nội",
+    "Họ và tên: Trần Thị Bình\nNăm sinh: 1972\nQuê quán: Nghệ An",
+    "ho va ten: Le Minh Chau\nnam sinh: 1985\nque quan: Da Nang",
+]
+NOISE_CHUNKS = [
+    "Trang chủ | Giới thiệu | Liên hệ | Đăng nhập | Tìm kiếm",
+    "Bản quyền thuộc Văn phòng Quốc hội. Địa chỉ: 22 Hùng Vương, Ba Đình.",
+]
+
+
+def test_default_threshold_is_off():
+    assert relevance.RELEVANCE_THRESHOLD == 0
+    chunks = RECORD_CHUNKS + NOISE_CHUNKS
+    selection = select_chunks(chunks, DESCRIPTION)
+    assert selection['chunks'] == chunks
+    assert selection['skipped'] == 0
+
+
+def test_chunks_with_described_fields_are_kept():
+    chunks = [NOISE_CHUNKS[0], RECORD_CHUNKS[0], NOISE_CHUNKS[1], RECORD_CHUNKS[1], RECORD_CHUNKS[2]]
+    selection = select_chunks(chunks, DESCRIPTION, threshold=0.1)
+    assert selection['indices'] == [1, 3, 4]
+    assert selection['chunks'] == [chunks[1], chunks[3], chunks[4]]
+
+
+def test_every_record_chunk_of_a_long_list_is_kept():
+    # Mọi chunk của danh sách đều lặp lại nhãn nên idf của nhãn gần bằng 0
+    content = DomPipeline(build_page(500)).clean_text()
+    chunks = split_dom_content(content, max_length=4000)
+    selection = select_chunks(chunks, DESCRIPTION, threshold=0.1)
+    record_chunks = [i for i, chunk in enumerate(chunks) if "Họ và tên" in chunk]
+    assert len(record_chunks) > 10
+    assert set(record_chunks) <= set(selection['indices'])
+
+
+@pytest.mark.parametrize("chunk", RECORD_CHUNKS[:1] + NOISE_CHUNKS)
+@pytest.mark.parametrize("threshold, budget", [(0.1, None), (1.0, None), (0.5, 0)])
+def test_single_chunk_page_is_never_dropped(chunk, threshold, budget):
+    selection = select_chunks([chunk], DESCRIPTION, threshold=threshold, budget=budget)
+    assert selection['chunks'] == [chunk]
+    assert selection['skipped'] == 0
+
+
+def test_no_matching_terms_keeps_everything():
+    assert score_chunks(NOISE_CHUNKS, DESCRIPTION) == [1.0, 1.0]
+    assert select_chunks(NOISE_CHUNKS, DESCRIPTION, threshold=0.5)['skipped'] == 0
@@ -0,0 +1,57 @@
+from table_extract import extract_structured
+
+DESCRIPTION = "Họ và tên, Năm sinh, Quê quán"
+
+
+def _page(table):
+    return f"<html><body><h1>Danh sách</h1>{table}<p>Ghi chú cuối trang</p></body></html>"
+
+
+def test_table_with_every_field_is_extracted_and_removed():
+    html = _page(
+        "<table>"
+        "<tr><th>STT</th><th>Họ và tên</th><th>Năm sinh</th><th>Quê quán</th></tr>"
+        "<tr><td>1</td><td>Nguyễn Văn An</td><td>1960</td><td>Hà Nội</td></tr>"
+        "<tr><td>2</td><td>Trần Thị Bình</td><td>1972</td><td>Nghệ An</td></tr>"
+        "</table>"
+    )
+    result = extract_structured(html, DESCRIPTION)
+    assert result['records'] == [
+        {'HoVaTen': 'Nguyễn Văn An', 'NamSinh': '1960', 'QueQuan': 'Hà Nội'},
+        {'HoVaTen': 'Trần Thị Bình', 'NamSinh': '1972', 'QueQuan': 'Nghệ An'},
+    ]
+    assert result['tables'] == 1
+    assert "Nguyễn Văn An" not in result['residual_text']
+    assert "Ghi chú cuối trang" in result['residual_text']
+
+
+def test_partially_matching_table_is_left_for_the_llm():
+    # Thiếu cột "Quê quán": quê quán chỉ có trong text của ô, LLM phải đọc cả bảng
+    html = _page(
+        "<table>"
+        "<tr><th>Họ và tên</th><th>Năm sinh</th><th>Thông tin khác</th></tr>"
+        "<tr><td>Nguyễn Văn An</td><td>1960</td><td>Quê ở Hà Nội</td></tr>"
+        "<tr><td>Trần Thị Bình</td><td>1972</td><td>Quê ở Nghệ An</td></tr>"
+        "</table>"
+    )
+    result = extract_structured(html, DESCRIPTION)
+    assert result['records'] == []
+    assert result['tables'] == 0
+    for text in ("Họ và tên", "Nguyễn Văn An", "Quê ở Hà Nội", "Quê ở Nghệ An"):
+        assert text in result['residual_text']
+
+
+def test_header_below_title_row_keeps_the_title():
+    html = _page(
+        "<table>"
+        "<tr><td colspan=3>Đại biểu khóa XV (cập nhật 2024)</td></tr>"
+        "<tr><td>Họ và tên</td><td>Năm sinh</td><td>Quê quán</td></tr>"
+        "<tr><td>Nguyễn Văn An</td><td>1960</td><td>Hà Nội</td></tr>"
+        "<tr><td>Trần Thị Bình</td><td>1972</td><td>Nghệ An</td></tr>"
+        "</table>"
+    )
+    result = extract_structured(html, DESCRIPTION)
+    assert [record['HoVaTen'] for record in result['records']] == ['Nguyễn Văn An', 'Trần Thị Bình']
+    assert result['tables'] == 1
+    assert "Đại biểu khóa XV (cập nhật 2024)" in result['residual_text']
+    assert "Nguyễn Văn An" not in result['residual_text']